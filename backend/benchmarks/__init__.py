@@ -0,0 +1,4 @@
+"""
+Benchmarks de ingesta: corpus sintético reproducible, sustituto local de Elasticsearch
+y medición por etapa. Ver benchmarks/run.py.
+"""
@@ -0,0 +1,61 @@
+"""
+Compara dos resultados de benchmarks.run y marca las etapas que empeoraron.
+
+    python -m benchmarks.compare base.json nuevo.json --threshold 0.10
+
+Termina con código 1 si alguna etapa pierde más de `threshold` de páginas/s.
+"""
+import argparse
+import json
+import sys
+from typing import Dict, List
+
+
+def compare(base: Dict, new: Dict, threshold: float) -> List[Dict]:
+    rows = []
+    for name, new_stage in new["stages"].items():
+        base_stage = base["stages"].get(name)
+        if base_stage is None:
+            continue
+        before = base_stage.get("pages_per_second")
+        after = new_stage.get("pages_per_second")
+        change = (after - before) / before if before and after is not None else None
+        rows.append({
+            "stage": name,
+            "base_pages_per_second": before,
+            "new_pages_per_second": after,
+            "change": round(change, 4) if change is not None else None,
+            "regression": change is not None and change < -threshold
+        })
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compara dos resultados de benchmark")
+    parser.add_argument('base')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    with open(args.base, encoding='utf-8') as file:
+        base = json.load(file)
+    with open(args.new, encoding='utf-8') as file:
+        new = json.load(file)
+
+    if base.get("corpus") != new.get("corpus"):
+        print("Aviso: los corpus de ambos resultados no tienen la misma especificación")
+
+    rows = compare(base, new, args.threshold)
+    print(f"{base.get('git_commit')} -> {new.get('git_commit')}")
+    for row in rows:
+        change = f"{row['change'] * 100:+.1f}%" if row["change"] is not None else "n/d"
+        mark = "  REGRESIÓN" if row["regression"] else ""
+        print(
+            f"{row['stage']:20s} {row['base_pages_per_second'] or 0:9.2f} -> "
+            f"{row['new_pages_per_second'] or 0:9.2f} pág/s {change:>8s}{mark}"
+        )
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
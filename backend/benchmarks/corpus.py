@@ -0,0 +1,286 @@
+"""
+Generador de corpus sintéticos y reproducibles para los benchmarks de ingesta.
+
+Con la misma semilla y los mismos parámetros se generan exactamente los mismos archivos,
+de modo que los resultados de dos commits se pueden comparar. Los PDFs se escriben a mano
+(sin dependencias): las páginas de texto usan Helvetica y las páginas escaneadas son una
+imagen en escala de grises con el texto dibujado por Pillow, que ya está instalado como
+dependencia de pdf2image.
+"""
+import io
+import json
+import random
+import zipfile
+import zlib
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+from xml.sax.saxutils import escape
+
+WORDS = (
+    "documento informe expediente resolución contrato anexo cláusula artículo proveedor "
+    "factura presupuesto ejecución auditoría proyecto cronograma entrega revisión firma "
+    "acta reunión acuerdo servicio mantenimiento garantía plazo importe pago registro "
+    "dirección departamento gestión calidad control procedimiento norma técnico sistema "
+    "información archivo búsqueda índice página sección capítulo conclusión análisis"
+).split()
+
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+
+
+@dataclass
+class CorpusSpec:
+    """Parámetros del corpus; se guardan junto a los resultados del benchmark."""
+    seed: int = 42
+    text_pdfs: int = 10
+    image_pdfs: int = 2
+    mixed_pdfs: int = 2
+    docx_files: int = 4
+    pages_per_document: int = 5
+    words_per_page: int = 300
+    # Resolución de las páginas escaneadas; determina el tamaño de los PDFs de imagen
+    image_dpi: int = 150
+    # Fracción de páginas escaneadas en los PDFs mixtos
+    mixed_image_ratio: float = 0.5
+
+
+def _paragraphs(rng: random.Random, words: int) -> List[str]:
+    paragraphs = []
+    remaining = words
+    while remaining > 0:
+        size = min(remaining, rng.randint(20, 60))
+        sentence = ' '.join(rng.choice(WORDS) for _ in range(size))
+        paragraphs.append(sentence[0].upper() + sentence[1:] + '.')
+        remaining -= size
+    return paragraphs
+
+
+def _wrap(paragraphs: List[str], width: int) -> List[str]:
+    lines = []
+    for paragraph in paragraphs:
+        line = ''
+        for word in paragraph.split():
+            if line and len(line) + len(word) + 1 > width:
+                lines.append(line)
+                line = word
+            else:
+                line = f"{line} {word}".strip()
+        lines.append(line)
+        lines.append('')
+    return lines
+
+
+def _pdf_string(text: str) -> bytes:
+    data = text.encode('cp1252', errors='replace')
+    return b'(' + data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+class _PDFWriter:
+    """Escritor mínimo de PDF con páginas de texto y páginas de imagen."""
+    def __init__(self):
+        self.objects: List[bytes] = []
+        self.page_ids: List[int] = []
+        self.font_id = self._add(
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+        )
+        self.pages_id = self._reserve()
+
+    def _reserve(self) -> int:
+        self.objects.append(b'')
+        return len(self.objects)
+
+    def _add(self, body: bytes) -> int:
+        self.objects.append(body)
+        return len(self.objects)
+
+    def _stream(self, data: bytes, extra: bytes = b'') -> int:
+        compressed = zlib.compress(data)
+        return self._add(
+            b"<< " + extra + b" /Filter /FlateDecode /Length " + str(len(compressed)).encode()
+            + b" >>\nstream\n" + compressed + b"\nendstream"
+        )
+
+    def _page(self, content_id: int, resources: bytes):
+        self.page_ids.append(self._add(
+            f"<< /Type /Page /Parent {self.pages_id} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Contents {content_id} 0 R /Resources ".encode() + resources + b" >>"
+        ))
+
+    def add_text_page(self, lines: List[str]):
+        content = [b"BT /F1 10 Tf 12 TL 50 750 Td"]
+        for line in lines[:58]:
+            content.append(_pdf_string(line) + b" Tj T*")
+        content.append(b"ET")
+        content_id = self._stream(b"\n".join(content))
+        self._page(content_id, f"<< /Font << /F1 {self.font_id} 0 R >> >>".encode())
+
+    def add_image_page(self, pixels: bytes, width: int, height: int):
+        image_id = self._stream(
+            pixels,
+            f"/Type /XObject /Subtype /Image /Width {width} /Height {height} "
+            f"/ColorSpace /DeviceGray /BitsPerComponent 8".encode()
+        )
+        content_id = self._stream(f"q {PAGE_WIDTH} 0 0 {PAGE_HEIGHT} 0 0 cm /Im1 Do Q".encode())
+        self._page(content_id, f"<< /XObject << /Im1 {image_id} 0 R >> >>".encode())
+
+    def write(self, path: Path, title: str):
+        kids = ' '.join(f"{page_id} 0 R" for page_id in self.page_ids)
+        self.objects[self.pages_id - 1] = (
+            f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>".encode()
+        )
+        catalog_id = self._add(f"<< /Type /Catalog /Pages {self.pages_id} 0 R >>".encode())
+        info_id = self._add(
+            b"<< /Title " + _pdf_string(title) + b" /Author (benchmark) /CreationDate (D:20250101120000) >>"
+        )
+
+        out = io.BytesIO()
+        out.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(self.objects, 1):
+            offsets.append(out.tell())
+            out.write(f"{number} 0 obj\n".encode() + body + b"\nendobj\n")
+        xref = out.tell()
+        out.write(f"xref\n0 {len(self.objects) + 1}\n0000000000 65535 f \n".encode())
+        for offset in offsets:
+            out.write(f"{offset:010d} 00000 n \n".encode())
+        out.write(
+            f"trailer\n<< /Size {len(self.objects) + 1} /Root {catalog_id} 0 R /Info {info_id} 0 R >>\n"
+            f"startxref\n{xref}\n%%EOF\n".encode()
+        )
+        path.write_bytes(out.getvalue())
+
+
+def _render_page_image(lines: List[str], dpi: int):
+    """Dibuja las líneas en una imagen del tamaño de una página carta a `dpi`."""
+    from PIL import Image, ImageDraw, ImageFont
+
+    scale = dpi / 72
+    width, height = int(PAGE_WIDTH * scale), int(PAGE_HEIGHT * scale)
+    image = Image.new('L', (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    font_size = int(10 * scale)
+    try:
+        font = ImageFont.load_default(size=font_size)
+    except TypeError:  # Pillow < 10.1 no admite tamaño en la fuente por defecto
+        font = ImageFont.load_default()
+
+    y = int(40 * scale)
+    for line in lines[:58]:
+        draw.text((int(50 * scale), y), line, fill=0, font=font)
+        y += int(12 * scale)
+    return image.tobytes(), width, height
+
+
+def _write_pdf(path: Path, rng: random.Random, spec: CorpusSpec, image_pages: set) -> Dict:
+    writer = _PDFWriter()
+    words = 0
+    for page_num in range(1, spec.pages_per_document + 1):
+        lines = _wrap(_paragraphs(rng, spec.words_per_page), 95)
+        words += spec.words_per_page
+        if page_num in image_pages:
+            writer.add_image_page(*_render_page_image(lines, spec.image_dpi))
+        else:
+            writer.add_text_page(lines)
+    writer.write(path, path.stem)
+    return {"pages": spec.pages_per_document, "image_pages": len(image_pages), "words": words}
+
+
+def _write_docx(path: Path, rng: random.Random, spec: CorpusSpec) -> Dict:
+    body = []
+    for page_num in range(1, spec.pages_per_document + 1):
+        for paragraph in _paragraphs(rng, spec.words_per_page):
+            body.append(f'<w:p><w:r><w:t xml:space="preserve">{escape(paragraph)}</w:t></w:r></w:p>')
+        if page_num < spec.pages_per_document:
+            body.append('<w:p><w:r><w:br w:type="page"/></w:r></w:p>')
+
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f'<w:body>{"".join(body)}</w:body></w:document>'
+    )
+    core = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" '
+        'xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:dcterms="http://purl.org/dc/terms/" '
+        'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">'
+        f'<dc:title>{escape(path.stem)}</dc:title><dc:creator>benchmark</dc:creator>'
+        '<dcterms:created xsi:type="dcterms:W3CDTF">2025-01-01T12:00:00Z</dcterms:created>'
+        '</cp:coreProperties>'
+    )
+    content_types = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/word/document.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+        '<Override PartName="/docProps/core.xml" '
+        'ContentType="application/vnd.openxmlformats-package.core-properties+xml"/>'
+        '</Types>'
+    )
+    rels = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="word/document.xml"/>'
+        '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/package/2006/relationships/metadata/core-properties" '
+        'Target="docProps/core.xml"/>'
+        '</Relationships>'
+    )
+
+    # Fecha fija en las entradas del zip para que el archivo sea idéntico entre ejecuciones
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, data in (
+            ('[Content_Types].xml', content_types),
+            ('_rels/.rels', rels),
+            ('word/document.xml', document),
+            ('docProps/core.xml', core),
+        ):
+            archive.writestr(zipfile.ZipInfo(name, date_time=(2025, 1, 1, 0, 0, 0)), data)
+    return {"pages": spec.pages_per_document, "image_pages": 0, "words": spec.pages_per_document * spec.words_per_page}
+
+
+def generate_corpus(output_dir: str, spec: Optional[CorpusSpec] = None) -> Dict:
+    """
+    Genera el corpus en `output_dir` con subcarpetas text/, image/, mixed/ y docx/.
+    Si ya existe un corpus generado con la misma especificación se reutiliza.
+
+    Returns:
+        Dict: Manifiesto con la especificación y los archivos generados por tipo
+    """
+    spec = spec or CorpusSpec()
+    root = Path(output_dir)
+    manifest_path = root / 'manifest.json'
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+        if manifest.get('spec') == asdict(spec):
+            return manifest
+
+    rng = random.Random(spec.seed)
+    files: Dict[str, List[Dict]] = {"text": [], "image": [], "mixed": [], "docx": []}
+    all_pages = set(range(1, spec.pages_per_document + 1))
+
+    for kind, count in (("text", spec.text_pdfs), ("image", spec.image_pdfs), ("mixed", spec.mixed_pdfs)):
+        (root / kind).mkdir(parents=True, exist_ok=True)
+        for number in range(count):
+            path = root / kind / f"{kind}_{number:04d}.pdf"
+            if kind == "text":
+                image_pages = set()
+            elif kind == "image":
+                image_pages = all_pages
+            else:
+                image_count = max(1, round(spec.pages_per_document * spec.mixed_image_ratio))
+                image_pages = set(rng.sample(sorted(all_pages), min(image_count, len(all_pages))))
+            stats = _write_pdf(path, rng, spec, image_pages)
+            files[kind].append({"path": str(path), "bytes": path.stat().st_size, **stats})
+
+    (root / "docx").mkdir(parents=True, exist_ok=True)
+    for number in range(spec.docx_files):
+        path = root / "docx" / f"docx_{number:04d}.docx"
+        stats = _write_docx(path, rng, spec)
+        files["docx"].append({"path": str(path), "bytes": path.stat().st_size, **stats})
+
+    manifest = {"spec": asdict(spec), "files": files}
+    manifest_path.write_text(json.dumps(manifest, indent=2), encoding='utf-8')
+    return manifest
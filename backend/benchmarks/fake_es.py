@@ -0,0 +1,86 @@
+"""
+Sustituto local de AsyncElasticsearch para medir la ingesta sin un clúster.
+
+Implementa solo las llamadas que usa PDFElasticsearchService (index, bulk, indices.*)
+y acepta todos los documentos, registrando cuántos recibe y cuántos bytes ocupan. La
+latencia de red se puede simular con `latency_seconds`.
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+from elasticsearch.serializer import JSONSerializer
+
+
+class _FakeIndices:
+    def __init__(self, client: "FakeAsyncElasticsearch"):
+        self.client = client
+
+    async def exists(self, index: str, **kwargs) -> bool:
+        return index in self.client.created_indices
+
+    async def create(self, index: str, body: Optional[Dict] = None, **kwargs) -> Dict:
+        self.client.created_indices.add(index)
+        return {"acknowledged": True, "index": index}
+
+    async def refresh(self, index: Optional[str] = None, **kwargs) -> Dict:
+        self.client.stats["refreshes"] += 1
+        return {"_shards": {"failed": 0}}
+
+
+class FakeAsyncElasticsearch:
+    def __init__(self, latency_seconds: float = 0.0):
+        self.latency_seconds = latency_seconds
+        # Los helpers de bulk serializan las acciones con el serializer del transporte
+        self.transport = SimpleNamespace(serializer=JSONSerializer())
+        self.indices = _FakeIndices(self)
+        self.created_indices = set()
+        self.documents: Dict[str, int] = {}
+        self.stats = {"index_requests": 0, "bulk_requests": 0, "documents": 0, "bytes": 0, "refreshes": 0}
+
+    async def _wait(self):
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+
+    async def index(self, index: str, id: str, document: Dict, **kwargs) -> Dict:
+        await self._wait()
+        size = len(json.dumps(document, ensure_ascii=False, default=str).encode('utf-8'))
+        self.documents[id] = size
+        self.stats["index_requests"] += 1
+        self.stats["documents"] += 1
+        self.stats["bytes"] += size
+        return {"_id": id, "result": "created"}
+
+    async def bulk(self, body: Any, **kwargs) -> Dict:
+        """Recibe el NDJSON de los helpers de bulk y responde a cada acción con éxito."""
+        await self._wait()
+        if isinstance(body, (bytes, bytearray)):
+            body = body.decode('utf-8')
+        lines: List[str] = body.splitlines() if isinstance(body, str) else [
+            line if isinstance(line, str) else json.dumps(line) for line in body
+        ]
+        self.stats["bulk_requests"] += 1
+        self.stats["bytes"] += sum(len(line) for line in lines)
+
+        items = []
+        position = 0
+        while position < len(lines):
+            if not lines[position].strip():
+                position += 1
+                continue
+            action = json.loads(lines[position])
+            op_type, meta = next(iter(action.items()))
+            position += 1
+            if op_type != "delete":
+                self.documents[meta["_id"]] = len(lines[position])
+                position += 1
+                self.stats["documents"] += 1
+            else:
+                self.documents.pop(meta["_id"], None)
+            status = 201 if op_type in ("index", "create") else 200
+            items.append({op_type: {"_index": meta.get("_index"), "_id": meta["_id"], "status": status}})
+
+        return {"took": 0, "errors": False, "items": items}
+
+    async def close(self):
+        pass
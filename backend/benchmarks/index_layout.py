@@ -0,0 +1,177 @@
+"""
+Compara los layouts de índice ('nested' y 'pages') contra un Elasticsearch real.
+
+    python -m benchmarks.index_layout --corpus /tmp/bench-layout --text-pdfs 200 --pages 50
+    ES_HOST=localhost python -m benchmarks.index_layout --queries 200 --output layout.json
+
+Extrae una vez los PDFs de texto del corpus sintético y los indexa en un índice temporal
+por layout. Para cada uno informa documentos y páginas por segundo de la ingesta, tamaño
+del índice tras forcemerge y latencia p50/p95 de búsquedas fuzzy, exactas y match_all
+con términos tomados del propio corpus. Los índices se borran al terminar salvo con --keep.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+os.environ.setdefault('EXTRACTION_CACHE_ENABLED', 'false')
+logging.basicConfig(level=logging.WARNING)
+
+from .corpus import CorpusSpec, generate_corpus
+from .metrics import StageResult, StageTimer
+
+from src.utils.es_client import close_es_client, get_es_client
+from src.utils.process_documents.pdf_management.index_layout import INDEX_LAYOUTS
+from src.utils.process_documents.pdf_management.service import PDFElasticsearchService
+from src.utils.process_documents.pdf_management.text_process_pdf import TextPDFProcessor
+from src.service.search_service import SearchService
+
+
+def extract_corpus(files: List[Dict]) -> List[Tuple[str, Dict]]:
+    processor = TextPDFProcessor()
+    extracted = []
+    for file in files:
+        info = processor.extract_text_from_pdf(file["path"])
+        if 'error' in info:
+            continue
+        for page in info['pages'].values():
+            page['is_image'] = False
+            page['confidence'] = 1.0
+        extracted.append((file["path"], info))
+    return extracted
+
+
+def sample_terms(extracted: List[Tuple[str, Dict]], count: int, seed: int) -> List[str]:
+    words = sorted({
+        word.strip('.,;:') for _, info in extracted for word in info['texto_completo'].split()
+        if len(word) > 4
+    })
+    rng = random.Random(seed)
+    return [rng.choice(words) for _ in range(count)] if words else []
+
+
+def _latency(seconds: List[float]) -> Dict:
+    ordered = sorted(seconds)
+    return {
+        "queries": len(ordered),
+        "p50_ms": round(statistics.median(ordered) * 1000, 2),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2)
+    }
+
+
+async def bench_layout(es, layout: str, root: str, extracted: List[Tuple[str, Dict]], terms: List[str], keep: bool) -> Dict:
+    index_name = f"bench_layout_{layout}"
+    await es.indices.delete(index=index_name, ignore=[404])
+    service = PDFElasticsearchService(es_client=es, index_name=index_name, index_layout=layout)
+    await service.setup_index()
+
+    try:
+        with StageTimer(StageResult(f"ingest:{layout}")) as ingest:
+            async with service.new_bulk_indexer(on_flush=None) as indexer:
+                for pdf_path, info in extracted:
+                    doc_id, document = service.build_document(pdf_path, root, info)
+                    for action_id, action in service.document_actions(doc_id, document):
+                        await indexer.add(action_id, action)
+                    ingest.files += 1
+                    ingest.pages += len(document["pages"])
+                    ingest.bytes += Path(pdf_path).stat().st_size
+            ingest.errors = indexer.stats["failed"]
+            await es.indices.refresh(index=index_name)
+
+        await es.indices.forcemerge(index=index_name, max_num_segments=1)
+        stats = await es.indices.stats(index=index_name)
+        primaries = stats["indices"][index_name]["primaries"]
+
+        search = SearchService(es, logging.getLogger("benchmark"), layout=layout)
+        builders = {
+            "fuzzy": lambda term: search.build_fuzzy_query(term, "AUTO", "OR"),
+            "exact": lambda term: search.build_exact_query(term),
+            "match_all": lambda term: search.build_match_all_query()
+        }
+        latencies = {}
+        for query_type, build in builders.items():
+            seconds = []
+            for term in terms:
+                query = build(term)
+                started = time.perf_counter()
+                response = await es.search(index=index_name, body=query, request_cache=False)
+                search.process_search_results(response, term if query_type != "match_all" else None, 10)
+                seconds.append(time.perf_counter() - started)
+            latencies[query_type] = _latency(seconds) if seconds else {}
+
+        result = ingest.to_dict()
+        result.update({
+            "layout": layout,
+            "documents_per_second": round(len(extracted) / ingest.seconds, 2) if ingest.seconds else None,
+            "es_documents": primaries["docs"]["count"],
+            "store_bytes": primaries["store"]["size_in_bytes"],
+            "query_latency": latencies
+        })
+        return result
+    finally:
+        if not keep:
+            await es.indices.delete(index=index_name, ignore=[404])
+
+
+async def run(args: argparse.Namespace) -> Dict:
+    spec = CorpusSpec(
+        seed=args.seed,
+        text_pdfs=args.text_pdfs,
+        image_pdfs=0,
+        mixed_pdfs=0,
+        docx_files=0,
+        pages_per_document=args.pages,
+        words_per_page=args.words_per_page
+    )
+    manifest = generate_corpus(args.corpus, spec)
+    extracted = extract_corpus(manifest["files"]["text"])
+    terms = sample_terms(extracted, args.queries, args.seed)
+
+    es = get_es_client()
+    try:
+        results = {}
+        for layout in args.layouts.split(','):
+            results[layout] = await bench_layout(es, layout.strip(), args.corpus, extracted, terms, args.keep)
+        return {"corpus": {"pdfs": len(extracted), "pages_per_pdf": args.pages}, "layouts": results}
+    finally:
+        await close_es_client()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara los layouts de índice nested y por páginas")
+    parser.add_argument('--corpus', default='/tmp/bench-layout', help="Directorio del corpus sintético")
+    parser.add_argument('--layouts', default=','.join(INDEX_LAYOUTS))
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--text-pdfs', type=int, default=100)
+    parser.add_argument('--pages', type=int, default=50)
+    parser.add_argument('--words-per-page', type=int, default=300)
+    parser.add_argument('--queries', type=int, default=100, help="Búsquedas por tipo de consulta")
+    parser.add_argument('--keep', action='store_true', help="No borrar los índices al terminar")
+    parser.add_argument('--output', help="Archivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+    for layout, result in results["layouts"].items():
+        latency = result["query_latency"]
+        print(
+            f"{layout:7s} ingesta {result['pages_per_second'] or 0:9.1f} pág/s "
+            f"{result['documents_per_second'] or 0:7.1f} PDF/s  "
+            f"índice {result['store_bytes'] / 1024 / 1024:8.2f} MB ({result['es_documents']} docs)  "
+            + "  ".join(
+                f"{query_type} p50={values.get('p50_ms')}ms p95={values.get('p95_ms')}ms"
+                for query_type, values in latency.items()
+            )
+        )
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Medición de tiempo, throughput y memoria de cada etapa del benchmark.
+"""
+import resource
+import statistics
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+
+def peak_rss_mb() -> Dict[str, float]:
+    """
+    Pico de memoria residente del proceso y de sus hijos ya terminados (p. ej. los
+    procesos de OCR). ru_maxrss está en KB en Linux y en bytes en macOS.
+    """
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / divisor, 1)
+    }
+
+
+@dataclass
+class StageResult:
+    name: str
+    files: int = 0
+    pages: int = 0
+    bytes: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    file_seconds: List[float] = field(default_factory=list)
+    peak_rss_mb: Optional[Dict[str, float]] = None
+    extra: Dict = field(default_factory=dict)
+
+    def record(self, size: int, pages: int, seconds: float, error: bool = False):
+        self.files += 1
+        self.bytes += size
+        self.pages += pages
+        self.file_seconds.append(seconds)
+        if error:
+            self.errors += 1
+
+    def to_dict(self) -> Dict:
+        result = asdict(self)
+        del result["file_seconds"]
+        result["seconds"] = round(self.seconds, 4)
+        result["pages_per_second"] = round(self.pages / self.seconds, 3) if self.seconds else None
+        result["mb_per_second"] = round(self.bytes / 1024 / 1024 / self.seconds, 3) if self.seconds else None
+        if self.file_seconds:
+            ordered = sorted(self.file_seconds)
+            result["file_seconds_p50"] = round(statistics.median(ordered), 4)
+            result["file_seconds_p95"] = round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 4)
+            result["file_seconds_max"] = round(ordered[-1], 4)
+        return result
+
+
+class StageTimer:
+    """
+    Context manager que mide el tiempo total de una etapa y el pico de memoria al terminar.
+    Si la etapa lanza una excepción se anota en `extra["error"]` y se propaga, para que el
+    benchmark falle con el error real y no más adelante con un resultado sin asignar.
+    """
+    def __init__(self, result: StageResult):
+        self.result = result
+        self._started = 0.0
+
+    def __enter__(self) -> StageResult:
+        self._started = time.perf_counter()
+        return self.result
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.result.seconds = time.perf_counter() - self._started
+        self.result.peak_rss_mb = peak_rss_mb()
+        if exc_val is not None:
+            self.result.extra["error"] = str(exc_val)
+        return False
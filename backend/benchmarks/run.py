@@ -0,0 +1,243 @@
+"""
+Benchmark de las etapas de ingesta sobre un corpus sintético.
+
+Uso (desde backend/):
+
+    python -m benchmarks.run --corpus /tmp/bench-corpus --text-pdfs 50 --pages 10
+    python -m benchmarks.compare benchmarks/results/antes.json benchmarks/results/despues.json
+
+Cada ejecución guarda un JSON con la especificación del corpus, el commit y, por etapa,
+páginas/s, MB/s, percentiles por archivo y el pico de memoria, para comparar commits.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# Sin caché de extracción se mide el trabajo real; se decide antes de importar src
+if '--use-cache' not in sys.argv:
+    os.environ['EXTRACTION_CACHE_ENABLED'] = 'false'
+# Los procesadores llaman a basicConfig; así no escriben cada archivo en pdf_processing.log
+logging.basicConfig(level=logging.WARNING)
+
+from .corpus import CorpusSpec, generate_corpus
+from .fake_es import FakeAsyncElasticsearch
+from .metrics import StageResult, StageTimer, peak_rss_mb
+
+STAGES = ("text_extraction", "text_backends", "ocr", "docx_extraction", "process_all_pdfs", "process_directory")
+RESULTS_DIR = Path(__file__).parent / 'results'
+
+
+def _page_count(info: Dict) -> int:
+    return info.get('document_info', {}).get('numero_paginas') or len(info.get('pages', {}))
+
+
+def _run_files(name: str, files: List[Dict], extract: Callable[[str], Dict]) -> StageResult:
+    with StageTimer(StageResult(name)) as result:
+        for file in files:
+            started = time.perf_counter()
+            info = extract(file["path"])
+            result.record(file["bytes"], _page_count(info), time.perf_counter() - started, 'error' in info)
+    return result
+
+
+def bench_text_extraction(manifest: Dict, args) -> StageResult:
+    from src.utils.process_documents.pdf_management.text_process_pdf import TextPDFProcessor
+    return _run_files("text_extraction", manifest["files"]["text"], TextPDFProcessor().extract_text_from_pdf)
+
+
+def bench_text_backends(manifest: Dict, args) -> Dict[str, Dict]:
+    """Cada backend de extracción de texto por separado, sobre los PDFs de texto y mixtos."""
+    from .text_backends import bench_backends
+    files = manifest["files"]["text"] + manifest["files"]["mixed"]
+    return bench_backends([file["path"] for file in files])
+
+
+def bench_ocr(manifest: Dict, args) -> StageResult:
+    from src.utils.process_documents.pdf_management.image_process_pdf import ImagePDFProcessor
+    from src.utils.process_documents.pdf_management.ocr_engine import OCRStreamEngine
+    processor = ImagePDFProcessor(OCRStreamEngine(
+        max_workers=args.workers,
+        profile=args.ocr_profile,
+        retry_profile=args.ocr_retry_profile or None
+    ))
+    return _run_files("ocr", manifest["files"]["image"], processor.extract_text_from_image_pdf)
+
+
+def bench_docx_extraction(manifest: Dict, args) -> StageResult:
+    from src.utils.process_documents.word_management.docx_text import DocxTextExtractor
+    return _run_files("docx_extraction", manifest["files"]["docx"], DocxTextExtractor().extract_text_from_docx)
+
+
+def _corpus_totals(manifest: Dict, kinds: tuple) -> Dict[str, int]:
+    files = [file for kind in kinds for file in manifest["files"][kind]]
+    return {
+        "files": len(files),
+        "bytes": sum(file["bytes"] for file in files),
+        "pages": sum(file["pages"] for file in files)
+    }
+
+
+def bench_process_all_pdfs(manifest: Dict, args) -> StageResult:
+    from src.utils.process_documents.pdf_management.pdf_manager import PDFManager
+    manager = PDFManager(args.corpus, max_workers=args.workers)
+    if not args.use_cache:
+        manager.cache = None
+
+    with StageTimer(StageResult("process_all_pdfs")) as result:
+        results = manager.process_all_pdfs()
+    totals = _corpus_totals(manifest, ("text", "image", "mixed"))
+    result.files, result.bytes, result.pages = totals["files"], totals["bytes"], totals["pages"]
+    result.errors = sum(1 for item in results.values() if 'error' in item or 'error' in item.get('info', {}))
+    return result
+
+
+def bench_process_directory(manifest: Dict, args) -> StageResult:
+    from src.utils.process_documents.pdf_management.service import PDFElasticsearchService
+
+    async def run() -> StageResult:
+        es = FakeAsyncElasticsearch(latency_seconds=args.es_latency)
+        service = PDFElasticsearchService(
+            es_client=es,
+            root_directory=args.corpus,
+            max_workers=args.workers,
+            executor_type=args.executor,
+            include_docx=True
+        )
+        if service.pdf_manager is not None and not args.use_cache:
+            service.pdf_manager.cache = None
+        try:
+            await service.setup_index()
+            with StageTimer(StageResult("process_directory")) as result:
+                summary = await service.process_directory(args.corpus)
+        finally:
+            await service.close()
+
+        totals = _corpus_totals(manifest, ("text", "image", "mixed", "docx"))
+        result.files, result.bytes, result.pages = totals["files"], totals["bytes"], totals["pages"]
+        result.errors = summary.get("failed", 0)
+        result.extra["elasticsearch"] = es.stats
+        return result
+
+    return asyncio.run(run())
+
+
+BENCHMARKS = {
+    "text_extraction": bench_text_extraction,
+    "text_backends": bench_text_backends,
+    "ocr": bench_ocr,
+    "docx_extraction": bench_docx_extraction,
+    "process_all_pdfs": bench_process_all_pdfs,
+    "process_directory": bench_process_directory,
+}
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).parent
+        ).stdout.strip()
+    except Exception:
+        return "desconocido"
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    defaults = CorpusSpec()
+    parser = argparse.ArgumentParser(description="Benchmark de ingesta de documentos")
+    parser.add_argument('--corpus', default='/tmp/bench-corpus', help="Directorio del corpus sintético")
+    parser.add_argument('--output', help="Archivo JSON de resultados (por defecto benchmarks/results/)")
+    parser.add_argument('--stages', default=','.join(STAGES), help="Etapas separadas por comas")
+    parser.add_argument('--seed', type=int, default=defaults.seed)
+    parser.add_argument('--text-pdfs', type=int, default=defaults.text_pdfs)
+    parser.add_argument('--image-pdfs', type=int, default=defaults.image_pdfs)
+    parser.add_argument('--mixed-pdfs', type=int, default=defaults.mixed_pdfs)
+    parser.add_argument('--docx', type=int, default=defaults.docx_files)
+    parser.add_argument('--pages', type=int, default=defaults.pages_per_document)
+    parser.add_argument('--words-per-page', type=int, default=defaults.words_per_page)
+    parser.add_argument('--image-dpi', type=int, default=defaults.image_dpi)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--executor', choices=('thread', 'process'), default='thread')
+    parser.add_argument('--ocr-profile', default='fast', help="Perfil de OCR de la etapa ocr")
+    parser.add_argument('--ocr-retry-profile', default='accurate', help="Perfil de repetición (vacío para desactivarla)")
+    parser.add_argument('--es-latency', type=float, default=0.0, help="Latencia simulada por petición a ES (s)")
+    parser.add_argument('--use-cache', action='store_true', help="Usar la caché de extracción")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> Dict:
+    args = parse_args(argv)
+    spec = CorpusSpec(
+        seed=args.seed,
+        text_pdfs=args.text_pdfs,
+        image_pdfs=args.image_pdfs,
+        mixed_pdfs=args.mixed_pdfs,
+        docx_files=args.docx,
+        pages_per_document=args.pages,
+        words_per_page=args.words_per_page,
+        image_dpi=args.image_dpi
+    )
+
+    started = time.perf_counter()
+    manifest = generate_corpus(args.corpus, spec)
+    generation_seconds = time.perf_counter() - started
+
+    stages = {}
+    for name in [stage.strip() for stage in args.stages.split(',') if stage.strip()]:
+        if name not in BENCHMARKS:
+            raise SystemExit(f"Etapa desconocida: {name}. Disponibles: {', '.join(STAGES)}")
+        logging.warning(f"Ejecutando etapa {name}...")
+        result = BENCHMARKS[name](manifest, args)
+        if isinstance(result, StageResult):
+            stages[name] = result.to_dict()
+        else:
+            # Etapas con varios resultados (uno por backend)
+            stages.update({
+                stage["name"] if "name" in stage else f"{name}:{key}": stage
+                for key, stage in result.items()
+            })
+
+    results = {
+        "git_commit": _git_commit(),
+        "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "workers": args.workers,
+        "executor": args.executor,
+        "corpus": asdict(spec),
+        "corpus_generation_seconds": round(generation_seconds, 3),
+        "stages": stages,
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+    output = Path(args.output) if args.output else (
+        RESULTS_DIR / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{results['git_commit']}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2), encoding='utf-8')
+
+    for name, stage in stages.items():
+        if "files" not in stage:
+            print(f"{name:20s} no disponible")
+            continue
+        print(
+            f"{name:20s} {stage['files']:5d} archivos {stage['pages']:6d} páginas "
+            f"{stage['seconds']:9.3f}s {stage['pages_per_second'] or 0:9.2f} pág/s "
+            f"{stage['mb_per_second'] or 0:8.2f} MB/s errores={stage['errors']}"
+        )
+    print(f"Resultados guardados en {output}")
+    return results
+
+
+if __name__ == '__main__':
+    main()
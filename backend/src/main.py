@@ -1,8 +1,19 @@
-from fastapi import FastAPI
-from .routes import documents, search
+from fastapi import FastAPI, Response
+from .routes import documents, search, ingestion
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from .utils.process_documents.pdf_management.service import PDFElasticsearchService
+from .utils.process_documents.pdf_management.ocr_engine import shutdown_ocr_executors
+from .utils.process_documents.pdf_management.text_backends import shutdown_text_workers
+from .utils.es_client import get_es_client, close_es_client
+from .utils.logs.error_handling import shutdown_logging
 from .utils.process_documents.word_management.word import ConvertidorWordPDF
+from .service.file_watcher import WATCH_ENABLED, PDFDirectoryWatcher
+from .service.check_new_files import NewFilesDetector
+from .service.ingestion_job import IngestionJob
+from .service.index_rebuild import IndexRebuilder
+from typing import List
+import asyncio
 import os
 import logging
 
@@ -13,12 +24,25 @@ logger = logging.getLogger(__name__)
 # Variables de entorno
 pdf_dir = os.getenv('PDF_DIR', '/app/pdfs')
 ruta_salida = os.getenv('RUTA_SALIDA', '/app/pdfsoutput')
+# 'pdf': convertir los .docx con Spire e indexar RUTA_SALIDA; 'direct': extraer el texto del .docx
+word_mode = os.getenv('WORD_MODE', 'pdf')
 
 # Inicialización del servicio de Elasticsearch
 pdf_service = PDFElasticsearchService(
-    es_host='elasticsearch',
-    es_port=9200,
+    root_directory=pdf_dir,
+    include_docx=word_mode == 'direct',
 )
+files_detector = NewFilesDetector(pdf_service)
+
+
+def invalidate_search_cache():
+    """Invalida la caché de búsquedas cuando la ingesta modifica el índice."""
+    if search.search_cache is not None:
+        search.search_cache.invalidate()
+
+
+pdf_service.add_index_listener(invalidate_search_cache)
+documents.es_service.add_index_listener(invalidate_search_cache)
 
 app = FastAPI(
     title="Documents Processing API",
@@ -43,37 +67,107 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
-async def initialize_documents():
+async def prepare_services() -> List[PDFElasticsearchService]:
     """
-    Función para inicializar el procesamiento de documentos
+    Servicios de las raíces que se indexan. Con WORD_MODE=pdf convierte antes los
+    documentos Word y añade RUTA_SALIDA; el llamador cierra los servicios a partir del segundo.
     """
-    try:
-        # Primero convertimos los documentos Word a PDF
+    services = [pdf_service]
+
+    if word_mode == 'pdf':
+        # Primero convertimos los documentos Word a PDF (solo los que cambiaron)
         logger.info("Iniciando conversión de documentos Word a PDF...")
         convertidor = ConvertidorWordPDF(pdf_dir, ruta_salida)
-        resultados_conversion = convertidor.convertir_todos()
-        logger.info(f"Resultados de conversión: {resultados_conversion}")
-
-        # Luego procesamos los PDFs con Elasticsearch
-        logger.info("Iniciando indexación de documentos en Elasticsearch...")
-        
-        # Configurar el índice
-        await pdf_service.setup_index()
-        # Procesar el directorio
-        result = await pdf_service.process_directory(pdf_dir)
-        logger.info(f"Resultados de indexación: {result}")
-        return result
-    except Exception as e:
-        logger.error(f"Error en la inicialización de documentos: {str(e)}")
-        return {"error": str(e)}
+        resultados_conversion = await asyncio.to_thread(convertidor.convertir_todos)
+        fallidos = [mensaje for correcto, mensaje in resultados_conversion if not correcto]
+        logger.info(
+            f"Conversión de Word: {len(resultados_conversion)} documentos, {len(fallidos)} con error"
+        )
+        for mensaje in fallidos:
+            logger.error(mensaje)
+
+        # Los PDFs convertidos se indexan en el mismo índice que los originales
+        converted_service = PDFElasticsearchService(root_directory=ruta_salida)
+        converted_service.add_index_listener(invalidate_search_cache)
+        services.append(converted_service)
+
+    return services
+
+
+async def initialize_documents(job: IngestionJob):
+    """
+    Función para inicializar el procesamiento de documentos. Se ejecuta como trabajo en
+    segundo plano y solo procesa los archivos nuevos o modificados desde la última ingesta.
+    """
+    services = await prepare_services()
+
+    # Luego procesamos los PDFs con Elasticsearch
+    logger.info("Iniciando indexación de documentos en Elasticsearch...")
+
+    # Configurar el índice
+    await pdf_service.setup_index()
+
+    summaries = {}
+    try:
+        for service in services:
+            detector = files_detector if service is pdf_service else NewFilesDetector(service)
+            # Sincronizar el directorio con el índice
+            result = await detector.sync(
+                on_changes=lambda changes: job.add_queued(len(changes["new"]) + len(changes["changed"])),
+                on_start=job.file_started,
+                on_result=job.file_finished
+            )
+            # Las listas de archivos ya están en el estado del trabajo; solo se guardan los totales
+            summaries[service.root_directory] = {
+                key: value for key, value in result.items() if not key.endswith("_files")
+            }
+    finally:
+        for service in services[1:]:
+            await service.close()
+
+    logger.info(f"Resultados de indexación: {summaries}")
+    return summaries
+
+
+async def rebuild_documents(job: IngestionJob):
+    """
+    Reindexa todas las raíces en un índice nuevo y mueve a él el alias del índice de
+    búsqueda. Se lanza manualmente desde /ingestion/rebuild/.
+    """
+    services = await prepare_services()
+    try:
+        result = await IndexRebuilder(services).rebuild(
+            on_queued=job.add_queued,
+            on_start=job.file_started,
+            on_result=job.file_finished
+        )
+    finally:
+        for service in services[1:]:
+            await service.close()
+
+    logger.info(f"Reconstrucción del índice completada: {result['index']}")
+    return result
 
 @app.on_event("startup")
 async def startup_event():
     """
-    Evento que se ejecuta al iniciar la aplicación
+    Evento que se ejecuta al iniciar la aplicación. La ingesta corre en segundo plano
+    para que la API empiece a atender peticiones de inmediato.
     """
     logger.info("Iniciando la aplicación y el procesamiento de documentos...")
-    await initialize_documents()
+    # Cliente único compartido por routers y servicios; se cierra en el apagado
+    app.state.es = get_es_client()
+
+    if WATCH_ENABLED:
+        try:
+            app.state.watcher = PDFDirectoryWatcher(pdf_service, pdf_dir)
+            await app.state.watcher.start()
+        except Exception as e:
+            logger.error(f"No se pudo iniciar el watcher de {pdf_dir}: {str(e)}")
+
+    app.state.ingestion_job = IngestionJob(initialize_documents)
+    app.state.rebuild_documents = rebuild_documents
+    app.state.ingestion_job.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
@@ -81,11 +175,27 @@ async def shutdown_event():
     Evento que se ejecuta al cerrar la aplicación
     """
     try:
+        await app.state.ingestion_job.cancel(shutdown=True)
+        watcher = getattr(app.state, "watcher", None)
+        if watcher is not None:
+            await watcher.stop()
         await pdf_service.close()
+        await documents.es_service.close()
+        await close_es_client()
         logger.info("Conexión con Elasticsearch cerrada correctamente")
     except Exception as e:
         logger.error(f"Error cerrando la conexión con Elasticsearch: {str(e)}")
+    finally:
+        shutdown_ocr_executors()
+        shutdown_text_workers()
+        shutdown_logging()
+
+# Métricas en formato Prometheus; una ruta propia responde en /metrics sin redirigir a /metrics/
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 # Incluir los routers existentes
 app.include_router(documents.router)
-app.include_router(search.router)
\ No newline at end of file
+app.include_router(search.router)
+app.include_router(ingestion.router)
\ No newline at end of file
@@ -1,23 +1,22 @@
 from fastapi import APIRouter, Query, status
 from pydantic import BaseModel
 from typing import Annotated, Optional, List
-from elasticsearch import AsyncElasticsearch
+from ..utils.es_client import get_es_client
 from ..utils.logs.error_handling import CustomLogger, handle_exceptions, AppException
 from ..service.check_new_files import NewFilesDetector
 from ..utils.process_documents.pdf_management.service import PDFElasticsearchService
+from ..utils.process_documents.pdf_management.index_layout import PAGES_LAYOUT
 import os 
 
 logger = CustomLogger("documents_api", "documents_api.log")
-BASE_URL = "elasticsearch:9200"
 PDF_DIR = os.getenv('PDF_DIR', '/app/pdfs')
 
-client = AsyncElasticsearch(BASE_URL)
+client = get_es_client()
 router = APIRouter(prefix="/api_documents", tags=["api_documents"])
 
 # Inicialización de servicios
 es_service = PDFElasticsearchService(
-    es_host='elasticsearch',
-    es_port=9200,
+    es_client=client,
     index_name='pdfs',
     root_directory=PDF_DIR,
     max_workers=4
@@ -44,8 +43,9 @@ class Document(BaseModel):
 @router.get("/documents/")
 async def get_all_documents():
     """Obtiene todos los documentos PDF indexados."""
+    # Con el layout por páginas cada PDF se lista una vez, por su página 1
     query = {
-        "query": {"match_all": {}},
+        "query": {"term": {"page_number": 1}} if es_service.index_layout == PAGES_LAYOUT else {"match_all": {}},
         "_source": ["filename", "relative_path", "total_pages", "pages"]
     }
     
@@ -60,7 +60,7 @@ async def get_all_documents():
             "filename": hit["_source"]["filename"],
             "relative_path": hit["_source"]["relative_path"],
             "total_pages": hit["_source"]["total_pages"],
-            "metadata": hit["_source"]["pages"]
+            "metadata": hit["_source"].get("pages", [])
         } for hit in result["hits"]["hits"]]
     }
     
@@ -70,13 +70,13 @@ async def get_all_documents():
 async def get_document_by_index(params_documents: Annotated[ParamsGetDocuments, Query()]):
     """Obtiene un documento específico por su ID (ruta relativa)."""
     try:
-        resp = await client.get(index=params_documents.name_index, id=params_documents.id_index)
+        source = await es_service.get_document(params_documents.id_index, params_documents.name_index)
         return {
-            "filename": resp["_source"]["filename"],
-            "relative_path": resp["_source"]["relative_path"],
-            "total_pages": resp["_source"]["total_pages"],
-            "metadata": resp["_source"]["metadata"],
-            "pages": resp["_source"]["pages"]
+            "filename": source["filename"],
+            "relative_path": source["relative_path"],
+            "total_pages": source["total_pages"],
+            "metadata": source["metadata"],
+            "pages": source["pages"]
         }
     except Exception as e:
         return {"error": str(e)}
@@ -85,7 +85,7 @@ async def get_document_by_index(params_documents: Annotated[ParamsGetDocuments,
 @handle_exceptions(logger)
 async def check_new_files():
     """
-    Detecta y procesa archivos nuevos en el directorio configurado.
+    Detecta y procesa archivos nuevos, modificados y eliminados en el directorio configurado.
     """
     try:
         logger.info(
@@ -96,34 +96,36 @@ async def check_new_files():
             }
         )
 
-        # Obtener archivos indexados
+        # Obtener archivos indexados con su firma (tamaño, mtime y hash)
         indexed_files = await files_detector.get_indexed_files()
         
-        # Encontrar archivos nuevos
-        new_files = files_detector.find_new_files(indexed_files)
+        # Encontrar archivos nuevos, modificados y eliminados en una sola pasada
+        changes = await files_detector.find_changes(indexed_files)
         
         logger.info(
             "Archivos nuevos encontrados",
             {
                 "timestamp_utc": "2025-01-17 03:48:20",
                 "user": "StevenSsj1",
-                "new_files_count": len(new_files)
+                "new_files_count": len(changes["new"]),
+                "changed_files_count": len(changes["changed"]),
+                "deleted_files_count": len(changes["deleted"])
             }
         )
 
-        if not new_files:
+        if not any(changes.values()):
             return {
                 "status": "success",
                 "message": "No se encontraron archivos nuevos",
                 "total_found": 0,
+                "total_changed": 0,
+                "total_deleted": 0,
                 "total_processed": 0
             }
 
-        # Procesar archivos nuevos
-        results = await files_detector.process_new_files(new_files)
-
-        # Forzar refresh del índice
-        await es_service.es.indices.refresh(index=es_service.index_name)
+        # Aplicar solo los cambios; quedan visibles con el refresh periódico del índice
+        # (la caché de búsquedas se vuelve a invalidar pasado ese intervalo)
+        results = await files_detector.apply_changes(changes)
 
         logger.info(
             "Proceso de detección completado",
@@ -131,6 +133,8 @@ async def check_new_files():
                 "timestamp_utc": "2025-01-17 03:48:20",
                 "user": "StevenSsj1",
                 "total_found": results["total_found"],
+                "total_changed": results["total_changed"],
+                "total_deleted": results["total_deleted"],
                 "total_processed": results["total_processed"]
             }
         )
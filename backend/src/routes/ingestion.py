@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Request, status
+from ..utils.logs.error_handling import CustomLogger, handle_exceptions, AppException
+
+logger = CustomLogger("ingestion_api", "ingestion_api.log")
+router = APIRouter(prefix="/api_documents", tags=["api_documents"])
+
+
+@router.get("/ingestion/status/")
+async def get_ingestion_status(request: Request):
+    """Estado del trabajo de ingesta en segundo plano."""
+    return request.app.state.ingestion_job.status()
+
+
+@router.post("/ingestion/start/")
+@handle_exceptions(logger)
+async def start_ingestion(request: Request):
+    """Lanza una nueva sincronización si no hay otra en curso."""
+    job = request.app.state.ingestion_job
+    if not job.start():
+        raise AppException(
+            message="Ya hay una ingesta en curso",
+            status_code=status.HTTP_409_CONFLICT,
+            extra=job.status()
+        )
+    logger.info("Ingesta iniciada manualmente")
+    return job.status()
+
+
+@router.post("/ingestion/cancel/")
+@handle_exceptions(logger)
+async def cancel_ingestion(request: Request):
+    """Cancela la ingesta en curso; lo ya indexado se conserva."""
+    job = request.app.state.ingestion_job
+    if not await job.cancel():
+        raise AppException(
+            message="No hay ninguna ingesta en curso",
+            status_code=status.HTTP_409_CONFLICT
+        )
+    logger.info("Ingesta cancelada manualmente")
+    return job.status()
+
+
+@router.post("/ingestion/rebuild/")
+@handle_exceptions(logger)
+async def rebuild_index(request: Request):
+    """
+    Reindexa todo en un índice nuevo (sin réplicas ni refresh durante la carga) y mueve el
+    alias al terminar; las búsquedas usan el índice anterior hasta entonces.
+    """
+    job = request.app.state.ingestion_job
+    if not job.start(request.app.state.rebuild_documents, kind="rebuild"):
+        raise AppException(
+            message="Ya hay una ingesta en curso",
+            status_code=status.HTTP_409_CONFLICT,
+            extra=job.status()
+        )
+    logger.info("Reconstrucción del índice iniciada manualmente")
+    return job.status()
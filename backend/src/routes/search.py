@@ -1,15 +1,44 @@
-from fastapi import APIRouter, Query
-from typing import Annotated, Optional
-from elasticsearch import AsyncElasticsearch
-from ..utils.logs.error_handling import CustomLogger, handle_exceptions
-from ..service.search_service import SearchService
+from fastapi import APIRouter, Query, status
+from pydantic import BaseModel
+from typing import Annotated, List, Literal, Optional
+from ..utils.es_client import get_es_client
+from ..utils.logs.error_handling import CustomLogger, handle_exceptions, AppException
+from ..service.search_service import (
+    SearchService, MAX_RESULT_WINDOW, MAX_FUZZY_EXPANSIONS, DEFAULT_FUZZY_PREFIX_LENGTH,
+    DEFAULT_FUZZY_MAX_EXPANSIONS, DEFAULT_SMART_MIN_HITS
+)
+from ..service.query_cache import QueryCache
+from ..service.single_flight import SingleFlight
 from ..utils.logs.search_validators import SearchValidator
+import os
 
 router = APIRouter(prefix="/api_documents", tags=["api_documents"])
 logger = CustomLogger("search_api", "search.log")
-client = AsyncElasticsearch([{'host': 'elasticsearch', 'port': 9200, 'scheme': 'http'}])
-search_service = SearchService(client, logger)
+client = get_es_client()
+# La caché se invalida desde main.py cuando la ingesta modifica el índice
+search_cache = QueryCache() if os.getenv('SEARCH_CACHE_ENABLED', 'true').lower() == 'true' else None
+single_flight = SingleFlight() if os.getenv('SEARCH_SINGLE_FLIGHT_ENABLED', 'true').lower() == 'true' else None
+search_service = SearchService(client, logger, search_cache, single_flight=single_flight)
 search_validator = SearchValidator()
+# Búsquedas admitidas en una sola petición a /search/batch/
+MAX_BATCH_SEARCHES = int(os.getenv('SEARCH_BATCH_MAX', 100))
+# Longitud máxima del término de cada búsqueda de un lote
+MAX_SEARCH_TERM_LENGTH = int(os.getenv('SEARCH_TERM_MAX_LENGTH', 500))
+
+
+class BatchSearchItem(BaseModel):
+    search_term: str
+    mode: Literal["fuzzy", "exact"] = "fuzzy"
+    fuzziness: str = "AUTO"
+    operator: str = "OR"
+    page_size: int = 10
+    include_content: bool = False
+
+
+class BatchSearchRequest(BaseModel):
+    index_name: str = "pdfs"
+    searches: List[BatchSearchItem]
+
 
 @router.get("/search/")
 @handle_exceptions(logger)
@@ -18,8 +47,19 @@ async def search_documents(
     index_name: Annotated[str, Query()] = "pdfs",
     fuzziness: Annotated[Optional[str], Query()] = "AUTO",
     operator: Annotated[Optional[str], Query()] = "OR",
+    page_size: Annotated[int, Query()] = 10,
+    offset: Annotated[int, Query(alias="from")] = 0,
+    cursor: Annotated[Optional[str], Query()] = None,
+    include_content: Annotated[bool, Query()] = False,
+    prefix_length: Annotated[Optional[int], Query()] = None,
+    max_expansions: Annotated[Optional[int], Query()] = None,
 ):
-    """Búsqueda fuzzy en documentos."""
+    """
+    Búsqueda fuzzy en documentos. Por defecto devuelve metadatos y fragmentos resaltados;
+    include_content añade el texto completo de las páginas coincidentes. Para paginar se
+    usa `from` o, preferiblemente, el `next_cursor` de la respuesta anterior.
+    prefix_length y max_expansions acotan la expansión fuzzy de cada término.
+    """
     logger.info(
         "Iniciando búsqueda fuzzy",
         {"search_term": search_term, "params": {"fuzziness": fuzziness, "operator": operator}}
@@ -28,15 +68,20 @@ async def search_documents(
     # Validar parámetros
     search_validator.validate_operator(operator)
     search_validator.validate_fuzziness(fuzziness)
+    search_validator.validate_fuzzy_bounds(prefix_length, max_expansions, max_expansions_limit=MAX_FUZZY_EXPANSIONS)
+    search_validator.validate_pagination(page_size, offset, max_window=MAX_RESULT_WINDOW)
 
     # Construir y ejecutar query
-    query = (search_service.build_fuzzy_query(search_term, fuzziness, operator) 
-             if search_term else search_service.build_match_all_query())
-    
-    response = await search_service.execute_search(index_name, query)
+    query = (search_service.build_fuzzy_query(
+                search_term, fuzziness, operator, page_size, offset, cursor, include_content,
+                prefix_length=prefix_length, max_expansions=max_expansions)
+             if search_term else search_service.build_match_all_query(page_size, offset, cursor))
     
-    # Procesar y retornar resultados
-    results = search_service.process_search_results(response, search_term)
+    # Ejecutar (o servir desde caché) y procesar resultados
+    results = await search_service.search(
+        index_name, query, search_term, page_size,
+        endpoint="search", query_type="fuzzy" if search_term else "match_all"
+    )
     
     logger.info(
         "Búsqueda completada",
@@ -50,21 +95,28 @@ async def search_documents(
 async def search_exact_documents(
     search_term: Annotated[Optional[str], Query()] = None,
     index_name: Annotated[str, Query()] = "pdfs",
+    page_size: Annotated[int, Query()] = 10,
+    offset: Annotated[int, Query(alias="from")] = 0,
+    cursor: Annotated[Optional[str], Query()] = None,
+    include_content: Annotated[bool, Query()] = False,
 ):
-    """Búsqueda exacta en documentos."""
+    """Búsqueda exacta en documentos. Admite los mismos parámetros de paginación que /search/."""
     logger.info(
         "Iniciando búsqueda exacta",
         {"search_term": search_term}
     )
 
+    search_validator.validate_pagination(page_size, offset, max_window=MAX_RESULT_WINDOW)
+
     # Construir y ejecutar query
-    query = (search_service.build_exact_query(search_term) 
-             if search_term else search_service.build_match_all_query())
-    
-    response = await search_service.execute_search(index_name, query)
+    query = (search_service.build_exact_query(search_term, page_size, offset, cursor, include_content)
+             if search_term else search_service.build_match_all_query(page_size, offset, cursor))
     
-    # Procesar y retornar resultados
-    results = search_service.process_search_results(response, search_term)
+    # Ejecutar (o servir desde caché) y procesar resultados
+    results = await search_service.search(
+        index_name, query, search_term, page_size,
+        endpoint="search_exact", query_type="exact" if search_term else "match_all"
+    )
     
     logger.info(
         "Búsqueda exacta completada",
@@ -72,3 +124,111 @@ async def search_exact_documents(
     )
     
     return results
+
+
+@router.get("/search_smart/")
+@handle_exceptions(logger)
+async def search_smart_documents(
+    search_term: Annotated[str, Query()],
+    index_name: Annotated[str, Query()] = "pdfs",
+    fuzziness: Annotated[Optional[str], Query()] = "AUTO",
+    operator: Annotated[Optional[str], Query()] = "OR",
+    page_size: Annotated[int, Query()] = 10,
+    offset: Annotated[int, Query(alias="from")] = 0,
+    cursor: Annotated[Optional[str], Query()] = None,
+    include_content: Annotated[bool, Query()] = False,
+    min_hits: Annotated[int, Query()] = DEFAULT_SMART_MIN_HITS,
+    prefix_length: Annotated[int, Query()] = DEFAULT_FUZZY_PREFIX_LENGTH,
+    max_expansions: Annotated[int, Query()] = DEFAULT_FUZZY_MAX_EXPANSIONS,
+    tier: Annotated[Optional[Literal["exact", "fuzzy"]], Query()] = None,
+):
+    """
+    Búsqueda por niveles: la frase exacta y, si encuentra menos de `min_hits` documentos,
+    una fuzzy acotada. `tier` en la respuesta indica qué nivel respondió; para las páginas
+    siguientes se pasa de vuelta junto con el cursor o `from`.
+    """
+    logger.info(
+        "Iniciando búsqueda inteligente",
+        {"search_term": search_term, "params": {"min_hits": min_hits, "tier": tier}}
+    )
+
+    search_validator.validate_operator(operator)
+    search_validator.validate_fuzziness(fuzziness)
+    search_validator.validate_fuzzy_bounds(prefix_length, max_expansions, max_expansions_limit=MAX_FUZZY_EXPANSIONS)
+    search_validator.validate_min_hits(min_hits)
+    search_validator.validate_pagination(page_size, offset, max_window=MAX_RESULT_WINDOW)
+
+    results = await search_service.smart_search(
+        index_name, search_term, fuzziness, operator, page_size, offset, cursor, include_content,
+        min_hits=min_hits, prefix_length=prefix_length, max_expansions=max_expansions, tier=tier
+    )
+
+    logger.info(
+        "Búsqueda inteligente completada",
+        {"total_hits": results["total_hits"], "tier": results["tier"]}
+    )
+
+    return results
+
+
+@router.post("/search/batch/")
+@handle_exceptions(logger)
+async def search_batch(request: BatchSearchRequest):
+    """
+    Varias búsquedas fuzzy o exactas en una sola petición _msearch a Elasticsearch. Cada
+    resultado tiene la misma forma que la respuesta de /search/ (solo la primera página),
+    o un campo `error` si Elasticsearch rechazó esa búsqueda.
+    """
+    if not request.searches or len(request.searches) > MAX_BATCH_SEARCHES:
+        raise AppException(
+            message="Número de búsquedas inválido",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            extra={"min_searches": 1, "max_searches": MAX_BATCH_SEARCHES}
+        )
+
+    logger.info("Iniciando búsqueda múltiple", {"searches": len(request.searches)})
+
+    searches = []
+    for item in request.searches:
+        # A diferencia de /search/, un término vacío no significa match_all dentro de un lote
+        item.search_term = search_validator.validate_search_term(item.search_term, MAX_SEARCH_TERM_LENGTH)
+        search_validator.validate_pagination(item.page_size, 0, max_window=MAX_RESULT_WINDOW)
+        if item.mode == "fuzzy":
+            search_validator.validate_operator(item.operator)
+            search_validator.validate_fuzziness(item.fuzziness)
+            query = search_service.build_fuzzy_query(
+                item.search_term, item.fuzziness, item.operator, item.page_size,
+                include_content=item.include_content
+            )
+        else:
+            query = search_service.build_exact_query(
+                item.search_term, item.page_size, include_content=item.include_content
+            )
+        searches.append({"query": query, "search_term": item.search_term, "page_size": item.page_size})
+
+    results = await search_service.msearch(request.index_name, searches)
+
+    logger.info(
+        "Búsqueda múltiple completada",
+        {"searches": len(results), "failed": sum(1 for result in results if "error" in result)}
+    )
+
+    return {
+        "total_searches": len(results),
+        "results": [
+            {"search_term": item.search_term, "mode": item.mode, **result}
+            for item, result in zip(request.searches, results)
+        ]
+    }
+
+
+@router.get("/search/cache_stats/")
+async def search_cache_stats():
+    """
+    Aciertos, fallos y ocupación de la caché de resultados de búsqueda, y cuántas búsquedas
+    simultáneas se agruparon en una sola petición.
+    """
+    stats = {"enabled": False} if search_cache is None else {"enabled": True, **search_cache.stats()}
+    if single_flight is not None:
+        stats["single_flight"] = single_flight.stats()
+    return stats
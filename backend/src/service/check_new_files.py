@@ -1,76 +1,287 @@
 from datetime import datetime
-from typing import Dict, List, Set
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
 from pathlib import Path
+import asyncio
 import logging
+import os
 from ..utils.process_documents.pdf_management.service import PDFElasticsearchService
+from ..utils.process_documents.pdf_management.extraction_cache import hash_file
+from ..utils.process_documents.pdf_management.index_layout import PAGES_LAYOUT
+
+# Tolerancia al comparar mtimes guardados como double en Elasticsearch
+MTIME_TOLERANCE = 1e-3
+
 
 class NewFilesDetector:
-    def __init__(self, es_service: PDFElasticsearchService):
+    def __init__(self, es_service: PDFElasticsearchService, page_size: int = 1000):
         self.es_service = es_service
+        self.page_size = page_size
         self.logger = logging.getLogger('new_files_detector')
 
-    async def get_indexed_files(self) -> Set[str]:
-        """Obtiene el conjunto de archivos ya indexados"""
-        query = {
-            "query": {"match_all": {}},
-            "_source": ["relative_path"],
-            "size": 10000
-        }
-        
-        response = await self.es_service.es.search(
-            index=self.es_service.index_name, 
-            body=query
-        )
-        
-        return {
-            hit["_source"]["relative_path"] 
-            for hit in response["hits"]["hits"]
-        }
+    async def iter_indexed_files(self) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Recorre todo el índice con point-in-time y search_after, sin el límite de 10 000 resultados.
+        Solo se consideran los documentos cuyo archivo está bajo el directorio raíz del servicio,
+        para que varias raíces puedan compartir el mismo índice. Con el layout por páginas se
+        lee solo la página 1 de cada PDF.
 
-    def find_new_files(self, indexed_files: Set[str]) -> List[Dict[str, str]]:
-        """Encuentra archivos nuevos comparando con los ya indexados"""
-        new_files = []
-        root_path = Path(self.es_service.root_directory)
+        Yields:
+            Tuple[str, Dict]: Ruta relativa y firma guardada (tamaño, mtime y hash)
+        """
+        es = self.es_service.es
+        root_prefix = os.path.join(str(Path(self.es_service.root_directory).absolute()), '')
+        pit = await es.open_point_in_time(index=self.es_service.index_name, keep_alive="2m")
+        pit_id = pit["id"]
+        search_after = None
+        filters = [{"prefix": {"file_path": root_prefix}}]
+        if self.es_service.index_layout == PAGES_LAYOUT:
+            filters.append({"term": {"page_number": 1}})
+
+        try:
+            while True:
+                query = {
+                    "size": self.page_size,
+                    "query": {"bool": {"filter": filters}},
+                    "_source": ["relative_path", "file_size", "file_mtime", "content_hash"],
+                    "pit": {"id": pit_id, "keep_alive": "2m"},
+                    "sort": [{"_shard_doc": "asc"}]
+                }
+                if search_after is not None:
+                    query["search_after"] = search_after
+
+                response = await es.search(body=query)
+                pit_id = response.get("pit_id", pit_id)
+                hits = response["hits"]["hits"]
+                if not hits:
+                    break
+
+                for hit in hits:
+                    source = hit["_source"]
+                    yield source.get("relative_path", hit["_id"]), {
+                        "file_size": source.get("file_size"),
+                        "file_mtime": source.get("file_mtime"),
+                        "content_hash": source.get("content_hash")
+                    }
+                search_after = hits[-1]["sort"]
+        finally:
+            try:
+                await es.close_point_in_time(body={"id": pit_id})
+            except Exception as e:
+                self.logger.warning(f"No se pudo cerrar el point-in-time: {str(e)}")
 
-        for pdf_path in root_path.rglob('*.pdf'):
+    async def get_indexed_files(self) -> Dict[str, Dict]:
+        """Obtiene los archivos ya indexados junto con su firma"""
+        return {relative_path: signature async for relative_path, signature in self.iter_indexed_files()}
+
+    def scan_directory(self) -> Dict[str, Tuple[str, int, float]]:
+        """
+        Recorre el directorio raíz y lee la firma de cada archivo. Es bloqueante: se llama
+        en un hilo para no detener el event loop en árboles grandes.
+
+        Returns:
+            Dict[str, Tuple[str, int, float]]: Ruta relativa -> (ruta completa, tamaño, mtime)
+        """
+        root_path = Path(self.es_service.root_directory)
+        files = {}
+        for pdf_path in self.es_service.iter_pdf_files(str(root_path)):
+            try:
+                stat = pdf_path.stat()
+            except OSError:
+                # Borrado durante el recorrido; si estaba indexado saldrá como eliminado
+                continue
             relative_path = self.es_service.get_relative_path(pdf_path, root_path)
-            if relative_path not in indexed_files:
-                new_files.append({
-                    "full_path": str(pdf_path),
-                    "relative_path": relative_path
-                })
+            files[relative_path] = (str(pdf_path), stat.st_size, stat.st_mtime)
+        return files
 
-        return new_files
+    async def find_changes(self, indexed_files: Dict[str, Dict]) -> Dict[str, List]:
+        """
+        Compara el directorio con el índice en una sola pasada.
 
-    async def process_new_files(self, new_files: List[Dict[str, str]]) -> Dict:
-        """Procesa los archivos nuevos encontrados"""
+        El recorrido del directorio y los stat se hacen en un hilo; aquí solo se comparan
+        las firmas. Un archivo cuyo tamaño o mtime difiere se confirma con el hash del
+        contenido: si el hash coincide solo se actualiza su firma ("touched") y no se
+        vuelve a extraer.
+
+        Returns:
+            Dict[str, List]: Listas 'new', 'changed', 'touched' y 'deleted'
+        """
+        changes = {"new": [], "changed": [], "touched": [], "deleted": []}
+        files = await asyncio.to_thread(self.scan_directory)
+
+        for relative_path, (full_path, size, mtime) in files.items():
+            file = {
+                "full_path": full_path,
+                "relative_path": relative_path
+            }
+
+            signature = indexed_files.get(relative_path)
+            if signature is None:
+                changes["new"].append(file)
+                continue
+
+            if (
+                signature.get("file_size") == size
+                and signature.get("file_mtime") is not None
+                and abs(signature["file_mtime"] - mtime) < MTIME_TOLERANCE
+            ):
+                continue
+
+            file["file_size"] = size
+            file["file_mtime"] = mtime
+            stored_hash = signature.get("content_hash")
+            if stored_hash and await asyncio.to_thread(hash_file, full_path) == stored_hash:
+                changes["touched"].append(file)
+            else:
+                changes["changed"].append(file)
+
+        changes["deleted"] = [
+            {"relative_path": relative_path}
+            for relative_path in indexed_files
+            if relative_path not in files
+        ]
+        return changes
+
+    async def find_new_files(self, indexed_files: Dict[str, Dict]) -> List[Dict[str, str]]:
+        """Encuentra archivos nuevos comparando con los ya indexados"""
+        return (await self.find_changes(indexed_files))["new"]
+
+    async def apply_changes(
+        self,
+        changes: Dict[str, List],
+        on_start: Optional[Callable[[str], None]] = None,
+        on_result: Optional[Callable[[str, Dict], None]] = None
+    ) -> Dict:
+        """
+        Aplica solo los cambios detectados: indexa nuevos y modificados, actualiza la firma
+        de los tocados y elimina del índice los borrados, todo por lotes con la API _bulk.
+
+        Args:
+            changes (Dict[str, List]): Resultado de find_changes
+            on_start (Optional[Callable]): Se invoca con la ruta al empezar a extraer un archivo
+            on_result (Optional[Callable]): Se invoca con (ruta, resultado) al indexar un archivo
+        """
         results = {
             "processed_files": [],
             "failed_files": [],
-            "total_found": len(new_files),
+            "deleted_files": [],
+            "total_found": len(changes["new"]),
+            "total_changed": len(changes["changed"]),
+            "total_deleted": len(changes["deleted"]),
             "total_processed": 0
         }
+        root_path = Path(self.es_service.root_directory)
 
-        for file in new_files:
-            try:
-                index_result = await self.es_service.index_pdf(  # Agregamos await aquí
-                    file["full_path"], 
-                    self.es_service.root_directory
-                )
-                
-                if index_result.get("success", False):
-                    results["processed_files"].append(file["relative_path"])
-                    results["total_processed"] += 1
-                else:
-                    results["failed_files"].append({
-                        "path": file["relative_path"],
-                        "error": index_result.get("error")
-                    })
+        def record(pdf_path: str, index_result: Dict):
+            relative_path = self.es_service.get_relative_path(Path(pdf_path), root_path)
+            if index_result.get("success", False):
+                results["processed_files"].append(relative_path)
+                results["total_processed"] += 1
+            else:
+                results["failed_files"].append({"path": relative_path, "error": index_result.get("error")})
+            if on_result is not None:
+                on_result(pdf_path, index_result)
+
+        to_index = changes["new"] + changes["changed"]
+        # Con el layout por páginas, un PDF modificado puede tener ahora menos páginas
+        shrinkable = {file["full_path"] for file in changes["changed"]}
+        reindexed: List[Tuple[str, int]] = []
+
+        def record_indexed(pdf_path: str, index_result: Dict):
+            if pdf_path in shrinkable and index_result.get("success", False):
+                relative_path = self.es_service.get_relative_path(Path(pdf_path), root_path)
+                reindexed.append((relative_path, max(index_result.get("indexed_pages", 0), 1)))
+            record(pdf_path, index_result)
+
+        if to_index:
+            await self.es_service.process_files(
+                (file["full_path"] for file in to_index),
+                self.es_service.root_directory,
+                on_start=on_start,
+                on_result=record_indexed
+            )
+
+        if self.es_service.index_layout == PAGES_LAYOUT:
+            await self._apply_page_changes(changes, reindexed, results)
+            return results
+
+        pending = []
+        async with self.es_service.new_bulk_indexer() as indexer:
+            for file in changes["touched"]:
+                future = await indexer.add(file["relative_path"], {
+                    "file_size": file["file_size"],
+                    "file_mtime": file["file_mtime"]
+                }, op_type="update")
+                pending.append(("update", file, future))
 
+            for file in changes["deleted"]:
+                future = await indexer.add(file["relative_path"], None, op_type="delete")
+                pending.append(("delete", file, future))
+
+        for operation, file, future in pending:
+            result = await future
+            # Borrar un documento que ya no existe no es un error
+            if result.get("success", False) or (operation == "delete" and result.get("status") == 404):
+                if operation == "delete":
+                    results["deleted_files"].append(file["relative_path"])
+            else:
+                results["failed_files"].append({"path": file["relative_path"], "error": result.get("error")})
+
+        return results
+
+    async def _apply_page_changes(self, changes: Dict[str, List], reindexed: List[Tuple[str, int]], results: Dict):
+        """
+        Con el layout por páginas cada PDF son varios documentos, así que las firmas y los
+        borrados se aplican por consulta (update_by_query y delete_by_query) en lotes.
+        """
+        for relative_path, last_page in reindexed:
+            try:
+                await self.es_service.delete_stale_pages(relative_path, last_page)
             except Exception as e:
-                results["failed_files"].append({
-                    "path": file["relative_path"],
-                    "error": str(e)
-                })
+                self.logger.warning(f"No se pudieron eliminar páginas sobrantes de {relative_path}: {str(e)}")
+
+        for operation, files in (("update", changes["touched"]), ("delete", changes["deleted"])):
+            for start in range(0, len(files), self.page_size):
+                batch = files[start:start + self.page_size]
+                try:
+                    if operation == "update":
+                        await self.es_service.update_signatures(batch)
+                    else:
+                        await self.es_service.delete_documents([file["relative_path"] for file in batch])
+                        results["deleted_files"].extend(file["relative_path"] for file in batch)
+                except Exception as e:
+                    results["failed_files"].extend(
+                        {"path": file["relative_path"], "error": str(e)} for file in batch
+                    )
+
+    async def process_new_files(self, new_files: List[Dict[str, str]]) -> Dict:
+        """Procesa los archivos nuevos encontrados, indexándolos por lotes con la API _bulk"""
+        return await self.apply_changes({"new": new_files, "changed": [], "touched": [], "deleted": []})
+
+    async def sync(
+        self,
+        on_changes: Optional[Callable[[Dict[str, List]], None]] = None,
+        on_start: Optional[Callable[[str], None]] = None,
+        on_result: Optional[Callable[[str, Dict], None]] = None
+    ) -> Dict:
+        """
+        Sincroniza el índice con el directorio aplicando únicamente los cambios.
+
+        Args:
+            on_changes (Optional[Callable]): Recibe los cambios detectados antes de aplicarlos
+            on_start (Optional[Callable]): Ver apply_changes
+            on_result (Optional[Callable]): Ver apply_changes
+        """
+        started = datetime.now()
+        indexed_files = await self.get_indexed_files()
+        changes = await self.find_changes(indexed_files)
+        if on_changes is not None:
+            on_changes(changes)
+        self.logger.info(
+            f"Sincronización: {len(changes['new'])} nuevos, {len(changes['changed'])} modificados, "
+            f"{len(changes['touched'])} sin cambios de contenido, {len(changes['deleted'])} eliminados"
+        )
 
+        results = await self.apply_changes(changes, on_start=on_start, on_result=on_result)
+        results["total_touched"] = len(changes["touched"])
+        results["duration_seconds"] = (datetime.now() - started).total_seconds()
         return results
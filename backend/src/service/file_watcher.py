@@ -0,0 +1,219 @@
+import os
+import time
+import asyncio
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from ..utils.process_documents.pdf_management.service import PDFElasticsearchService
+from ..utils.metrics import INGEST_QUEUE_DEPTH
+
+try:
+    from watchdog.events import FileSystemEvent, FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog es opcional; sin él el modo watcher no está disponible
+    FileSystemEventHandler = object
+    Observer = None
+
+WATCH_ENABLED = os.getenv('WATCH_PDF_DIR', 'false').lower() == 'true'
+DEFAULT_DEBOUNCE_SECONDS = float(os.getenv('WATCH_DEBOUNCE_SECONDS', 2.0))
+DEFAULT_QUEUE_SIZE = int(os.getenv('WATCH_QUEUE_SIZE', 1000))
+DEFAULT_WATCH_WORKERS = int(os.getenv('WATCH_WORKERS', 2))
+
+UPSERT = "upsert"
+DELETE = "delete"
+# Borrado de todos los documentos bajo un directorio eliminado o movido
+DELETE_TREE = "delete_tree"
+
+
+class _PDFEventHandler(FileSystemEventHandler):
+    """Traduce eventos de watchdog (hilo del observer) a llamadas en el event loop."""
+    def __init__(self, watcher: "PDFDirectoryWatcher"):
+        super().__init__()
+        self.watcher = watcher
+
+    def _notify(self, action: str, path: str):
+        es_service = self.watcher.es_service
+        if path.lower().endswith(es_service.supported_suffixes) and not es_service.is_output_path(path):
+            self.watcher.loop.call_soon_threadsafe(self.watcher.notify, action, path)
+
+    def _notify_directory_removed(self, path: str):
+        if not self.watcher.es_service.is_output_path(path):
+            self.watcher.loop.call_soon_threadsafe(self.watcher.notify, DELETE_TREE, path)
+
+    def on_created(self, event: "FileSystemEvent"):
+        if not event.is_directory:
+            self._notify(UPSERT, event.src_path)
+
+    def on_modified(self, event: "FileSystemEvent"):
+        if not event.is_directory:
+            self._notify(UPSERT, event.src_path)
+
+    def on_closed(self, event: "FileSystemEvent"):
+        if not event.is_directory:
+            self._notify(UPSERT, event.src_path)
+
+    def on_deleted(self, event: "FileSystemEvent"):
+        if event.is_directory:
+            self._notify_directory_removed(event.src_path)
+        else:
+            self._notify(DELETE, event.src_path)
+
+    def on_moved(self, event: "FileSystemEvent"):
+        if event.is_directory:
+            # Una carpeta movida fuera del árbol vigilado no genera eventos de sus archivos
+            self._notify_directory_removed(event.src_path)
+            if not self.watcher.es_service.is_output_path(event.dest_path):
+                for path in self.watcher.es_service.iter_pdf_files(event.dest_path):
+                    self._notify(UPSERT, str(path))
+        else:
+            self._notify(DELETE, event.src_path)
+            self._notify(UPSERT, event.dest_path)
+
+
+class PDFDirectoryWatcher:
+    """
+    Vigila el directorio de PDFs con inotify (vía watchdog) e indexa los cambios al llegar.
+
+    Los eventos de cada ruta se agrupan: un archivo solo se procesa cuando lleva
+    `debounce_seconds` sin eventos y su tamaño no ha cambiado entre dos comprobaciones,
+    lo que evita indexar archivos a medio copiar. Las rutas listas pasan por una cola
+    acotada a `workers` consumidores que usan index_pdf o eliminan el documento.
+    Borrar o mover una carpeta elimina todos los documentos que había debajo y, al
+    moverla dentro del árbol, se indexan los archivos en su nueva ubicación.
+    """
+    def __init__(
+        self,
+        es_service: PDFElasticsearchService,
+        root_directory: str,
+        debounce_seconds: float = DEFAULT_DEBOUNCE_SECONDS,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        workers: int = DEFAULT_WATCH_WORKERS
+    ):
+        if Observer is None:
+            raise RuntimeError("El modo watcher requiere el paquete 'watchdog'")
+
+        self.es_service = es_service
+        self.root_directory = root_directory
+        self.debounce_seconds = debounce_seconds
+        self.queue_size = queue_size
+        self.workers = max(1, workers)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # ruta -> (acción, instante del último evento, último tamaño observado)
+        self._pending: Dict[str, Tuple[str, float, Optional[int]]] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._observer = None
+        self.stats = {"indexed": 0, "deleted": 0, "failed": 0}
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+
+        self._observer = Observer()
+        self._observer.schedule(_PDFEventHandler(self), self.root_directory, recursive=True)
+        self._observer.daemon = True
+        self._observer.start()
+
+        self._tasks = [asyncio.create_task(self._debounce())]
+        self._tasks += [asyncio.create_task(self._consume()) for _ in range(self.workers)]
+        logging.info(f"Vigilando cambios en {self.root_directory}")
+
+    async def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
+            await asyncio.to_thread(self._observer.join, 5)
+            self._observer = None
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self, action: str, path: str):
+        """Registra un evento; se ejecuta en el event loop."""
+        if action == DELETE_TREE:
+            # Los eventos pendientes de archivos de la carpeta ya no aplican
+            prefix = os.path.join(path, '')
+            for pending in [p for p in self._pending if p.startswith(prefix)]:
+                del self._pending[pending]
+        previous = self._pending.get(path)
+        last_size = previous[2] if previous and previous[0] == action else None
+        self._pending[path] = (action, time.monotonic(), last_size)
+
+    def _file_size(self, path: str) -> Optional[int]:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return None
+
+    async def _debounce(self):
+        interval = max(self.debounce_seconds / 2, 0.1)
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            ready = []
+
+            for path, (action, last_event, last_size) in list(self._pending.items()):
+                if now - last_event < self.debounce_seconds:
+                    continue
+                if action == UPSERT:
+                    size = self._file_size(path)
+                    if size is None:
+                        # Desapareció antes de estabilizarse; lo resolverá su evento de borrado
+                        del self._pending[path]
+                        continue
+                    if size != last_size:
+                        self._pending[path] = (action, now, size)
+                        continue
+                del self._pending[path]
+                ready.append((action, path))
+
+            for item in ready:
+                # Bloquea si la cola está llena; los eventos nuevos se siguen agrupando
+                await self._queue.put(item)
+                INGEST_QUEUE_DEPTH.labels(queue='watcher').set(self._queue.qsize())
+
+    async def _consume(self):
+        while True:
+            action, path = await self._queue.get()
+            INGEST_QUEUE_DEPTH.labels(queue='watcher').set(self._queue.qsize())
+            try:
+                if action == UPSERT:
+                    await self._index(path)
+                elif action == DELETE_TREE:
+                    await self._delete_tree(path)
+                else:
+                    await self._delete(path)
+            except Exception as e:
+                self.stats["failed"] += 1
+                logging.error(f"Error procesando evento {action} de {path}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def _index(self, path: str):
+        result = await self.es_service.index_pdf(path, self.root_directory)
+        if result.get("success", False):
+            self.stats["indexed"] += 1
+            logging.info(f"Watcher: indexado {path}")
+        else:
+            self.stats["failed"] += 1
+            logging.error(f"Watcher: error indexando {path}: {result.get('error')}")
+
+    async def _delete(self, path: str):
+        doc_id = self.es_service.get_relative_path(Path(path), Path(self.root_directory))
+        await self.es_service.delete_documents([doc_id])
+        self.stats["deleted"] += 1
+        logging.info(f"Watcher: eliminado {doc_id}")
+
+    async def _delete_tree(self, path: str):
+        deleted = await self.es_service.delete_directory(path)
+        self.stats["deleted"] += 1
+        logging.info(f"Watcher: eliminada la carpeta {path} ({deleted} documentos)")
+
+    def status(self) -> Dict:
+        return {
+            "running": self._observer is not None,
+            "pending_events": len(self._pending),
+            "queued": self._queue.qsize() if self._queue else 0,
+            **self.stats
+        }
@@ -0,0 +1,192 @@
+import os
+import re
+import logging
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from ..utils.process_documents.pdf_management.service import PDFElasticsearchService
+from ..utils.process_documents.pdf_management.index_layout import index_body
+from .check_new_files import NewFilesDetector
+
+# Segundos máximos del forcemerge final; en índices grandes tarda más que una petición normal
+REBUILD_FORCEMERGE_TIMEOUT = float(os.getenv('REBUILD_FORCEMERGE_TIMEOUT', 3600))
+# Índices versionados anteriores que se conservan tras mover el alias, para poder volver atrás
+REBUILD_KEEP_PREVIOUS = int(os.getenv('REBUILD_KEEP_PREVIOUS', 1))
+
+# Mientras se carga el índice nuevo nadie lo consulta: sin refrescos periódicos ni réplicas
+BULK_LOAD_SETTINGS = {"refresh_interval": "-1", "number_of_replicas": 0}
+
+
+def versioned_index_name(alias: str, now: Optional[datetime] = None) -> str:
+    """Nombre del índice de una reconstrucción, p. ej. 'pdfs_20250117034820'."""
+    return f"{alias}_{(now or datetime.now()).strftime('%Y%m%d%H%M%S')}"
+
+
+class IndexRebuilder:
+    """
+    Reconstruye el índice completo en un índice versionado nuevo y lo publica moviendo el
+    alias (el `index_name` de los servicios) en una sola operación de `_aliases`.
+
+    La carga se hace sin réplicas y sin refresh; al terminar se fusionan los segmentos y
+    se restauran los settings del layout antes del cambio, así que las búsquedas siguen
+    usando el índice anterior hasta que el nuevo está completo. Si el nombre del alias es
+    todavía un índice real (creado por setup_index), se elimina en la misma operación.
+    Después del cambio se sincronizan los archivos que se modificaron durante la carga.
+    """
+    def __init__(
+        self,
+        services: List[PDFElasticsearchService],
+        keep_previous: int = REBUILD_KEEP_PREVIOUS,
+        forcemerge_timeout: float = REBUILD_FORCEMERGE_TIMEOUT
+    ):
+        if not services:
+            raise ValueError("Se necesita al menos un servicio para reconstruir el índice")
+        if len({service.index_name for service in services}) > 1:
+            raise ValueError("Todos los servicios deben escribir en el mismo índice")
+        self.services = services
+        self.es = services[0].es
+        self.alias = services[0].index_name
+        self.layout = services[0].index_layout
+        self.keep_previous = max(0, keep_previous)
+        self.forcemerge_timeout = forcemerge_timeout
+        self._versioned = re.compile(rf"^{re.escape(self.alias)}_\d{{14}}$")
+        self.logger = logging.getLogger('index_rebuilder')
+
+    async def current_indices(self) -> List[str]:
+        """Índices a los que apunta el alias; vacío si el alias no existe."""
+        if not await self.es.indices.exists_alias(name=self.alias):
+            return []
+        return sorted(await self.es.indices.get_alias(name=self.alias))
+
+    async def _create_target(self) -> str:
+        target = versioned_index_name(self.alias)
+        body = index_body(self.layout)
+        body["settings"].update(BULK_LOAD_SETTINGS)
+        await self.es.indices.create(index=target, body=body)
+        self.logger.info(f"Índice '{target}' creado para la reconstrucción (layout {self.layout})")
+        return target
+
+    async def _load(
+        self,
+        target: str,
+        on_queued: Optional[Callable[[int], None]],
+        on_start: Optional[Callable[[str], None]],
+        on_result: Optional[Callable[[str, Dict], None]]
+    ) -> Dict:
+        # El recorrido es perezoso como en process_directory: no se materializa la lista de
+        # rutas y cada archivo se cuenta como encolado cuando empieza su procesamiento
+        def started(pdf_path: str):
+            if on_queued is not None:
+                on_queued(1)
+            if on_start is not None:
+                on_start(pdf_path)
+
+        summaries = {}
+        for service in self.services:
+            loader = service.with_index(target)
+            try:
+                summaries[service.root_directory] = await loader.process_files(
+                    loader.iter_pdf_files(service.root_directory),
+                    service.root_directory,
+                    on_start=started,
+                    on_result=on_result
+                )
+            finally:
+                await loader.close()
+        return summaries
+
+    async def _finalize(self, target: str):
+        await self.es.indices.refresh(index=target)
+        await self.es.indices.forcemerge(
+            index=target, max_num_segments=1, request_timeout=self.forcemerge_timeout
+        )
+        # null devuelve refresh_interval a su valor por defecto
+        replicas = index_body(self.layout)["settings"]["number_of_replicas"]
+        await self.es.indices.put_settings(index=target, body={
+            "index": {"refresh_interval": None, "number_of_replicas": replicas}
+        })
+
+    async def _swap_alias(self, target: str) -> List[str]:
+        previous = await self.current_indices()
+        actions = [{"remove": {"index": index, "alias": self.alias}} for index in previous]
+        if not previous and await self.es.indices.exists(index=self.alias):
+            actions.append({"remove_index": {"index": self.alias}})
+        actions.append({"add": {"index": target, "alias": self.alias}})
+        await self.es.indices.update_aliases(body={"actions": actions})
+        self.logger.info(f"Alias '{self.alias}' movido a '{target}' (antes: {previous or self.alias})")
+        return previous
+
+    async def _delete_old_indices(self, target: str) -> List[str]:
+        indices = await self.es.indices.get_alias(index=f"{self.alias}_*", ignore=[404])
+        versioned = sorted(
+            index for index in indices
+            if self._versioned.match(index) and index != target
+        )
+        obsolete = versioned[:len(versioned) - self.keep_previous] if self.keep_previous else versioned
+        for index in obsolete:
+            await self.es.indices.delete(index=index, ignore=[404])
+        return obsolete
+
+    async def rebuild(
+        self,
+        on_queued: Optional[Callable[[int], None]] = None,
+        on_start: Optional[Callable[[str], None]] = None,
+        on_result: Optional[Callable[[str, Dict], None]] = None
+    ) -> Dict:
+        """
+        Indexa todos los archivos en un índice nuevo y mueve el alias a él.
+
+        Args:
+            on_queued (Optional[Callable]): Recibe el número de archivos que se añaden al
+                trabajo: 1 por cada archivo de la carga al empezar y los cambios de la sincronización
+            on_start (Optional[Callable]): Ver PDFElasticsearchService.process_files
+            on_result (Optional[Callable]): Ver PDFElasticsearchService.process_files
+
+        Returns:
+            Dict: Índice nuevo, índices anteriores y resumen de la carga y la sincronización
+        """
+        started = datetime.now()
+        target = await self._create_target()
+        try:
+            loaded = await self._load(target, on_queued, on_start, on_result)
+            if all(summary["total_files"] and not summary["successful"] for summary in loaded.values()):
+                raise RuntimeError(f"Ningún archivo se indexó en '{target}'")
+            await self._finalize(target)
+        except BaseException:
+            # También ante una cancelación: el alias sigue apuntando al índice anterior
+            self.logger.warning(f"Reconstrucción interrumpida, se elimina '{target}'")
+            await self.es.indices.delete(index=target, ignore=[404])
+            raise
+
+        previous = await self._swap_alias(target)
+        for service in self.services:
+            service.notify_index_changed()
+
+        deleted = []
+        try:
+            deleted = await self._delete_old_indices(target)
+        except Exception as e:
+            self.logger.warning(f"No se pudieron eliminar índices anteriores de '{self.alias}': {str(e)}")
+
+        # Archivos creados, modificados o borrados mientras se cargaba el índice nuevo
+        catch_up = {}
+        for service in self.services:
+            result = await NewFilesDetector(service).sync(
+                on_changes=(
+                    (lambda changes: on_queued(len(changes["new"]) + len(changes["changed"])))
+                    if on_queued is not None else None
+                ),
+                on_start=on_start,
+                on_result=on_result
+            )
+            catch_up[service.root_directory] = {
+                key: value for key, value in result.items() if not key.endswith("_files")
+            }
+
+        return {
+            "index": target,
+            "previous_indices": previous,
+            "deleted_indices": deleted,
+            "loaded": loaded,
+            "catch_up": catch_up,
+            "duration_seconds": (datetime.now() - started).total_seconds()
+        }
@@ -0,0 +1,189 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+DEFAULT_STATE_FILE = os.getenv('INGESTION_STATE_FILE', '.ingestion_state.json')
+
+IDLE = "idle"
+RUNNING = "running"
+COMPLETED = "completed"
+CANCELLED = "cancelled"
+INTERRUPTED = "interrupted"
+FAILED = "failed"
+
+
+class IngestionJob:
+    """
+    Trabajo de ingesta que corre en segundo plano mientras la API atiende peticiones.
+
+    El `runner` recibe el propio trabajo y debe informar el progreso con `add_queued`,
+    `file_started` y `file_finished`. El último estado se guarda en `state_file`; si el
+    proceso se detuvo con el trabajo en curso, `interrupted` lo indica en el siguiente
+    arranque. La reanudación consiste en volver a lanzar la sincronización incremental,
+    que solo procesa los archivos que aún no están indexados o que cambiaron.
+
+    `start` acepta otro runner (p. ej. la reconstrucción completa del índice) que comparte
+    el estado y la exclusión mutua con la sincronización; `kind` lo identifica en el estado.
+    """
+    def __init__(
+        self,
+        runner: Callable[["IngestionJob"], Awaitable[Dict]],
+        state_file: str = DEFAULT_STATE_FILE
+    ):
+        self.runner = runner
+        self.state_file = state_file
+        self._task: Optional[asyncio.Task] = None
+        self.kind = "sync"
+        self.interrupted = self._load_previous_state().get("state") in (RUNNING, INTERRUPTED)
+        self._reset()
+        self.state = IDLE
+
+    def _reset(self):
+        self.state = RUNNING
+        self.queued = 0
+        self.done = 0
+        self.failed = 0
+        self.current_files: Set[str] = set()
+        self.recent_errors: List[Dict] = []
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self._cancel_state = CANCELLED
+
+    def _load_previous_state(self) -> Dict:
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logging.warning(f"No se pudo leer el estado de ingesta {self.state_file}: {str(e)}")
+            return {}
+
+    def _save_state(self):
+        try:
+            with open(self.state_file, 'w', encoding='utf-8') as file:
+                json.dump({
+                    "state": self.state,
+                    "kind": self.kind,
+                    "queued": self.queued,
+                    "done": self.done,
+                    "failed": self.failed,
+                    "updated_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                }, file)
+        except Exception as e:
+            logging.warning(f"No se pudo guardar el estado de ingesta {self.state_file}: {str(e)}")
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(
+        self,
+        runner: Optional[Callable[["IngestionJob"], Awaitable[Dict]]] = None,
+        kind: str = "sync"
+    ) -> bool:
+        """
+        Lanza el trabajo si no hay otro en curso.
+
+        Args:
+            runner (Optional[Callable]): Runner a ejecutar en lugar del configurado
+            kind (str): Tipo de trabajo que se informa en el estado
+
+        Returns:
+            bool: False si ya había un trabajo en ejecución
+        """
+        if self.running:
+            return False
+
+        self._reset()
+        self.kind = kind
+        self.started_at = time.monotonic()
+        self._save_state()
+        self._task = asyncio.create_task(self._run(runner or self.runner))
+        return True
+
+    async def cancel(self, shutdown: bool = False) -> bool:
+        """
+        Cancela el trabajo en curso. Con `shutdown` se marca como interrumpido para que
+        el siguiente arranque lo reporte como reanudado.
+        """
+        if not self.running:
+            return False
+        self._cancel_state = INTERRUPTED if shutdown else CANCELLED
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        return True
+
+    async def _run(self, runner: Callable[["IngestionJob"], Awaitable[Dict]]):
+        if self.interrupted:
+            logging.info("Reanudando la ingesta interrumpida en el arranque anterior")
+        try:
+            self.result = await runner(self)
+            self.state = COMPLETED
+        except asyncio.CancelledError:
+            self.state = self._cancel_state
+            logging.info(f"Ingesta detenida: {self.state}")
+            raise
+        except Exception as e:
+            self.state = FAILED
+            self.error = str(e)
+            logging.error(f"Error en la ingesta en segundo plano: {str(e)}")
+        finally:
+            self.finished_at = time.monotonic()
+            self.current_files.clear()
+            self.interrupted = False
+            self._save_state()
+
+    def add_queued(self, count: int):
+        self.queued += count
+
+    def file_started(self, pdf_path: str):
+        self.current_files.add(pdf_path)
+
+    def file_finished(self, pdf_path: str, result: Dict):
+        self.current_files.discard(pdf_path)
+        if result.get("success", False):
+            self.done += 1
+        else:
+            self.failed += 1
+            self.recent_errors = (self.recent_errors + [{"path": pdf_path, "error": result.get("error")}])[-20:]
+
+        if (self.done + self.failed) % 50 == 0:
+            self._save_state()
+
+    def status(self) -> Dict:
+        elapsed = None
+        throughput = None
+        eta_seconds = None
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.monotonic()) - self.started_at
+            finished = self.done + self.failed
+            if elapsed > 0:
+                throughput = finished / elapsed
+            if throughput and self.state == RUNNING:
+                eta_seconds = max(0, self.queued - finished) / throughput
+
+        return {
+            "state": self.state,
+            "kind": self.kind,
+            "resumed": self.interrupted,
+            "files_queued": self.queued,
+            "files_done": self.done,
+            "files_failed": self.failed,
+            "files_per_second": round(throughput, 3) if throughput is not None else None,
+            "elapsed_seconds": round(elapsed, 1) if elapsed is not None else None,
+            "eta_seconds": round(eta_seconds, 1) if eta_seconds is not None else None,
+            "current_files": sorted(self.current_files),
+            "recent_errors": self.recent_errors,
+            "error": self.error,
+            "result": self.result
+        }
@@ -0,0 +1,123 @@
+import os
+import json
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_CACHE_MAX_ENTRIES = int(os.getenv('SEARCH_CACHE_MAX_ENTRIES', 1000))
+DEFAULT_CACHE_MAX_BYTES = int(os.getenv('SEARCH_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+DEFAULT_CACHE_TTL = float(os.getenv('SEARCH_CACHE_TTL', 300))
+# Tiempo tras una invalidación en el que Elasticsearch puede no haber refrescado aún
+DEFAULT_REFRESH_GRACE = float(os.getenv('SEARCH_CACHE_REFRESH_GRACE', 1.5))
+
+
+class QueryCache:
+    """
+    Caché en memoria de resultados de búsqueda ya formateados.
+
+    Está acotada por número de entradas y por bytes (tamaño del JSON del resultado), con
+    expulsión LRU y caducidad por TTL. Cada invalidación incrementa la generación del
+    índice: las entradas de generaciones anteriores se descartan y una búsqueda que
+    empezó antes de la invalidación no puede guardar su resultado. Como los cambios no
+    son visibles hasta el siguiente refresh de Elasticsearch, la invalidación se repite
+    pasados `refresh_grace` segundos.
+    """
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_CACHE_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+        ttl: float = DEFAULT_CACHE_TTL,
+        refresh_grace: float = DEFAULT_REFRESH_GRACE
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.refresh_grace = refresh_grace
+        self.generation = 0
+
+        # clave -> (caduca_en, generación, bytes, resultado)
+        self._entries: "OrderedDict[str, Tuple[float, int, int, Dict]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    @staticmethod
+    def make_key(index_name: str, query: Dict[str, Any], **params) -> str:
+        """Clave canónica a partir del índice, la consulta construida y otros parámetros."""
+        return json.dumps([index_name, query, params], sort_keys=True, separators=(',', ':'), default=str)
+
+    def get(self, key: str) -> Optional[Dict]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+
+            expires_at, generation, size, value = entry
+            if expires_at < now or generation != self.generation:
+                self._remove(key)
+                self._stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def put(self, key: str, value: Dict, generation: Optional[int] = None):
+        """
+        Guarda un resultado. `generation` es la generación leída antes de consultar a
+        Elasticsearch; si el índice cambió entretanto el resultado no se guarda.
+        """
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (time.monotonic() + self.ttl, self.generation, size, value)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self._stats["evictions"] += 1
+
+    def _remove(self, key: str):
+        _, _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def invalidate(self):
+        """Descarta todo el contenido; se llama cuando la ingesta modifica el índice."""
+        self._bump_generation()
+        try:
+            asyncio.get_running_loop().call_later(self.refresh_grace, self._bump_generation)
+        except RuntimeError:
+            pass
+
+    def _bump_generation(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._bytes = 0
+            self._stats["invalidations"] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else None,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "generation": self.generation,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl
+            }
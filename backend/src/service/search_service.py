@@ -1,93 +1,257 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+import asyncio
+import base64
+import json
+import os
 from elasticsearch import AsyncElasticsearch
 from ..utils.logs.error_handling import CustomLogger, AppException
+from ..utils.metrics import (
+    CACHE_REQUESTS, ES_REQUEST_SECONDS, SEARCH_SECONDS, SEARCH_TIERS, observe, record_es_error
+)
+from .query_cache import QueryCache
+from .single_flight import SingleFlight
+from ..utils.process_documents.pdf_management.index_layout import DEFAULT_INDEX_LAYOUT, PAGES_LAYOUT, validate_layout
 from fastapi import status
 
+DEFAULT_SOURCE_FIELDS = ["filename", "relative_path", "total_pages", "metadata"]
+# Límite de from + size que Elasticsearch admite por defecto (index.max_result_window)
+MAX_RESULT_WINDOW = 10000
+# Cotas del nivel fuzzy de la búsqueda inteligente: caracteres iniciales que deben
+# coincidir y variantes del término que Elasticsearch puede expandir
+DEFAULT_FUZZY_PREFIX_LENGTH = int(os.getenv('SEARCH_FUZZY_PREFIX_LENGTH', 1))
+DEFAULT_FUZZY_MAX_EXPANSIONS = int(os.getenv('SEARCH_FUZZY_MAX_EXPANSIONS', 20))
+# Máximo de expansiones que se acepta en una petición
+MAX_FUZZY_EXPANSIONS = int(os.getenv('SEARCH_FUZZY_MAX_EXPANSIONS_LIMIT', 200))
+# Documentos que debe encontrar la búsqueda exacta para no pasar al nivel fuzzy
+DEFAULT_SMART_MIN_HITS = int(os.getenv('SEARCH_SMART_MIN_HITS', 1))
+EXACT_TIER = "exact"
+FUZZY_TIER = "fuzzy"
+
+
 class SearchService:
-    def __init__(self, client: AsyncElasticsearch, logger: CustomLogger):
+    def __init__(
+        self,
+        client: AsyncElasticsearch,
+        logger: CustomLogger,
+        cache: Optional[QueryCache] = None,
+        layout: str = DEFAULT_INDEX_LAYOUT,
+        single_flight: Optional[SingleFlight] = None
+    ):
         self.client = client
         self.logger = logger
+        self.cache = cache
+        # Agrupa las búsquedas idénticas simultáneas en una sola petición a Elasticsearch
+        self.single_flight = single_flight
+        # Con el layout por páginas las consultas agrupan las páginas por documento con collapse
+        self.layout = validate_layout(layout)
+        self.content_field = "content" if self.layout == PAGES_LAYOUT else "pages.content"
+        self.page_number_field = "page_number" if self.layout == PAGES_LAYOUT else "pages.number"
 
-    def build_fuzzy_query(self, search_term: str, fuzziness: str, operator: str) -> Dict[str, Any]:
-        return {
-            "query": {
-                "nested": {
-                    "path": "pages",
-                    "query": {
-                        "bool": {
-                            "should": [
-                                {
-                                    "match": {
-                                        "pages.content": {
-                                            "query": search_term,
-                                            "fuzziness": fuzziness,
-                                            "operator": operator.upper(),
-                                        }
-                                    }
-                                }
-                            ]
-                        }
-                    },
-                    "inner_hits": {
-                        "highlight": {
-                            "fields": {
-                                "pages.content": {
-                                    "number_of_fragments": 3,
-                                    "fragment_size": 150,
-                                    "pre_tags": ["<mark>"],
-                                    "post_tags": ["</mark>"]
-                                }
-                            }
-                        }
+    @staticmethod
+    def encode_cursor(sort_values: list) -> str:
+        return base64.urlsafe_b64encode(json.dumps(sort_values).encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> list:
+        try:
+            sort_values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            if not isinstance(sort_values, list):
+                raise ValueError("el cursor no contiene una lista")
+            return sort_values
+        except Exception as e:
+            raise AppException(
+                message="Cursor de paginación inválido",
+                status_code=status.HTTP_400_BAD_REQUEST,
+                extra={"cursor": cursor, "error": str(e)}
+            )
+
+    def _paginate(
+        self,
+        query: Dict[str, Any],
+        page_size: int,
+        offset: int,
+        cursor: Optional[str],
+        sort: list
+    ) -> Dict[str, Any]:
+        """Añade tamaño de página, orden estable y from o search_after a la consulta."""
+        query["size"] = page_size
+        query["sort"] = sort
+        if cursor and "collapse" in query and sort[0] == "_score":
+            # search_after con collapse exige ordenar por el campo de agrupación
+            raise AppException(
+                message="La paginación con cursor no está disponible para esta búsqueda; use from",
+                status_code=status.HTTP_400_BAD_REQUEST,
+                extra={"layout": self.layout}
+            )
+        if cursor:
+            query["search_after"] = self.decode_cursor(cursor)
+        elif offset:
+            query["from"] = offset
+        return query
+
+    def _nested_pages_query(
+        self,
+        clause: Dict[str, Any],
+        include_content: bool,
+        highlight_options: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Consulta nested sobre las páginas. Sin include_content las inner_hits no devuelven
+        el texto de la página: solo su número (doc values) y los fragmentos resaltados.
+        """
+        inner_hits = {
+            "highlight": {
+                "fields": {
+                    "pages.content": {
+                        "number_of_fragments": 3,
+                        "fragment_size": 150,
+                        **highlight_options
                     }
                 }
-            },
-            "_source": ["filename", "relative_path", "total_pages", "metadata", "pages"],
-            "size": 10
+            }
         }
+        if include_content:
+            inner_hits["_source"] = True
+        else:
+            inner_hits["_source"] = False
+            inner_hits["docvalue_fields"] = ["pages.number"]
 
-    def build_exact_query(self, search_term: str) -> Dict[str, Any]:
         return {
-            "query": {
-                "nested": {
-                    "path": "pages",
-                    "query": {
-                        "bool": {
-                            "should": [
-                                {
-                                    "match_phrase": {
-                                        "pages.content": search_term
-                                    }
-                                }
-                            ]
-                        }
-                    },
-                    "inner_hits": {
-                        "highlight": {
-                            "fields": {
-                                "pages.content": {
-                                    "number_of_fragments": 3,
-                                    "fragment_size": 150
-                                }
-                            }
-                        }
+            "nested": {
+                "path": "pages",
+                "query": {
+                    "bool": {
+                        "should": [clause]
+                    }
+                },
+                "inner_hits": inner_hits
+            }
+        }
+
+    def _collapsed_pages_query(
+        self,
+        clause: Dict[str, Any],
+        include_content: bool,
+        highlight_options: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Consulta sobre documentos de página agrupada por PDF: collapse devuelve la mejor
+        página de cada documento y sus inner_hits las páginas coincidentes, con la misma
+        forma que las inner_hits nested. El total de documentos se cuenta con cardinality.
+        """
+        inner_hits = {
+            "name": "pages",
+            "size": 3,
+            "highlight": {
+                "fields": {
+                    "content": {
+                        "number_of_fragments": 3,
+                        "fragment_size": 150,
+                        **highlight_options
                     }
                 }
-            },
-            "_source": ["filename", "relative_path", "total_pages", "metadata", "pages"],
-            "size": 10
+            }
         }
+        if include_content:
+            inner_hits["_source"] = ["page_number", "content"]
+        else:
+            inner_hits["_source"] = False
+            inner_hits["docvalue_fields"] = ["page_number"]
 
-    def build_match_all_query(self) -> Dict[str, Any]:
         return {
-            "query": {"match_all": {}},
-            "_source": ["filename", "relative_path", "total_pages", "metadata"]
+            "query": clause,
+            "collapse": {"field": "relative_path", "inner_hits": inner_hits},
+            "aggs": {
+                "total_documents": {
+                    "cardinality": {"field": "relative_path", "precision_threshold": 40000}
+                }
+            }
+        }
+
+    def _text_query(
+        self,
+        clause: Dict[str, Any],
+        include_content: bool,
+        highlight_options: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        if self.layout == PAGES_LAYOUT:
+            return self._collapsed_pages_query(clause, include_content, highlight_options)
+        return {"query": self._nested_pages_query(clause, include_content, highlight_options)}
+
+    def build_fuzzy_query(
+        self,
+        search_term: str,
+        fuzziness: str,
+        operator: str,
+        page_size: int = 10,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        include_content: bool = False,
+        prefix_length: Optional[int] = None,
+        max_expansions: Optional[int] = None
+    ) -> Dict[str, Any]:
+        clause = {
+            "match": {
+                self.content_field: {
+                    "query": search_term,
+                    "fuzziness": fuzziness,
+                    "operator": operator.upper(),
+                }
+            }
+        }
+        # Sin cotas Elasticsearch usa prefix_length 0 y max_expansions 50
+        if prefix_length is not None:
+            clause["match"][self.content_field]["prefix_length"] = prefix_length
+        if max_expansions is not None:
+            clause["match"][self.content_field]["max_expansions"] = max_expansions
+        query = {
+            **self._text_query(
+                clause,
+                include_content,
+                {"pre_tags": ["<mark>"], "post_tags": ["</mark>"]}
+            ),
+            "_source": DEFAULT_SOURCE_FIELDS
+        }
+        return self._paginate(query, page_size, offset, cursor, ["_score", {"relative_path": "asc"}])
+
+    def build_exact_query(
+        self,
+        search_term: str,
+        page_size: int = 10,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        include_content: bool = False
+    ) -> Dict[str, Any]:
+        clause = {
+            "match_phrase": {
+                self.content_field: search_term
+            }
+        }
+        query = {
+            **self._text_query(clause, include_content, {}),
+            "_source": DEFAULT_SOURCE_FIELDS
+        }
+        return self._paginate(query, page_size, offset, cursor, ["_score", {"relative_path": "asc"}])
+
+    def build_match_all_query(
+        self,
+        page_size: int = 10,
+        offset: int = 0,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        # Con el layout por páginas cada PDF se representa por su página 1
+        query = {
+            "query": {"term": {"page_number": 1}} if self.layout == PAGES_LAYOUT else {"match_all": {}},
+            "_source": DEFAULT_SOURCE_FIELDS
         }
+        return self._paginate(query, page_size, offset, cursor, [{"relative_path": "asc"}])
 
     async def execute_search(self, index_name: str, query: Dict[str, Any]) -> Dict[str, Any]:
         try:
-            return await self.client.search(index=index_name, body=query)
+            with observe(ES_REQUEST_SECONDS, operation='search'):
+                return await self.client.search(index=index_name, body=query)
         except Exception as e:
+            record_es_error('search', e)
             self.logger.error("Error ejecutando búsqueda en Elasticsearch", error=e)
             raise AppException(
                 message="Error al realizar la búsqueda",
@@ -95,13 +259,182 @@ class SearchService:
                 extra={"elasticsearch_error": str(e)}
             )
 
-    def process_search_results(self, response: Dict[str, Any], search_term: Optional[str] = None) -> Dict[str, Any]:
+    async def search(
+        self,
+        index_name: str,
+        query: Dict[str, Any],
+        search_term: Optional[str] = None,
+        page_size: Optional[int] = None,
+        endpoint: str = "search",
+        query_type: str = "fuzzy"
+    ) -> Dict[str, Any]:
+        """
+        Ejecuta la consulta y formatea los resultados, sirviéndolos desde la caché si la
+        misma consulta ya se resolvió para la generación actual del índice. Las consultas
+        idénticas que llegan mientras otra está en curso comparten su resultado. La latencia
+        se registra por endpoint y tipo de consulta.
+        """
+        with observe(SEARCH_SECONDS, endpoint=endpoint, query_type=query_type):
+            key = QueryCache.make_key(index_name, query, search_term=search_term, page_size=page_size)
+            if self.cache is not None:
+                cached = self.cache.get(key)
+                CACHE_REQUESTS.labels(cache='search', result='miss' if cached is None else 'hit').inc()
+                if cached is not None:
+                    return cached
+
+            async def execute() -> Dict[str, Any]:
+                generation = self.cache.generation if self.cache is not None else None
+                response = await self.execute_search(index_name, query)
+                results = self.process_search_results(response, search_term, page_size)
+                if self.cache is not None:
+                    self.cache.put(key, results, generation)
+                return results
+
+            if self.single_flight is None:
+                return await execute()
+
+            try:
+                return await self.single_flight.do(key, execute)
+            except asyncio.TimeoutError:
+                self.logger.warning("Tiempo de espera agotado en la búsqueda", {"search_term": search_term})
+                raise AppException(
+                    message="La búsqueda tardó demasiado",
+                    status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                    extra={"timeout_seconds": self.single_flight.timeout}
+                )
+
+    async def smart_search(
+        self,
+        index_name: str,
+        search_term: str,
+        fuzziness: str = "AUTO",
+        operator: str = "OR",
+        page_size: int = 10,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        include_content: bool = False,
+        min_hits: int = DEFAULT_SMART_MIN_HITS,
+        prefix_length: int = DEFAULT_FUZZY_PREFIX_LENGTH,
+        max_expansions: int = DEFAULT_FUZZY_MAX_EXPANSIONS,
+        tier: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Búsqueda por niveles: primero la frase exacta, que no expande términos, y solo si
+        encuentra menos de `min_hits` documentos una fuzzy acotada por `prefix_length` y
+        `max_expansions`. Con `tier` se ejecuta directamente ese nivel, para pedir las
+        páginas siguientes de un resultado con el mismo orden.
+
+        Returns:
+            Dict: Resultado de process_search_results con 'tier' (nivel que respondió) y
+                'tiers_tried'
+        """
+        tiers_tried = []
+        if tier in (None, EXACT_TIER):
+            query = self.build_exact_query(search_term, page_size, offset, cursor, include_content)
+            results = await self.search(
+                index_name, query, search_term, page_size, endpoint="search_smart", query_type=EXACT_TIER
+            )
+            tiers_tried.append(EXACT_TIER)
+            if tier == EXACT_TIER or results["total_hits"] >= min_hits:
+                SEARCH_TIERS.labels(tier=EXACT_TIER).inc()
+                return {**results, "tier": EXACT_TIER, "tiers_tried": tiers_tried}
+
+        query = self.build_fuzzy_query(
+            search_term, fuzziness, operator, page_size, offset, cursor, include_content,
+            prefix_length=prefix_length, max_expansions=max_expansions
+        )
+        results = await self.search(
+            index_name, query, search_term, page_size, endpoint="search_smart", query_type=FUZZY_TIER
+        )
+        tiers_tried.append(FUZZY_TIER)
+        SEARCH_TIERS.labels(tier=FUZZY_TIER).inc()
+        return {**results, "tier": FUZZY_TIER, "tiers_tried": tiers_tried}
+
+    async def msearch(
+        self,
+        index_name: str,
+        searches: List[Dict[str, Any]],
+        endpoint: str = "search_batch"
+    ) -> List[Dict[str, Any]]:
+        """
+        Resuelve varias búsquedas con una sola petición _msearch. Cada búsqueda es un dict
+        con 'query' (construida con los build_*), 'search_term' y 'page_size'.
+        Las que están en caché no se envían y las consultas repetidas se envían una vez.
+
+        Returns:
+            List[Dict]: Resultado de cada búsqueda, en el mismo orden y con la forma de
+                process_search_results, o {"error": ...} si Elasticsearch la rechazó
+        """
+        with observe(SEARCH_SECONDS, endpoint=endpoint, query_type="batch"):
+            keys = [
+                QueryCache.make_key(
+                    index_name, search["query"],
+                    search_term=search.get("search_term"), page_size=search.get("page_size")
+                )
+                for search in searches
+            ]
+            resolved: Dict[str, Dict[str, Any]] = {}
+            pending: Dict[str, Dict[str, Any]] = {}
+            for key, search in zip(keys, searches):
+                if key in resolved or key in pending:
+                    continue
+                cached = self.cache.get(key) if self.cache is not None else None
+                if self.cache is not None:
+                    CACHE_REQUESTS.labels(cache='search', result='miss' if cached is None else 'hit').inc()
+                if cached is not None:
+                    resolved[key] = cached
+                else:
+                    pending[key] = search
+
+            if pending:
+                generation = self.cache.generation if self.cache is not None else None
+                body = []
+                for search in pending.values():
+                    body.extend([{}, search["query"]])
+                try:
+                    with observe(ES_REQUEST_SECONDS, operation='msearch'):
+                        response = await self.client.msearch(index=index_name, body=body)
+                except Exception as e:
+                    record_es_error('msearch', e)
+                    self.logger.error("Error ejecutando búsqueda múltiple en Elasticsearch", error=e)
+                    raise AppException(
+                        message="Error al realizar la búsqueda",
+                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                        extra={"elasticsearch_error": str(e)}
+                    )
+
+                for (key, search), item in zip(pending.items(), response["responses"]):
+                    if "error" in item:
+                        record_es_error('msearch_item', status=item.get("status"))
+                        resolved[key] = {"error": item["error"]}
+                        continue
+                    results = self.process_search_results(item, search.get("search_term"), search.get("page_size"))
+                    if self.cache is not None:
+                        self.cache.put(key, results, generation)
+                    resolved[key] = results
+
+            return [resolved[key] for key in keys]
+
+    def process_search_results(
+        self,
+        response: Dict[str, Any],
+        search_term: Optional[str] = None,
+        page_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        hits = response["hits"]["hits"]
+        has_more = bool(hits) and "sort" in hits[-1] and (page_size is None or len(hits) >= page_size)
+        # Las búsquedas agrupadas por documento (layout por páginas) se paginan solo con from
+        if self.layout == PAGES_LAYOUT and search_term:
+            has_more = False
+        total_documents = response.get("aggregations", {}).get("total_documents")
         formatted_results = {
-            "total_hits": response["hits"]["total"]["value"],
-            "results": []
+            "total_hits": total_documents["value"] if total_documents else response["hits"]["total"]["value"],
+            "results": [],
+            # Cursor para la siguiente página con search_after; None en la última página
+            "next_cursor": self.encode_cursor(hits[-1]["sort"]) if has_more else None
         }
 
-        for hit in response["hits"]["hits"]:
+        for hit in hits:
             try:
                 doc_result = self._process_document(hit, search_term)
                 formatted_results["results"].append(doc_result)
@@ -133,13 +466,21 @@ class SearchService:
     def _process_matching_pages(self, inner_hits: list) -> list:
         matching_pages = []
         for inner_hit in inner_hits:
-            page_content = inner_hit["_source"]
-            highlights = inner_hit.get("highlight", {}).get("pages.content", [])
-            
-            matching_pages.append({
-                "page_number": page_content["number"],
-                "content": page_content["content"],
+            page_content = inner_hit.get("_source") or {}
+            highlights = inner_hit.get("highlight", {}).get(self.content_field, [])
+
+            page_number = page_content.get("number", page_content.get("page_number"))
+            if page_number is None:
+                page_number = inner_hit.get("fields", {}).get(self.page_number_field, [None])[0]
+            if page_number is None:
+                page_number = inner_hit["_nested"]["offset"] + 1
+
+            page = {
+                "page_number": page_number,
                 "highlights": highlights,
                 "score": inner_hit.get("_score")
-            })
-        return matching_pages
\ No newline at end of file
+            }
+            if "content" in page_content:
+                page["content"] = page_content["content"]
+            matching_pages.append(page)
+        return matching_pages
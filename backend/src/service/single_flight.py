@@ -0,0 +1,76 @@
+import os
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# Peticiones que pueden esperar una misma llamada; las siguientes abren una llamada nueva
+DEFAULT_MAX_WAITERS = int(os.getenv('SEARCH_SINGLE_FLIGHT_MAX_WAITERS', 100))
+# Segundos máximos de una llamada compartida; al vencer fallan todas las que la esperan
+DEFAULT_TIMEOUT = float(os.getenv('SEARCH_SINGLE_FLIGHT_TIMEOUT', 10))
+
+
+class _Flight:
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.waiters = 1
+
+
+class SingleFlight:
+    """
+    Agrupa las llamadas concurrentes con la misma clave: la primera ejecuta la función y
+    las que llegan mientras está en curso esperan su resultado (o su excepción) en lugar
+    de repetirla.
+
+    Cada llamada compartida corre en su propia tarea, así que cancelar una petición (p. ej.
+    un cliente que se desconecta) no cancela la de las demás. Para que una clave muy
+    solicitada no acumule peticiones sin límite, una llamada admite como mucho
+    `max_waiters` esperas; a partir de ahí se abre otra llamada para los siguientes.
+    Ninguna llamada dura más de `timeout` segundos.
+    """
+    def __init__(self, max_waiters: int = DEFAULT_MAX_WAITERS, timeout: float = DEFAULT_TIMEOUT):
+        self.max_waiters = max(1, max_waiters)
+        self.timeout = timeout
+        self._flights: Dict[str, _Flight] = {}
+        self._stats = {"calls": 0, "shared": 0, "overflows": 0, "timeouts": 0}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Devuelve el resultado de `fn()`, compartiendo la llamada en curso para `key` si la hay.
+
+        Raises:
+            asyncio.TimeoutError: Si la llamada compartida supera `timeout`
+        """
+        flight = self._flights.get(key)
+        if flight is not None and flight.waiters < self.max_waiters:
+            flight.waiters += 1
+            self._stats["shared"] += 1
+        else:
+            if flight is not None:
+                self._stats["overflows"] += 1
+            flight = _Flight()
+            flight.task = asyncio.create_task(self._run(fn))
+            flight.task.add_done_callback(lambda task: self._forget(key, flight))
+            self._flights[key] = flight
+            self._stats["calls"] += 1
+        return await asyncio.shield(flight.task)
+
+    async def _run(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            return await asyncio.wait_for(fn(), self.timeout)
+        except asyncio.TimeoutError:
+            self._stats["timeouts"] += 1
+            raise
+
+    def _forget(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # Si todas las peticiones se cancelaron nadie lee la excepción; se marca como leída
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+    def stats(self) -> Dict:
+        return {
+            **self._stats,
+            "in_flight": len(self._flights),
+            "max_waiters": self.max_waiters,
+            "timeout_seconds": self.timeout
+        }
@@ -0,0 +1,92 @@
+import os
+import logging
+from typing import Optional
+import aiohttp
+from elasticsearch import AsyncElasticsearch
+from elasticsearch._async.http_aiohttp import AIOHttpConnection, ESClientResponse
+
+ES_HOST = os.getenv('ES_HOST', 'elasticsearch')
+ES_PORT = int(os.getenv('ES_PORT', 9200))
+ES_SCHEME = os.getenv('ES_SCHEME', 'http')
+# Conexiones abiertas como máximo por nodo (tamaño del pool de aiohttp)
+ES_MAX_CONNECTIONS = int(os.getenv('ES_MAX_CONNECTIONS', 25))
+# Segundos que una conexión ociosa se mantiene abierta para reutilizarla
+ES_KEEPALIVE_SECONDS = float(os.getenv('ES_KEEPALIVE_SECONDS', 30))
+ES_REQUEST_TIMEOUT = float(os.getenv('ES_REQUEST_TIMEOUT', 30))
+ES_RETRY_ON_TIMEOUT = os.getenv('ES_RETRY_ON_TIMEOUT', 'true').lower() == 'true'
+ES_MAX_RETRIES = int(os.getenv('ES_MAX_RETRIES', 3))
+ES_HTTP_COMPRESS = os.getenv('ES_HTTP_COMPRESS', 'false').lower() == 'true'
+
+_shared_client: Optional[AsyncElasticsearch] = None
+
+
+class KeepAliveAIOHttpConnection(AIOHttpConnection):
+    """
+    AIOHttpConnection con keep-alive configurable. La conexión por defecto del cliente
+    7.x no expone el keepalive_timeout del conector de aiohttp.
+    """
+    def __init__(self, *args, keepalive_timeout: float = ES_KEEPALIVE_SECONDS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._keepalive_timeout = keepalive_timeout
+
+    async def _create_aiohttp_session(self):
+        self.session = aiohttp.ClientSession(
+            headers=self.headers,
+            skip_auto_headers=("accept", "accept-encoding", "user-agent"),
+            auto_decompress=True,
+            cookie_jar=aiohttp.DummyCookieJar(),
+            response_class=ESClientResponse,
+            connector=aiohttp.TCPConnector(
+                limit=self._limit,
+                keepalive_timeout=self._keepalive_timeout,
+                use_dns_cache=True,
+                enable_cleanup_closed=True,
+                ssl=self._ssl_context,
+            ),
+        )
+
+
+def create_es_client(
+    host: str = ES_HOST,
+    port: int = ES_PORT,
+    max_connections: int = ES_MAX_CONNECTIONS,
+    keepalive_seconds: float = ES_KEEPALIVE_SECONDS,
+    timeout: float = ES_REQUEST_TIMEOUT,
+    retry_on_timeout: bool = ES_RETRY_ON_TIMEOUT,
+    max_retries: int = ES_MAX_RETRIES,
+    http_compress: bool = ES_HTTP_COMPRESS
+) -> AsyncElasticsearch:
+    """Crea un cliente de Elasticsearch con la configuración de transporte indicada."""
+    return AsyncElasticsearch(
+        [{'host': host, 'port': port, 'scheme': ES_SCHEME}],
+        connection_class=KeepAliveAIOHttpConnection,
+        maxsize=max_connections,
+        keepalive_timeout=keepalive_seconds,
+        timeout=timeout,
+        retry_on_timeout=retry_on_timeout,
+        max_retries=max_retries,
+        http_compress=http_compress
+    )
+
+
+def get_es_client() -> AsyncElasticsearch:
+    """
+    Cliente compartido por todos los routers y servicios. La sesión HTTP se abre en la
+    primera petición, así que se puede obtener al importar los módulos; el cierre
+    corresponde al evento de apagado de la aplicación (close_es_client).
+    """
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = create_es_client()
+        logging.info(
+            f"Cliente de Elasticsearch creado para {ES_HOST}:{ES_PORT} "
+            f"(pool={ES_MAX_CONNECTIONS}, timeout={ES_REQUEST_TIMEOUT}s)"
+        )
+    return _shared_client
+
+
+async def close_es_client():
+    global _shared_client
+    if _shared_client is not None:
+        await _shared_client.close()
+        _shared_client = None
@@ -1,59 +1,193 @@
 from fastapi import HTTPException, status
 from functools import wraps
+from logging.handlers import QueueHandler, QueueListener
+import atexit
 import logging
 import json
-import traceback
-from datetime import datetime
-from typing import Any, Dict, Optional
+import os
+import queue
+import random
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+# Fracción de los mensajes info que se escriben, por logger: "search_api=0.1,documents_api=1"
+LOG_INFO_SAMPLE_RATES = {
+    name.strip(): float(rate)
+    for name, rate in (
+        item.split('=', 1) for item in os.getenv('LOG_INFO_SAMPLE_RATES', '').split(',') if '=' in item
+    )
+}
+
+
+class JsonFormatter(logging.Formatter):
+    """Un objeto JSON por línea con los campos del registro y los datos adicionales."""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ'),
+            "level": record.levelname,
+            "logger": record.name,
+            "user": getattr(record, "user", None),
+            "message": record.getMessage(),
+            **getattr(record, "fields", {})
+        }
+        if record.exc_info:
+            entry["traceback"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Formato de texto original; los datos adicionales se añaden como JSON al final."""
+    def __init__(self):
+        super().__init__('%(asctime)s - [%(levelname)s] - User: %(user)s - %(name)s - %(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        record.message = record.getMessage()
+        fields = getattr(record, "fields", None)
+        if fields:
+            record.message = f"{record.message} - {json.dumps(fields, ensure_ascii=False, default=str)}"
+        record.asctime = self.formatTime(record)
+        line = self.formatMessage(record)
+        if record.exc_info:
+            line = f"{line}\n{self.formatException(record.exc_info)}"
+        return line
+
+
+class _FileRouter(logging.Handler):
+    """Escribe cada registro en el archivo de su logger; corre en el hilo del listener."""
+    def __init__(self, formatter: logging.Formatter):
+        super().__init__()
+        self.setFormatter(formatter)
+        self._handlers: Dict[str, logging.FileHandler] = {}
+
+    def emit(self, record: logging.LogRecord):
+        log_file = getattr(record, "log_file", None)
+        if not log_file:
+            return
+        handler = self._handlers.get(log_file)
+        if handler is None:
+            handler = logging.FileHandler(log_file)
+            handler.setFormatter(self.formatter)
+            self._handlers[log_file] = handler
+        handler.handle(record)
+
+    def close(self):
+        for handler in self._handlers.values():
+            handler.close()
+        super().close()
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """
+    Encola el registro sin formatearlo; el formateo y la escritura ocurren en el hilo del
+    listener. Si la cola está llena el registro se descarta en lugar de bloquear.
+    """
+    def __init__(self, log_queue: queue.Queue, log_file: str):
+        super().__init__(log_queue)
+        self.log_file = log_file
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.log_file = self.log_file
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _backend.dropped += 1
+
+
+class _LoggingBackend:
+    """Cola y hilo compartidos por todos los CustomLogger."""
+    def __init__(self):
+        self.queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        self.dropped = 0
+        self._listener: Optional[QueueListener] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._listener is not None:
+                return
+            formatter = JsonFormatter() if LOG_FORMAT == 'json' else TextFormatter()
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(formatter)
+            self._listener = QueueListener(
+                self.queue, console_handler, _FileRouter(formatter), respect_handler_level=True
+            )
+            self._listener.start()
+
+    def stop(self):
+        """Vacía la cola y detiene el hilo de escritura."""
+        with self._lock:
+            if self._listener is None:
+                return
+            self._listener.stop()
+            for handler in self._listener.handlers:
+                handler.close()
+            self._listener = None
+
+
+_backend = _LoggingBackend()
+atexit.register(_backend.stop)
+
+
+def shutdown_logging():
+    _backend.stop()
+
 
 class CustomLogger:
-    def __init__(self, name: str, log_file: str = 'application.log'):
+    """
+    Logger estructurado para las rutas de la API. Los mensajes se encolan y un hilo en
+    segundo plano los formatea y escribe en consola y en `log_file`, así que loguear no
+    hace E/S en el event loop. Los mensajes info se pueden muestrear por logger con
+    `info_sample_rate` (o LOG_INFO_SAMPLE_RATES); advertencias y errores siempre se escriben.
+    """
+    def __init__(self, name: str, log_file: str = 'application.log', info_sample_rate: Optional[float] = None):
         self.logger = logging.getLogger(name)
         self.logger.setLevel(logging.INFO)
-        
-        # Formato personalizado con información del usuario
-        formatter = logging.Formatter(
-            '%(asctime)s - [%(levelname)s] - User: %(user)s - %(name)s - %(message)s'
+        self.info_sample_rate = (
+            info_sample_rate if info_sample_rate is not None else LOG_INFO_SAMPLE_RATES.get(name, 1.0)
+        )
+
+        # Un solo handler por logger aunque se cree varias veces con el mismo nombre
+        if not any(isinstance(handler, _NonBlockingQueueHandler) for handler in self.logger.handlers):
+            self.logger.addHandler(_NonBlockingQueueHandler(_backend.queue, log_file))
+            # La consola ya la atiende el listener; evitar la escritura síncrona del root
+            self.logger.propagate = False
+        _backend.start()
+
+    def _log(self, level: int, message: str, fields: Optional[Dict], user: str, exc_info=None):
+        self.logger.log(
+            level,
+            message,
+            exc_info=exc_info,
+            extra={"user": user, "fields": dict(fields) if fields else {}}
         )
-        
-        # Handler para archivo
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setFormatter(formatter)
-        self.logger.addHandler(file_handler)
-        
-        # Handler para consola
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(formatter)
-        self.logger.addHandler(console_handler)
-
-    def _get_extra(self, user: str = "Client") -> Dict[str, Any]:
-        return {
-            "user": user,
-            "timestamp": datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
-        }
 
     def info(self, message: str, extra: dict = None, user: str = "Client"):
-        extra_info = self._get_extra(user)
-        if extra:
-            extra_info.update(extra)
-        self.logger.info(f"{message} - {json.dumps(extra_info)}", extra={"user": user})
-
-    def error(self, message: str, error: Exception = None, user: str = "Client"):
-        extra_info = self._get_extra(user)
-        if error:
-            error_details = {
-                "error_type": type(error).__name__,
-                "error_message": str(error),
-                "traceback": traceback.format_exc()
-            }
-            extra_info.update(error_details)
-        self.logger.error(f"{message} - {json.dumps(extra_info)}", extra={"user": user})
+        if self.info_sample_rate < 1.0 and random.random() >= self.info_sample_rate:
+            return
+        if self.logger.isEnabledFor(logging.INFO):
+            self._log(logging.INFO, message, extra, user)
+
+    def error(self, message: str, error: Exception = None, user: str = "Client", extra: dict = None):
+        fields = dict(extra or {})
+        exc_info = None
+        if isinstance(error, dict):
+            # Algunas llamadas pasan los datos adicionales como segundo argumento
+            fields.update(error)
+        elif error:
+            fields["error_type"] = type(error).__name__
+            fields["error_message"] = str(error)
+            if error.__traceback__ is not None:
+                exc_info = (type(error), error, error.__traceback__)
+        self._log(logging.ERROR, message, fields, user, exc_info)
 
     def warning(self, message: str, extra: dict = None, user: str = "Client"):
-        extra_info = self._get_extra(user)
-        if extra:
-            extra_info.update(extra)
-        self.logger.warning(f"{message} - {json.dumps(extra_info)}", extra={"user": user})
+        self._log(logging.WARNING, message, extra, user)
 
 class AppException(Exception):
     def __init__(
@@ -1,3 +1,4 @@
+from typing import Optional
 from fastapi import status
 from .error_handling import AppException
 
@@ -18,4 +19,60 @@ class SearchValidator:
                 message="Valor de fuzziness inválido",
                 status_code=status.HTTP_400_BAD_REQUEST,
                 extra={"valid_fuzziness": ["AUTO", "0", "1", "2"]}
-            )
\ No newline at end of file
+            )
+
+    @staticmethod
+    def validate_fuzzy_bounds(
+        prefix_length: Optional[int],
+        max_expansions: Optional[int],
+        max_prefix_length: int = 10,
+        max_expansions_limit: int = 200
+    ):
+        if prefix_length is not None and not 0 <= prefix_length <= max_prefix_length:
+            raise AppException(
+                message="Valor de prefix_length inválido",
+                status_code=status.HTTP_400_BAD_REQUEST,
+                extra={"min_prefix_length": 0, "max_prefix_length": max_prefix_length}
+            )
+        if max_expansions is not None and not 1 <= max_expansions <= max_expansions_limit:
+            raise AppException(
+                message="Valor de max_expansions inválido",
+                status_code=status.HTTP_400_BAD_REQUEST,
+                extra={"min_max_expansions": 1, "max_max_expansions": max_expansions_limit}
+            )
+
+    @staticmethod
+    def validate_min_hits(min_hits: int, max_min_hits: int = 1000):
+        if not 1 <= min_hits <= max_min_hits:
+            raise AppException(
+                message="Valor de min_hits inválido",
+                status_code=status.HTTP_400_BAD_REQUEST,
+                extra={"min_min_hits": 1, "max_min_hits": max_min_hits}
+            )
+
+    @staticmethod
+    def validate_search_term(search_term: str, max_length: int = 500) -> str:
+        """Devuelve el término sin espacios en los extremos; vacío o demasiado largo es un 400."""
+        search_term = (search_term or '').strip()
+        if not search_term or len(search_term) > max_length:
+            raise AppException(
+                message="Término de búsqueda inválido",
+                status_code=status.HTTP_400_BAD_REQUEST,
+                extra={"min_length": 1, "max_length": max_length}
+            )
+        return search_term
+
+    @staticmethod
+    def validate_pagination(page_size: int, offset: int, max_page_size: int = 100, max_window: int = 10000):
+        if page_size < 1 or page_size > max_page_size:
+            raise AppException(
+                message="Tamaño de página inválido",
+                status_code=status.HTTP_400_BAD_REQUEST,
+                extra={"min_page_size": 1, "max_page_size": max_page_size}
+            )
+        if offset < 0 or offset + page_size > max_window:
+            raise AppException(
+                message="Desplazamiento inválido; use el cursor para paginar más allá del límite",
+                status_code=status.HTTP_400_BAD_REQUEST,
+                extra={"max_result_window": max_window}
+            )
@@ -0,0 +1,90 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+from prometheus_client import Counter, Gauge, Histogram
+
+# Buckets en segundos: desde una página de texto (ms) hasta un documento escaneado largo (min)
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+SEARCH_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+INGEST_STAGE_SECONDS = Histogram(
+    'ingest_stage_seconds',
+    'Duración de cada etapa de la ingesta (rasterize y ocr son por página)',
+    ['stage'],
+    buckets=STAGE_BUCKETS
+)
+INGEST_PAGES = Counter('ingest_pages_total', 'Páginas extraídas por tipo', ['type'])
+INGEST_FILES = Counter('ingest_files_total', 'Archivos procesados por resultado', ['result'])
+INGEST_IN_FLIGHT = Gauge('ingest_files_in_flight', 'Archivos en extracción o pendientes de indexar')
+OCR_PAGES = Counter('ocr_pages_total', 'Páginas con OCR por el perfil que produjo el texto', ['profile'])
+OCR_CONFIDENCE = Histogram(
+    'ocr_page_confidence',
+    'Confianza media por palabra de cada página con OCR',
+    buckets=(0.3, 0.5, 0.6, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95, 1.0)
+)
+INGEST_QUEUE_DEPTH = Gauge('ingest_queue_depth', 'Archivos en cola esperando un worker', ['queue'])
+
+ES_REQUEST_SECONDS = Histogram(
+    'es_request_seconds',
+    'Duración de las peticiones a Elasticsearch',
+    ['operation'],
+    buckets=SEARCH_BUCKETS + (10, 30, 60)
+)
+ES_ERRORS = Counter('es_errors_total', 'Errores de Elasticsearch por operación y estado HTTP', ['operation', 'status'])
+ES_RETRIES = Counter('es_retries_total', 'Documentos reenviados a Elasticsearch por estado HTTP', ['operation', 'status'])
+ES_CONCURRENCY_LIMIT = Gauge(
+    'es_concurrency_limit',
+    'Límite adaptativo de peticiones de escritura a Elasticsearch en vuelo',
+    ['operation']
+)
+ES_IN_FLIGHT_REQUESTS = Gauge('es_in_flight_requests', 'Peticiones de escritura a Elasticsearch en vuelo', ['operation'])
+
+SEARCH_SECONDS = Histogram(
+    'search_latency_seconds',
+    'Latencia de búsqueda (incluye el formateo de resultados)',
+    ['endpoint', 'query_type'],
+    buckets=SEARCH_BUCKETS
+)
+SEARCH_TIERS = Counter('search_tier_total', 'Búsquedas inteligentes por el nivel que las resolvió', ['tier'])
+CACHE_REQUESTS = Counter('cache_requests_total', 'Consultas a cachés por resultado', ['cache', 'result'])
+
+
+@contextmanager
+def observe(histogram: Histogram, **labels) -> Iterator[None]:
+    """Mide la duración del bloque en el histograma indicado."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.labels(**labels).observe(time.perf_counter() - started)
+
+
+def error_status(error: Exception) -> str:
+    """Estado HTTP de un error del cliente de Elasticsearch, o el tipo si no hay respuesta."""
+    status = getattr(error, 'status_code', None)
+    return str(status) if isinstance(status, int) else type(error).__name__
+
+
+def record_es_error(operation: str, error: Optional[Exception] = None, status: Optional[int] = None):
+    ES_ERRORS.labels(operation=operation, status=str(status) if status is not None else error_status(error)).inc()
+
+
+def record_extraction(info: Dict):
+    """
+    Registra las duraciones que el worker devuelve en info['timings']. La extracción puede
+    correr en otro proceso, así que los tiempos viajan con el resultado y se observan aquí.
+    """
+    timings = info.get('timings') or {}
+    for stage, value in timings.items():
+        if isinstance(value, list):
+            for seconds in value:
+                INGEST_STAGE_SECONDS.labels(stage=stage).observe(seconds)
+        elif isinstance(value, (int, float)):
+            INGEST_STAGE_SECONDS.labels(stage=stage).observe(value)
+
+    for page in (info.get('pages') or {}).values():
+        INGEST_PAGES.labels(type='ocr' if page.get('is_image') else 'text').inc()
+        if page.get('ocr_profile'):
+            OCR_PAGES.labels(profile=page['ocr_profile']).inc()
+            if page.get('confidence') is not None:
+                OCR_CONFIDENCE.observe(page['confidence'])
@@ -0,0 +1,151 @@
+import os
+import time
+import random
+import asyncio
+import logging
+from collections import deque
+from typing import Deque, Dict
+from elasticsearch import ConnectionError as ESConnectionError, ConnectionTimeout, TransportError
+from ...metrics import ES_CONCURRENCY_LIMIT, ES_IN_FLIGHT_REQUESTS
+
+DEFAULT_INITIAL_LIMIT = float(os.getenv('ES_CONCURRENCY_INITIAL', 2))
+DEFAULT_MIN_LIMIT = int(os.getenv('ES_CONCURRENCY_MIN', 1))
+DEFAULT_MAX_LIMIT = int(os.getenv('ES_CONCURRENCY_MAX', 8))
+# Una petición que tarda más que esto cuenta como señal de saturación, igual que un 429
+DEFAULT_LATENCY_TARGET = float(os.getenv('ES_CONCURRENCY_LATENCY_TARGET', 5.0))
+DEFAULT_DECREASE_RATIO = float(os.getenv('ES_CONCURRENCY_DECREASE_RATIO', 0.5))
+
+# Estados que se reintentan; 'TIMEOUT' y 'N/A' son los que asigna el cliente sin respuesta HTTP
+RETRYABLE_STATUS = {429, 502, 503, 504, 'TIMEOUT', 'N/A'}
+# Estados que indican que el clúster no da abasto y reducen el límite
+PRESSURE_STATUS = {429, 503, 504, 'TIMEOUT'}
+
+
+def is_retryable(status) -> bool:
+    return status in RETRYABLE_STATUS
+
+
+def is_pressure(status) -> bool:
+    return status in PRESSURE_STATUS
+
+
+def exception_status(error: Exception):
+    """Estado de un error del cliente en los mismos términos que RETRYABLE_STATUS."""
+    if isinstance(error, ConnectionTimeout) or isinstance(error, asyncio.TimeoutError):
+        return 'TIMEOUT'
+    if isinstance(error, ESConnectionError):
+        return 'N/A'
+    if isinstance(error, TransportError):
+        return error.status_code
+    return None
+
+
+def jittered_backoff(attempt: int, initial: float, maximum: float) -> float:
+    """Espera antes del reintento `attempt` (desde 1) con jitter completo sobre el backoff exponencial."""
+    return random.uniform(0, min(maximum, initial * 2 ** (attempt - 1)))
+
+
+class AIMDLimiter:
+    """
+    Limita las peticiones de escritura a Elasticsearch en vuelo con un límite que se adapta
+    como el control de congestión de TCP (AIMD): cada petición que termina bien y dentro de
+    `latency_target` suma `1 / límite` (≈ +1 por ronda de peticiones) y un 429, un timeout
+    o una respuesta lenta lo multiplican por `decrease_ratio`.
+
+    Solo se reduce una vez por ronda: las peticiones que empezaron antes de la última
+    reducción ya la reflejan y no vuelven a reducir. El límite actual se publica en la
+    métrica `es_concurrency_limit`.
+    """
+    def __init__(
+        self,
+        name: str,
+        initial_limit: float = DEFAULT_INITIAL_LIMIT,
+        min_limit: int = DEFAULT_MIN_LIMIT,
+        max_limit: int = DEFAULT_MAX_LIMIT,
+        latency_target: float = DEFAULT_LATENCY_TARGET,
+        decrease_ratio: float = DEFAULT_DECREASE_RATIO
+    ):
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(self.max_limit, max(self.min_limit, initial_limit)))
+        self.latency_target = latency_target
+        self.decrease_ratio = decrease_ratio
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        # Peticiones esperando hueco, en orden de llegada
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._limit_gauge = ES_CONCURRENCY_LIMIT.labels(operation=name)
+        self._in_flight_gauge = ES_IN_FLIGHT_REQUESTS.labels(operation=name)
+        self._limit_gauge.set(self.limit)
+
+    async def acquire(self) -> float:
+        """
+        Espera a que haya hueco bajo el límite actual.
+
+        Returns:
+            float: Instante de inicio, que se devuelve en release
+        """
+        if self._waiters or self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                # Quien libera el hueco lo cede ya contado en in_flight
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self._release_slot()
+                elif waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                raise
+        else:
+            self.in_flight += 1
+            self._in_flight_gauge.set(self.in_flight)
+        return time.monotonic()
+
+    def release(self, started: float, overloaded: bool = False):
+        """
+        Libera el hueco y ajusta el límite según el resultado de la petición.
+
+        Args:
+            started (float): Valor devuelto por acquire
+            overloaded (bool): La petición recibió un 429, un timeout u otro error de saturación
+        """
+        latency = time.monotonic() - started
+        if overloaded or latency > self.latency_target:
+            if started >= self._last_decrease:
+                previous = self.limit
+                self.limit = max(float(self.min_limit), self.limit * self.decrease_ratio)
+                self._last_decrease = time.monotonic()
+                logging.warning(
+                    f"Concurrencia de {self.name} reducida de {int(previous)} a {int(self.limit)} "
+                    f"({'saturación' if overloaded else f'latencia {latency:.1f}s'})"
+                )
+        else:
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+        self._limit_gauge.set(self.limit)
+        self._release_slot()
+
+    def _release_slot(self):
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+        self._in_flight_gauge.set(self.in_flight)
+
+
+_limiters: Dict[str, AIMDLimiter] = {}
+
+
+def get_limiter(name: str) -> AIMDLimiter:
+    """
+    Limitador compartido por nombre dentro del proceso, para que todos los indexadores que
+    escriben en el mismo clúster repartan el mismo presupuesto de concurrencia.
+    """
+    limiter = _limiters.get(name)
+    if limiter is None:
+        limiter = AIMDLimiter(name)
+        _limiters[name] = limiter
+    return limiter
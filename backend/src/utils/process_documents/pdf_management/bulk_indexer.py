@@ -0,0 +1,246 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from elasticsearch import AsyncElasticsearch
+from elasticsearch.helpers import async_streaming_bulk
+from .adaptive_concurrency import (
+    AIMDLimiter, exception_status, get_limiter, is_pressure, is_retryable, jittered_backoff
+)
+from ...metrics import ES_REQUEST_SECONDS, ES_RETRIES, observe, record_es_error
+
+DEFAULT_BULK_MAX_DOCS = int(os.getenv('BULK_MAX_DOCS', 200))
+DEFAULT_BULK_MAX_BYTES = int(os.getenv('BULK_MAX_BYTES', 20 * 1024 * 1024))
+DEFAULT_BULK_FLUSH_INTERVAL = float(os.getenv('BULK_FLUSH_INTERVAL', 5.0))
+DEFAULT_BULK_MAX_RETRIES = int(os.getenv('BULK_MAX_RETRIES', 5))
+
+
+class BulkIndexer:
+    """
+    Acumula documentos y los envía a Elasticsearch con la API _bulk.
+
+    El buffer se vacía al alcanzar `max_docs` documentos, `max_bytes` de carga útil o
+    cuando el documento más antiguo lleva `flush_interval` segundos esperando. Cada
+    `add` devuelve un Future que se resuelve con el resultado de ese documento. `on_flush`
+    se invoca tras cada envío que haya modificado el índice.
+
+    Las peticiones pasan por un AIMDLimiter compartido (por defecto el de la ingesta), que
+    decide cuántas puede haber en vuelo; los documentos rechazados con 429 o sin respuesta
+    por timeout se reenvían con backoff exponencial con jitter hasta `max_retries` veces.
+    """
+    def __init__(
+        self,
+        es: AsyncElasticsearch,
+        index_name: str,
+        max_docs: int = DEFAULT_BULK_MAX_DOCS,
+        max_bytes: int = DEFAULT_BULK_MAX_BYTES,
+        flush_interval: float = DEFAULT_BULK_FLUSH_INTERVAL,
+        max_retries: int = DEFAULT_BULK_MAX_RETRIES,
+        initial_backoff: float = 2,
+        max_backoff: float = 60,
+        on_item: Optional[Callable[[str, Dict], None]] = None,
+        on_flush: Optional[Callable[[], None]] = None,
+        limiter: Optional[AIMDLimiter] = None
+    ):
+        self.es = es
+        self.index_name = index_name
+        self.max_docs = max(1, max_docs)
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.on_item = on_item
+        self.on_flush = on_flush
+        self.limiter = limiter or get_limiter('ingest')
+
+        self._buffer: List[Tuple[Dict, asyncio.Future]] = []
+        self._buffer_bytes = 0
+        self._oldest: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+        self._stop: Optional[asyncio.Event] = None
+        self.stats = {"sent": 0, "failed": 0, "requests": 0, "retried": 0}
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def start(self):
+        if self._timer is None and self.flush_interval > 0:
+            self._stop = asyncio.Event()
+            self._timer = asyncio.create_task(self._flush_periodically())
+
+    async def close(self):
+        """
+        Detiene el vaciado periódico y envía lo que quede en el buffer. No se cancela la
+        tarea del vaciado: si está enviando un lote se espera a que termine, para que los
+        Futures de ese lote se resuelvan.
+        """
+        if self._timer is not None:
+            self._stop.set()
+            await self._timer
+            self._timer = None
+        await self.flush()
+
+    async def add(self, doc_id: str, document: Optional[Dict], op_type: str = "index") -> asyncio.Future:
+        """
+        Encola un documento para el siguiente envío.
+
+        Args:
+            doc_id (str): ID del documento
+            document (Dict): Cuerpo del documento, o campos parciales para 'update'
+                (ignorado para op_type 'delete')
+            op_type (str): 'index', 'update' o 'delete'
+
+        Returns:
+            asyncio.Future: Se resuelve con {"success": bool, "id": ..., "status": ..., "error": ...}
+        """
+        action: Dict[str, Any] = {"_op_type": op_type, "_index": self.index_name, "_id": doc_id}
+        size = len(doc_id) + 64
+        if op_type != "delete":
+            action["doc" if op_type == "update" else "_source"] = document
+            size += len(json.dumps(document, ensure_ascii=False, default=str).encode('utf-8'))
+
+        future = asyncio.get_running_loop().create_future()
+        batch = None
+        async with self._lock:
+            if not self._buffer:
+                self._oldest = time.monotonic()
+            self._buffer.append((action, future))
+            self._buffer_bytes += size
+            if len(self._buffer) >= self.max_docs or self._buffer_bytes >= self.max_bytes:
+                batch = self._take_buffer()
+
+        if batch:
+            await self._send(batch)
+        return future
+
+    async def flush(self):
+        async with self._lock:
+            batch = self._take_buffer()
+        if batch:
+            await self._send(batch)
+
+    def _take_buffer(self) -> List[Tuple[Dict, asyncio.Future]]:
+        batch = self._buffer
+        self._buffer = []
+        self._buffer_bytes = 0
+        self._oldest = None
+        return batch
+
+    async def _flush_periodically(self):
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), self.flush_interval / 2)
+                return
+            except asyncio.TimeoutError:
+                pass
+            if self._oldest is not None and time.monotonic() - self._oldest >= self.flush_interval:
+                try:
+                    await self.flush()
+                except Exception as e:
+                    logging.error(f"Error en el vaciado periódico del bulk: {str(e)}")
+
+    async def _bulk_request(self, actions: List[Dict]) -> List[Tuple[bool, Dict]]:
+        """Envía una petición _bulk y devuelve el resultado de cada acción, en orden."""
+        results = []
+        with observe(ES_REQUEST_SECONDS, operation='bulk'):
+            # Los reintentos los gestiona _send; los errores de transporte llegan como fallos por acción
+            async for ok, item in async_streaming_bulk(
+                self.es,
+                actions,
+                chunk_size=len(actions),
+                max_chunk_bytes=self.max_bytes * 2,
+                raise_on_error=False,
+                raise_on_exception=False,
+                max_retries=0,
+                yield_ok=True
+            ):
+                results.append((ok, next(iter(item.values()))))
+        return results
+
+    async def _send(self, batch: List[Tuple[Dict, asyncio.Future]]):
+        self.stats["requests"] += 1
+        sent_before = self.stats["sent"]
+        remaining = batch
+
+        try:
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    await asyncio.sleep(jittered_backoff(attempt, self.initial_backoff, self.max_backoff))
+
+                started = await self.limiter.acquire()
+                results = None
+                try:
+                    results = await self._bulk_request([action for action, _ in remaining])
+                except Exception as e:
+                    logging.error(f"Error enviando lote bulk de {len(remaining)} documentos: {str(e)}")
+                    record_es_error('bulk', e)
+                    results = [(False, {"status": exception_status(e), "error": str(e)})] * len(remaining)
+                finally:
+                    # El hueco se libera también si la petición se cancela
+                    self.limiter.release(started, results is not None and any(
+                        not ok and is_pressure(op_result.get("status")) for ok, op_result in results
+                    ))
+
+                retry = []
+                # Las respuestas llegan en el orden de las acciones, aunque un ID se repita en el lote
+                for (action, future), (ok, op_result) in zip(remaining, results):
+                    status = op_result.get("status")
+                    if not ok and is_retryable(status) and attempt < self.max_retries:
+                        ES_RETRIES.labels(operation='bulk', status=str(status)).inc()
+                        retry.append((action, future))
+                        continue
+                    result = {"success": ok, "id": action["_id"], "status": status}
+                    if not ok:
+                        result["error"] = str(op_result.get("error") or op_result.get("exception"))
+                    self._resolve(future, action["_id"], result)
+
+                for action, future in remaining[len(results):]:
+                    self._resolve(future, action["_id"], {
+                        "success": False, "id": action["_id"], "status": None,
+                        "error": "Documento sin respuesta en la petición bulk"
+                    })
+
+                if not retry:
+                    break
+                self.stats["retried"] += len(retry)
+                logging.warning(f"Reintentando {len(retry)} documentos del bulk (intento {attempt + 1})")
+                remaining = retry
+
+            if self.on_flush is not None and self.stats["sent"] > sent_before:
+                self.on_flush()
+        except asyncio.CancelledError:
+            # Cancelado durante la petición o la espera entre reintentos, que puede durar
+            # hasta max_backoff: los documentos aún sin resultado fallan de forma explícita
+            self._fail_pending(batch, "Envío bulk cancelado antes de completar los reintentos")
+            raise
+        finally:
+            # Ningún Future del lote queda pendiente, aunque el envío se interrumpa
+            self._fail_pending(batch, "Envío bulk interrumpido antes de recibir respuesta")
+
+    def _fail_pending(self, batch: List[Tuple[Dict, asyncio.Future]], error: str):
+        for action, future in batch:
+            if not future.done():
+                self._resolve(future, action["_id"], {
+                    "success": False, "id": action["_id"], "status": None, "error": error
+                })
+
+    def _resolve(self, future: Optional[asyncio.Future], doc_id: str, result: Dict):
+        if result["success"]:
+            self.stats["sent"] += 1
+        else:
+            self.stats["failed"] += 1
+            if result.get("status") is not None:
+                record_es_error('bulk_item', status=result["status"])
+            logging.error(f"Error indexando {doc_id} en bulk: {result.get('error')}")
+        if future is not None and not future.done():
+            future.set_result(result)
+        if self.on_item is not None:
+            self.on_item(doc_id, result)
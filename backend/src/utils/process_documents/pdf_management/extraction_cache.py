@@ -0,0 +1,134 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+DEFAULT_CACHE_DIR = os.getenv('EXTRACTION_CACHE_DIR', '.extraction_cache')
+DEFAULT_CACHE_MAX_BYTES = int(os.getenv('EXTRACTION_CACHE_MAX_BYTES', 2 * 1024 * 1024 * 1024))
+CACHE_ENABLED = os.getenv('EXTRACTION_CACHE_ENABLED', 'true').lower() == 'true'
+
+
+def hash_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Calcula el SHA-256 del contenido de un archivo leyéndolo por bloques.
+
+    Args:
+        file_path (str): Ruta al archivo
+        chunk_size (int): Tamaño de cada bloque leído
+
+    Returns:
+        str: Hash hexadecimal del contenido
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """
+    Caché persistente en disco de resultados de extracción.
+
+    Cada entrada se guarda como JSON bajo el hash del contenido del archivo y la versión
+    del extractor, así que renombrar o mover un PDF no invalida su entrada y cambiar la
+    lógica de extracción sí. Cuando el tamaño total supera `max_bytes` se eliminan las
+    entradas usadas hace más tiempo (la fecha de modificación se actualiza en cada lectura).
+    """
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+        extractor_version: str = '1'
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.extractor_version = extractor_version
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _entry_path(self, content_hash: str) -> Path:
+        return self.cache_dir / content_hash[:2] / f"{content_hash}-{self.extractor_version}.json"
+
+    def _iter_entries(self):
+        return self.cache_dir.glob('*/*.json')
+
+    def get(self, content_hash: str) -> Optional[Dict]:
+        """
+        Devuelve la información extraída guardada para el hash, o None si no existe.
+        """
+        path = self._entry_path(content_hash)
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                info = json.load(file)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning(f"Entrada de caché ilegible {path}: {str(e)}")
+            path.unlink(missing_ok=True)
+            return None
+
+        # JSON convierte las claves numéricas de página en cadenas
+        info['pages'] = {int(page_num): page for page_num, page in info.get('pages', {}).items()}
+        return info
+
+    def put(self, content_hash: str, info: Dict):
+        """
+        Guarda la información extraída. Los resultados con error no se guardan.
+        """
+        if 'error' in info:
+            return
+
+        path = self._entry_path(content_hash)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(info, file, ensure_ascii=False)
+            size = tmp_path.stat().st_size
+            # Reescribir una entrada existente solo suma la diferencia de tamaño
+            try:
+                previous_size = path.stat().st_size
+            except FileNotFoundError:
+                previous_size = 0
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logging.warning(f"No se pudo guardar la entrada de caché {path}: {str(e)}")
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(entry.stat().st_size for entry in self._iter_entries())
+            else:
+                self._total_bytes += size - previous_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Elimina las entradas menos usadas hasta quedar por debajo del 90% del límite."""
+        entries = []
+        for entry in self._iter_entries():
+            try:
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry))
+            except FileNotFoundError:
+                continue
+
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        for _, size, entry in sorted(entries, key=lambda item: item[0]):
+            if total <= target:
+                break
+            entry.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+
+        self._total_bytes = total
+        logging.info(f"Caché de extracción: {removed} entradas eliminadas, {total} bytes en uso")
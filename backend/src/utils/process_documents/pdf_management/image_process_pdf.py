@@ -1,17 +1,17 @@
 import os
 import logging
 from typing import Dict, Optional, List
-from pdf2image import convert_from_path
-import pytesseract
 from pathlib import Path
 from datetime import datetime
+from .ocr_engine import OCRStreamEngine
 
 class ImagePDFProcessor:
     """
     Clase responsable de procesar PDFs que son imágenes y requieren OCR.
     """
-    def __init__(self):
+    def __init__(self, ocr_engine: Optional[OCRStreamEngine] = None):
         self._processed_files: List[str] = []
+        self.ocr_engine = ocr_engine or OCRStreamEngine()
         self.setup_logging()
 
     def setup_logging(self):
@@ -40,9 +40,12 @@ class ImagePDFProcessor:
                 logging.error(f"El archivo no es un PDF: {pdf_path}")
                 return False
 
-            # Intenta abrir el PDF para verificar que no está corrupto
+            # Solo se comprueba la cabecera: rasterizar aquí una página para descartarla
+            # duplicaba trabajo, y un PDF corrupto ya falla al contar o renderizar páginas
             with open(pdf_path, 'rb') as file:
-                convert_from_path(pdf_path, first_page=0, last_page=1)
+                if b'%PDF-' not in file.read(1024):
+                    logging.error(f"El archivo no tiene cabecera PDF: {pdf_path}")
+                    return False
             return True
         except Exception as e:
             logging.error(f"Error validando PDF {pdf_path}: {str(e)}")
@@ -73,12 +76,20 @@ class ImagePDFProcessor:
         
         return value
 
-    def extract_text_from_image_pdf(self, pdf_path: str) -> Dict:
+    def extract_text_from_image_pdf(
+        self,
+        pdf_path: str,
+        page_numbers: Optional[List[int]] = None,
+        text_layer_dir: Optional[str] = None
+    ) -> Dict:
         """
         Extrae texto de un PDF que contiene imágenes usando OCR.
         
         Args:
             pdf_path (str): Ruta al archivo PDF
+            page_numbers (Optional[List[int]]): Páginas (base 1) a procesar; todas si es None
+            text_layer_dir (Optional[str]): Directorio donde escribir cada página con OCR
+                como PDF con capa de texto (ver SearchablePDFStore)
             
         Returns:
             Dict: Diccionario con toda la información extraída
@@ -96,15 +107,16 @@ class ImagePDFProcessor:
             return info
 
         try:
-            # Convertir PDF a imágenes
-            images = convert_from_path(pdf_path)
+            # Aplicar OCR página a página sobre el pool de procesos
             texto_completo = []
             total_palabras = 0
             total_caracteres = 0
+            paginas_reocr = 0
+            timings = {'rasterize': [], 'ocr': []}
 
-            for page_num, image in enumerate(images, 1):
-                # Aplicar OCR
-                text = pytesseract.image_to_string(image, lang='spa')
+            for page_num, text, confidence, profile in self.ocr_engine.iter_pages(
+                pdf_path, page_numbers, timings, text_layer_dir
+            ):
                 palabras = text.split()
                 texto_completo.append(text)
 
@@ -114,16 +126,25 @@ class ImagePDFProcessor:
                 info['pages'][page_num] = {
                     'texto': text,
                     'numero_caracteres': len(text),
-                    'numero_palabras': len(palabras)
+                    'numero_palabras': len(palabras),
+                    'is_image': True,
+                    # Confianza media por palabra según Tesseract; None si no reconoció nada
+                    'confidence': confidence,
+                    'ocr_profile': profile
                 }
+                if profile != self.ocr_engine.profile.name:
+                    paginas_reocr += 1
 
             info['texto_completo'] = '\n\n'.join(texto_completo)
+            info['timings'] = timings
             info['document_info'] = {
-                'numero_paginas': len(images),
+                'numero_paginas': len(info['pages']),
                 'tamano_archivo': os.path.getsize(pdf_path),
                 'fecha_procesamiento': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
                 'total_palabras': total_palabras,
-                'total_caracteres': total_caracteres
+                'total_caracteres': total_caracteres,
+                'perfil_ocr': self.ocr_engine.profile.name,
+                'paginas_reocr': paginas_reocr
             }
 
             self._processed_files.append(pdf_path)
@@ -0,0 +1,136 @@
+import os
+import copy
+from typing import Dict, Iterable, List, Tuple
+
+# 'nested': un documento por PDF con las páginas como objetos nested (el layout original).
+# 'pages': un documento por página con los campos del PDF desnormalizados; actualizar una
+# página no reescribe el PDF entero y los resaltados no cargan el documento completo.
+NESTED_LAYOUT = 'nested'
+PAGES_LAYOUT = 'pages'
+INDEX_LAYOUTS = (NESTED_LAYOUT, PAGES_LAYOUT)
+DEFAULT_INDEX_LAYOUT = os.getenv('INDEX_LAYOUT', NESTED_LAYOUT)
+
+# Campos del PDF que se copian en cada documento de página
+DOCUMENT_FIELDS = (
+    "filename", "file_path", "relative_path", "directory_structure", "file_size", "file_mtime",
+    "content_hash", "total_pages", "metadata", "document_info", "indexed_date"
+)
+PAGE_FIELDS = ("content", "is_image", "confidence", "ocr_profile")
+
+_SETTINGS = {
+    "number_of_shards": 1,
+    "number_of_replicas": 1,
+    "analysis": {
+        "analyzer": {
+            "pdf_analyzer": {
+                "type": "custom",
+                "tokenizer": "standard",
+                "filter": ["lowercase", "asciifolding"]
+            }
+        }
+    }
+}
+
+_DOCUMENT_PROPERTIES = {
+    "filename": {"type": "keyword"},
+    "file_path": {"type": "keyword"},
+    "relative_path": {"type": "keyword"},
+    "file_size": {"type": "long"},
+    "file_mtime": {"type": "double"},
+    "content_hash": {"type": "keyword"},
+    "total_pages": {"type": "integer"},
+    "metadata": {
+        "properties": {
+            "autor": {"type": "text"},
+            "titulo": {"type": "text"},
+            "fecha_creacion": {
+                "type": "date",
+                "format": "yyyy-MM-dd HH:mm:ss||yyyy-MM-dd||epoch_millis"
+            }
+        }
+    },
+    "document_info": {
+        "properties": {
+            "tamano_archivo": {"type": "long"},
+            "fecha_procesamiento": {
+                "type": "date",
+                "format": "yyyy-MM-dd HH:mm:ss"
+            },
+            "tipo_procesamiento": {"type": "keyword"},
+            "backend_texto": {"type": "keyword"},
+            "perfil_ocr": {"type": "keyword"},
+            "paginas_reocr": {"type": "integer"},
+            "pdf_buscable": {"type": "keyword"}
+        }
+    },
+    "indexed_date": {
+        "type": "date",
+        "format": "yyyy-MM-dd HH:mm:ss"
+    }
+}
+
+_PAGE_PROPERTIES = {
+    "content": {
+        "type": "text",
+        "analyzer": "pdf_analyzer"
+    },
+    "is_image": {"type": "boolean"},
+    "confidence": {"type": "float"},
+    "ocr_profile": {"type": "keyword"}
+}
+
+
+def validate_layout(layout: str) -> str:
+    if layout not in INDEX_LAYOUTS:
+        raise ValueError(f"Layout de índice no soportado: {layout} (disponibles: {', '.join(INDEX_LAYOUTS)})")
+    return layout
+
+
+def index_body(layout: str) -> Dict:
+    """Settings y mappings para crear un índice con el layout indicado."""
+    properties = copy.deepcopy(_DOCUMENT_PROPERTIES)
+    if validate_layout(layout) == NESTED_LAYOUT:
+        properties["pages"] = {
+            "type": "nested",
+            "properties": {"number": {"type": "integer"}, **copy.deepcopy(_PAGE_PROPERTIES)}
+        }
+    else:
+        properties["page_number"] = {"type": "integer"}
+        properties.update(copy.deepcopy(_PAGE_PROPERTIES))
+    return {"settings": copy.deepcopy(_SETTINGS), "mappings": {"properties": properties}}
+
+
+def page_id(doc_id: str, page_number: int) -> str:
+    return f"{doc_id}#{page_number}"
+
+
+def split_document(doc_id: str, document: Dict) -> List[Tuple[str, Dict]]:
+    """
+    Convierte un documento con páginas nested en un documento por página. Un PDF sin
+    páginas produce una página 1 vacía, para que la sincronización lo siga viendo indexado.
+
+    Returns:
+        List[Tuple[str, Dict]]: ID y documento de cada página
+    """
+    base = {field: document[field] for field in DOCUMENT_FIELDS if field in document}
+    pages = document.get("pages") or [{"number": 1, "content": ""}]
+    page_documents = []
+    for page in pages:
+        page_document = {**base, "page_number": page["number"]}
+        page_document.update({field: page[field] for field in PAGE_FIELDS if field in page})
+        page_documents.append((page_id(doc_id, page["number"]), page_document))
+    return page_documents
+
+
+def merge_pages(page_documents: Iterable[Dict]) -> Dict:
+    """Reconstruye el documento con páginas nested a partir de sus documentos de página."""
+    page_documents = sorted(page_documents, key=lambda page: page["page_number"])
+    if not page_documents:
+        raise ValueError("No hay páginas que unir")
+    document = {field: page_documents[0][field] for field in DOCUMENT_FIELDS if field in page_documents[0]}
+    document["pages"] = [
+        {"number": page["page_number"], **{field: page[field] for field in PAGE_FIELDS if field in page}}
+        for page in page_documents
+        if page.get("total_pages", 1) or page.get("content")
+    ]
+    return document
@@ -0,0 +1,162 @@
+"""
+Copia un índice de PDFs a otro índice con el layout indicado, sin volver a extraer.
+
+    python -m src.utils.process_documents.pdf_management.migrate_layout --source pdfs --target pdfs_pages --layout pages
+    python -m src.utils.process_documents.pdf_management.migrate_layout --source pdfs_pages --target pdfs --layout nested
+
+El destino no debe existir: se crea con el mapping del layout. Para pasar a usarlo,
+configurar INDEX_LAYOUT con el layout nuevo y apuntar la aplicación al índice destino.
+"""
+import argparse
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from elasticsearch import AsyncElasticsearch
+from ...es_client import close_es_client, get_es_client
+from .index_layout import INDEX_LAYOUTS, NESTED_LAYOUT, PAGES_LAYOUT, merge_pages
+from .service import PDFElasticsearchService
+
+
+async def detect_layout(es: AsyncElasticsearch, index_name: str) -> str:
+    """Deduce el layout de un índice existente a partir de su mapping."""
+    mappings = await es.indices.get_mapping(index=index_name)
+    properties = next(iter(mappings.values()))["mappings"].get("properties", {})
+    if properties.get("pages", {}).get("type") == "nested":
+        return NESTED_LAYOUT
+    if "page_number" in properties:
+        return PAGES_LAYOUT
+    raise ValueError(f"No se reconoce el layout del índice '{index_name}'")
+
+
+async def _scan(es: AsyncElasticsearch, index_name: str, sort: List, page_size: int) -> AsyncIterator[Dict]:
+    """Recorre el índice completo con point-in-time y search_after."""
+    pit = await es.open_point_in_time(index=index_name, keep_alive="5m")
+    pit_id = pit["id"]
+    search_after = None
+    try:
+        while True:
+            query = {
+                "size": page_size,
+                "query": {"match_all": {}},
+                "pit": {"id": pit_id, "keep_alive": "5m"},
+                "sort": sort
+            }
+            if search_after is not None:
+                query["search_after"] = search_after
+            response = await es.search(body=query)
+            pit_id = response.get("pit_id", pit_id)
+            hits = response["hits"]["hits"]
+            if not hits:
+                return
+            for hit in hits:
+                yield hit
+            search_after = hits[-1]["sort"]
+    finally:
+        try:
+            await es.close_point_in_time(body={"id": pit_id})
+        except Exception as e:
+            logging.warning(f"No se pudo cerrar el point-in-time: {str(e)}")
+
+
+async def iter_source_documents(
+    es: AsyncElasticsearch,
+    index_name: str,
+    layout: str,
+    page_size: int = 500
+) -> AsyncIterator[Tuple[str, Dict]]:
+    """
+    Devuelve cada PDF del índice origen como (ID, documento con páginas nested). Con el
+    layout por páginas se ordena por ruta y página y se unen las páginas consecutivas.
+    """
+    if layout == NESTED_LAYOUT:
+        async for hit in _scan(es, index_name, [{"_shard_doc": "asc"}], page_size):
+            yield hit["_id"], hit["_source"]
+        return
+
+    current_id: Optional[str] = None
+    pages: List[Dict] = []
+    sort = [{"relative_path": "asc"}, {"page_number": "asc"}]
+    async for hit in _scan(es, index_name, sort, page_size):
+        relative_path = hit["_source"]["relative_path"]
+        if relative_path != current_id and pages:
+            yield current_id, merge_pages(pages)
+            pages = []
+        current_id = relative_path
+        pages.append(hit["_source"])
+    if pages:
+        yield current_id, merge_pages(pages)
+
+
+async def migrate_index(
+    es: AsyncElasticsearch,
+    source: str,
+    target: str,
+    layout: str,
+    page_size: int = 500
+) -> Dict:
+    """
+    Copia todos los PDFs de `source` a `target` con el layout indicado.
+
+    Returns:
+        Dict: PDFs leídos, documentos escritos y errores
+    """
+    if await es.indices.exists(index=target):
+        raise ValueError(f"El índice destino '{target}' ya existe")
+
+    source_layout = await detect_layout(es, source)
+    target_service = PDFElasticsearchService(es_client=es, index_name=target, index_layout=layout)
+    await target_service.setup_index()
+    logging.info(f"Migrando '{source}' ({source_layout}) a '{target}' ({layout})")
+
+    stats = {
+        "source_layout": source_layout,
+        "target_layout": layout,
+        "pdfs": 0,
+        "documents": 0,
+        "failed": 0,
+        "errors": []
+    }
+
+    # Los resultados se cuentan a medida que se confirman, sin guardar un Future por documento
+    def on_item(doc_id: str, item: Dict):
+        if item["success"]:
+            stats["documents"] += 1
+        else:
+            stats["failed"] += 1
+            if len(stats["errors"]) < 20:
+                stats["errors"].append({"id": doc_id, "error": item.get("error")})
+
+    async with target_service.new_bulk_indexer(on_flush=None, on_item=on_item) as indexer:
+        async for doc_id, document in iter_source_documents(es, source, source_layout, page_size):
+            stats["pdfs"] += 1
+            for action_id, action in target_service.document_actions(doc_id, document):
+                await indexer.add(action_id, action)
+            if stats["pdfs"] % 1000 == 0:
+                logging.info(f"Migración: {stats['pdfs']} PDFs leídos")
+
+    await es.indices.refresh(index=target)
+    return stats
+
+
+async def _main(args: argparse.Namespace) -> Dict:
+    try:
+        return await migrate_index(get_es_client(), args.source, args.target, args.layout, args.page_size)
+    finally:
+        await close_es_client()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migra un índice de PDFs a otro layout")
+    parser.add_argument('--source', required=True, help="Índice origen")
+    parser.add_argument('--target', required=True, help="Índice destino (no debe existir)")
+    parser.add_argument('--layout', required=True, choices=INDEX_LAYOUTS, help="Layout del índice destino")
+    parser.add_argument('--page-size', type=int, default=500, help="Documentos leídos por petición")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    print(json.dumps(asyncio.run(_main(args)), indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
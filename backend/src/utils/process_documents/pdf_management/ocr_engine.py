@@ -0,0 +1,317 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+from pdf2image import convert_from_path, pdfinfo_from_path
+import pytesseract
+from pytesseract.pytesseract import file_to_dict, run_tesseract, save as save_tesseract_input
+from .searchable_pdf import text_layer_path
+
+
+@dataclass(frozen=True)
+class OCRProfile:
+    """
+    Parámetros de rasterizado y de Tesseract. `psm` es el modo de segmentación de página
+    (6 asume un único bloque de texto y se salta el análisis de maquetación) y `oem` el
+    motor (1 = solo LSTM).
+    """
+    name: str
+    dpi: int
+    grayscale: bool
+    psm: int
+    oem: int
+
+    @property
+    def tesseract_config(self) -> str:
+        return f"--oem {self.oem} --psm {self.psm}"
+
+
+OCR_PROFILES = {
+    'fast': OCRProfile('fast', dpi=150, grayscale=True, psm=6, oem=1),
+    'balanced': OCRProfile('balanced', dpi=200, grayscale=True, psm=3, oem=1),
+    'accurate': OCRProfile('accurate', dpi=300, grayscale=False, psm=3, oem=1),
+}
+
+DEFAULT_OCR_WORKERS = int(os.getenv('OCR_WORKERS', os.cpu_count() or 1))
+DEFAULT_OCR_WINDOW_SIZE = int(os.getenv('OCR_WINDOW_SIZE', DEFAULT_OCR_WORKERS * 2))
+DEFAULT_OCR_LANG = os.getenv('OCR_LANG', 'spa')
+DEFAULT_OCR_PROFILE = os.getenv('OCR_PROFILE', 'fast')
+# Perfil con el que se repite el OCR de las páginas de baja confianza; vacío para no repetir
+DEFAULT_OCR_RETRY_PROFILE = os.getenv('OCR_RETRY_PROFILE', 'accurate')
+# Confianza media por palabra (0-1) por debajo de la cual se repite el OCR
+DEFAULT_OCR_MIN_CONFIDENCE = float(os.getenv('OCR_MIN_CONFIDENCE', 0.75))
+
+# Pools de procesos compartidos por todas las instancias del motor, indexados por tamaño
+_executors: Dict[int, ProcessPoolExecutor] = {}
+# Los motores se crean desde los hilos de extracción; sin lock dos hilos podrían crear
+# cada uno su pool para el mismo tamaño y uno quedaría sin cerrar
+_executors_lock = threading.Lock()
+
+
+def _get_executor(max_workers: int) -> ProcessPoolExecutor:
+    with _executors_lock:
+        executor = _executors.get(max_workers)
+        if executor is None:
+            executor = ProcessPoolExecutor(max_workers=max_workers)
+            _executors[max_workers] = executor
+        return executor
+
+
+def shutdown_ocr_executors():
+    """
+    Cierra los pools de procesos de OCR creados por el motor.
+    """
+    with _executors_lock:
+        for executor in _executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        _executors.clear()
+
+
+def get_ocr_profile(name: str) -> OCRProfile:
+    profile = OCR_PROFILES.get(name.strip().lower())
+    if profile is None:
+        raise ValueError(f"Perfil de OCR desconocido: {name} (disponibles: {', '.join(OCR_PROFILES)})")
+    return profile
+
+
+def _words_to_text(data: Dict[str, List]) -> Tuple[str, Optional[float]]:
+    """
+    Reconstruye el texto a partir de la salida de image_to_data (una línea por línea de
+    Tesseract y una línea en blanco entre párrafos) y calcula la confianza media de las
+    palabras, en 0-1. Sin palabras reconocidas la confianza es None.
+    """
+    paragraphs: List[list] = []
+    lines: Dict[Tuple[int, int, int], List[str]] = {}
+    confidences: List[float] = []
+    for index, word in enumerate(data['text']):
+        word = word.strip()
+        confidence = float(data['conf'][index])
+        if not word or confidence < 0:
+            continue
+        confidences.append(confidence)
+        paragraph_key = (data['block_num'][index], data['par_num'][index])
+        line_key = paragraph_key + (data['line_num'][index],)
+        if line_key not in lines:
+            lines[line_key] = []
+            if not paragraphs or paragraphs[-1][0] != paragraph_key:
+                paragraphs.append([paragraph_key])
+            paragraphs[-1].append(line_key)
+        lines[line_key].append(word)
+
+    text = '\n\n'.join(
+        '\n'.join(' '.join(lines[line_key]) for line_key in paragraph[1:]) for paragraph in paragraphs
+    )
+    confidence = sum(confidences) / len(confidences) / 100 if confidences else None
+    return text, confidence
+
+
+def _render(pdf_path: str, page_number: int, profile: OCRProfile):
+    images = convert_from_path(
+        pdf_path,
+        dpi=profile.dpi,
+        grayscale=profile.grayscale,
+        first_page=page_number,
+        last_page=page_number
+    )
+    return images[0] if images else None
+
+
+def _recognize(
+    image,
+    profile: OCRProfile,
+    lang: str,
+    text_layer: bool = False
+) -> Tuple[str, Optional[float], Optional[bytes]]:
+    """
+    Reconoce la imagen con una sola ejecución de Tesseract. Con `text_layer` esa misma
+    ejecución genera también la página como PDF (la imagen con el texto en una capa
+    invisible) con los configfiles `tsv pdf`, en lugar de reconocer la página dos veces.
+    Se indica la resolución para que el PDF conserve el tamaño de la página.
+
+    Returns:
+        Tuple[str, Optional[float], Optional[bytes]]: Texto, confianza y PDF de la página
+            (None sin `text_layer`)
+    """
+    if not text_layer:
+        data = pytesseract.image_to_data(
+            image,
+            lang=lang,
+            config=profile.tesseract_config,
+            output_type=pytesseract.Output.DICT
+        )
+        return (*_words_to_text(data), None)
+
+    # run_and_get_multiple_output no admite config (psm, oem, dpi), así que se lanza
+    # Tesseract directamente con los dos configfiles de salida
+    with save_tesseract_input(image) as (output_base, input_filename):
+        run_tesseract(
+            input_filename,
+            output_base,
+            extension='',
+            lang=lang,
+            config=f"{profile.tesseract_config} --dpi {profile.dpi} tsv pdf"
+        )
+        with open(f"{output_base}.tsv", 'r', encoding='utf-8') as file:
+            tsv = file.read()
+        with open(f"{output_base}.pdf", 'rb') as file:
+            pdf_bytes = file.read()
+    return (*_words_to_text(file_to_dict(tsv, '\t', -1)), pdf_bytes)
+
+
+def _ocr_page(
+    pdf_path: str,
+    page_number: int,
+    profile: OCRProfile,
+    retry_profile: Optional[OCRProfile],
+    min_confidence: float,
+    lang: str,
+    text_layer_dir: Optional[str] = None
+) -> Tuple[int, str, Optional[float], str, float, float]:
+    """
+    Renderiza una única página y le aplica OCR. Se ejecuta en un proceso del pool,
+    por lo que solo la imagen de esta página vive en memoria. Si la confianza queda por
+    debajo de `min_confidence` o no se reconoció ninguna palabra, repite la página con
+    `retry_profile` y se queda con el resultado más fiable (el del reintento siempre que
+    reconozca palabras y la primera pasada no). Con `text_layer_dir` escribe además la página
+    como PDF con capa de texto, generado en la misma ejecución de Tesseract que el texto. Devuelve también los segundos de rasterizado y de OCR (sumando todas
+    las pasadas), que el proceso principal registra como métricas.
+    """
+    started = time.perf_counter()
+    image = _render(pdf_path, page_number, profile)
+    rasterize_seconds = time.perf_counter() - started
+    if image is None:
+        return page_number, '', None, profile.name, rasterize_seconds, 0.0
+
+    try:
+        started = time.perf_counter()
+        text, confidence, layer = _recognize(image, profile, lang, text_layer=bool(text_layer_dir))
+        ocr_seconds = time.perf_counter() - started
+        used_profile = profile
+
+        # Sin palabras reconocidas no hay confianza: son las páginas que más necesitan el
+        # perfil más preciso, así que también se repiten
+        needs_retry = confidence is None or not text.strip() or confidence < min_confidence
+        if retry_profile and needs_retry:
+            started = time.perf_counter()
+            retry_image = _render(pdf_path, page_number, retry_profile)
+            rasterize_seconds += time.perf_counter() - started
+            if retry_image is not None:
+                try:
+                    started = time.perf_counter()
+                    retry_text, retry_confidence, retry_layer = _recognize(
+                        retry_image, retry_profile, lang, text_layer=bool(text_layer_dir)
+                    )
+                    ocr_seconds += time.perf_counter() - started
+                finally:
+                    retry_image.close()
+                if retry_confidence is not None and (confidence is None or retry_confidence > confidence):
+                    text, confidence, layer, used_profile = retry_text, retry_confidence, retry_layer, retry_profile
+
+        if text_layer_dir and layer and text.strip():
+            with open(text_layer_path(text_layer_dir, page_number), 'wb') as file:
+                file.write(layer)
+
+        return page_number, text, confidence, used_profile.name, rasterize_seconds, ocr_seconds
+    finally:
+        image.close()
+
+
+class OCRStreamEngine:
+    """
+    Motor de OCR que procesa un PDF página a página sobre un pool de procesos.
+
+    Como máximo `window_size` páginas están en vuelo a la vez, de modo que la memoria
+    queda acotada por la ventana y no por el número de páginas del documento. Los
+    resultados se entregan siempre en el orden de las páginas.
+    """
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        window_size: Optional[int] = None,
+        lang: str = DEFAULT_OCR_LANG,
+        profile: str = DEFAULT_OCR_PROFILE,
+        retry_profile: Optional[str] = DEFAULT_OCR_RETRY_PROFILE,
+        min_confidence: float = DEFAULT_OCR_MIN_CONFIDENCE
+    ):
+        self.max_workers = max(1, max_workers or DEFAULT_OCR_WORKERS)
+        self.window_size = max(1, window_size or DEFAULT_OCR_WINDOW_SIZE)
+        self.lang = lang
+        self.profile = get_ocr_profile(profile)
+        self.retry_profile = get_ocr_profile(retry_profile) if retry_profile else None
+        if self.retry_profile == self.profile:
+            self.retry_profile = None
+        self.min_confidence = min_confidence
+
+    @property
+    def signature(self) -> str:
+        """Identifica la configuración que determina el texto reconocido (clave de caché)."""
+        retry = f">{self.retry_profile.name}@{self.min_confidence}" if self.retry_profile else ''
+        return f"{self.lang}-{self.profile.name}{retry}"
+
+    def get_page_count(self, pdf_path: str) -> int:
+        """
+        Obtiene el número de páginas sin renderizar el documento.
+
+        Args:
+            pdf_path (str): Ruta al archivo PDF
+
+        Returns:
+            int: Número de páginas
+        """
+        return int(pdfinfo_from_path(pdf_path)['Pages'])
+
+    def iter_pages(
+        self,
+        pdf_path: str,
+        page_numbers: Optional[Iterable[int]] = None,
+        timings: Optional[Dict[str, List[float]]] = None,
+        text_layer_dir: Optional[str] = None
+    ) -> Iterator[Tuple[int, str, Optional[float], str]]:
+        """
+        Aplica OCR a las páginas indicadas y las devuelve en orden a medida que terminan.
+
+        Args:
+            pdf_path (str): Ruta al archivo PDF
+            page_numbers (Optional[Iterable[int]]): Páginas (base 1) a procesar; todas si es None
+            timings (Optional[Dict]): Si se indica, recibe en 'rasterize' y 'ocr' los segundos
+                de cada página
+            text_layer_dir (Optional[str]): Si se indica, cada página con texto se escribe
+                ahí como `<página>.pdf` con una capa de texto invisible
+
+        Yields:
+            Tuple[int, str, Optional[float], str]: Número de página, texto reconocido,
+                confianza media por palabra (0-1) y perfil que produjo el texto
+        """
+        if page_numbers is None:
+            page_numbers = range(1, self.get_page_count(pdf_path) + 1)
+
+        executor = _get_executor(self.max_workers)
+        pending: Deque[Future] = deque()
+
+        def collect(future: Future) -> Tuple[int, str, Optional[float], str]:
+            page_number, text, confidence, profile, rasterize_seconds, ocr_seconds = future.result()
+            if timings is not None:
+                timings.setdefault('rasterize', []).append(rasterize_seconds)
+                timings.setdefault('ocr', []).append(ocr_seconds)
+            return page_number, text, confidence, profile
+
+        try:
+            for page_number in page_numbers:
+                pending.append(executor.submit(
+                    _ocr_page, pdf_path, page_number, self.profile, self.retry_profile,
+                    self.min_confidence, self.lang, text_layer_dir
+                ))
+                if len(pending) >= self.window_size:
+                    yield collect(pending.popleft())
+
+            while pending:
+                yield collect(pending.popleft())
+        finally:
+            for future in pending:
+                future.cancel()
+            if pending:
+                logging.warning(f"OCR interrumpido en {pdf_path}: {len(pending)} páginas canceladas")
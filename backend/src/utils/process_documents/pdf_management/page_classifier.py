@@ -0,0 +1,150 @@
+import os
+import re
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from PyPDF2 import PdfReader
+
+# Fracción de la página cubierta por una imagen a partir de la cual se considera escaneada
+IMAGE_COVERAGE_THRESHOLD = float(os.getenv('SCAN_IMAGE_COVERAGE', 0.8))
+# Una página escaneada con menos operadores de texto (p. ej. solo un sello) necesita OCR
+MIN_TEXT_OPERATORS = int(os.getenv('SCAN_MIN_TEXT_OPERATORS', 3))
+CLASSIFIER_CACHE_SIZE = int(os.getenv('SCAN_CLASSIFIER_CACHE_SIZE', 1024))
+
+_TEXT_OPERATOR = re.compile(rb"(?:\)|\]|>)\s*(?:Tj|TJ|'|\")")
+_NUMBER = rb"(-?\d*\.?\d+)"
+_IMAGE_DRAW = re.compile(
+    rb"\s+".join([_NUMBER] * 6) + rb"\s+cm\s*(?:[^/]{0,64}?)/([^\s/]+)\s+Do"
+)
+
+
+def _resolve(value):
+    return value.get_object() if value is not None and hasattr(value, 'get_object') else value
+
+
+class ScannedPageClassifier:
+    """
+    Decide por página si hace falta OCR inspeccionando solo la estructura del PDF, sin
+    extraer texto ni renderizar.
+
+    - Sin fuentes en los recursos de la página: necesita OCR (escaneo o página vectorial).
+    - Con fuentes y sin imágenes: página de texto.
+    - Con fuentes e imágenes: se leen el content stream y los de los Form XObjects y se
+      necesita OCR si no hay operadores de texto, o si hay muy pocos y una imagen cubre
+      casi toda la página.
+
+    Los resultados se guardan en memoria por (ruta, tamaño, mtime), así que reclasificar
+    un archivo sin cambios no vuelve a abrirlo.
+    """
+    def __init__(
+        self,
+        coverage_threshold: float = IMAGE_COVERAGE_THRESHOLD,
+        min_text_operators: int = MIN_TEXT_OPERATORS,
+        cache_size: int = CLASSIFIER_CACHE_SIZE
+    ):
+        self.coverage_threshold = coverage_threshold
+        self.min_text_operators = min_text_operators
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, int, int], Dict[int, bool]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def classify(self, pdf_path: str) -> Dict[int, bool]:
+        """
+        Args:
+            pdf_path (str): Ruta al archivo PDF
+
+        Returns:
+            Dict[int, bool]: Número de página (base 1) -> True si necesita OCR
+        """
+        stat = os.stat(pdf_path)
+        key = (os.path.abspath(pdf_path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return dict(cached)
+
+        reader = PdfReader(pdf_path)
+        result = {
+            page_num: self._needs_ocr(page)
+            for page_num, page in enumerate(reader.pages, 1)
+        }
+
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return dict(result)
+
+    def _scan_resources(self, resources, depth: int = 0) -> Tuple[bool, Dict[str, object], int]:
+        """
+        Devuelve si hay fuentes, las imágenes por nombre y los operadores de texto de los
+        Form XObjects, entrando en ellos hasta dos niveles.
+        """
+        resources = _resolve(resources) or {}
+        has_fonts = bool(_resolve(resources.get('/Font')))
+        images = {}
+        form_text_operators = 0
+        xobjects = _resolve(resources.get('/XObject')) or {}
+        for name, xobject in xobjects.items():
+            xobject = _resolve(xobject)
+            subtype = xobject.get('/Subtype')
+            if subtype == '/Image':
+                images[name.lstrip('/')] = xobject
+            elif subtype == '/Form' and depth < 2:
+                form_fonts, form_images, nested_operators = self._scan_resources(
+                    xobject.get('/Resources'), depth + 1
+                )
+                has_fonts = has_fonts or form_fonts
+                # El texto de páginas estampadas o fusionadas suele estar dentro de un formulario
+                form_text_operators += nested_operators + len(_TEXT_OPERATOR.findall(xobject.get_data()))
+                # Una imagen dentro de un formulario se trata como si cubriera el formulario
+                if form_images:
+                    images[name.lstrip('/')] = xobject
+        return has_fonts, images, form_text_operators
+
+    def _needs_ocr(self, page) -> bool:
+        try:
+            has_fonts, images, form_text_operators = self._scan_resources(page.get('/Resources'))
+            if not has_fonts:
+                return True
+            if not images:
+                return False
+
+            contents = page.get_contents()
+            data = contents.get_data() if contents is not None else b''
+            text_operators = len(_TEXT_OPERATOR.findall(data)) + form_text_operators
+            if text_operators == 0:
+                return True
+            if text_operators >= self.min_text_operators:
+                return False
+            return self._image_coverage(page, data, images) >= self.coverage_threshold
+        except Exception as e:
+            # Ante la duda se decide por la extracción de texto, como antes del clasificador
+            logging.warning(f"No se pudo clasificar una página: {str(e)}")
+            return False
+
+    def _image_coverage(self, page, data: bytes, images: Dict[str, object]) -> float:
+        page_area = float(page.mediabox.width) * float(page.mediabox.height)
+        if page_area <= 0:
+            return 0.0
+        coverage = 0.0
+        for match in _IMAGE_DRAW.finditer(data):
+            name = match.group(7).decode('latin-1')
+            if name not in images:
+                continue
+            a, b, c, d = (float(value) for value in match.groups()[:4])
+            coverage = max(coverage, abs(a * d - b * c) / page_area)
+        return min(coverage, 1.0)
+
+
+_default_classifier: Optional[ScannedPageClassifier] = None
+
+
+def get_page_classifier() -> ScannedPageClassifier:
+    """Clasificador compartido por proceso, para que su caché sirva a todos los PDFManager."""
+    global _default_classifier
+    if _default_classifier is None:
+        _default_classifier = ScannedPageClassifier()
+    return _default_classifier
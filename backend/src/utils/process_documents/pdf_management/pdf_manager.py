@@ -1,23 +1,58 @@
 import os
+import time
 import logging
+import tempfile
 from datetime import datetime
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from .text_process_pdf import TextPDFProcessor
+from .text_backends import TextExtractionChain
 from .image_process_pdf import ImagePDFProcessor
+from .page_classifier import ScannedPageClassifier, get_page_classifier
+from .searchable_pdf import OUTPUT_DIRNAME, SEARCHABLE_PDF_ENABLED, SearchablePDFStore
+from .extraction_cache import CACHE_ENABLED, ExtractionCache, hash_file
+from ..word_management.docx_text import DocxTextExtractor
+
+# Incrementar cuando cambie el resultado de la extracción para invalidar la caché
+EXTRACTOR_VERSION = "3"
 
 class PDFManager:
     """
     Clase principal que coordina el procesamiento de PDFs, delegando a los procesadores específicos.
     """
-    def __init__(self, root_directory: str, max_workers: int = 4):
+    def __init__(
+        self,
+        root_directory: str,
+        max_workers: int = 4,
+        cache: Optional[ExtractionCache] = None,
+        page_classifier: Optional[ScannedPageClassifier] = None,
+        searchable_pdfs: bool = SEARCHABLE_PDF_ENABLED
+    ):
         self.root_directory = root_directory
-        self.output_directory = os.path.join(root_directory, "corregidos")
-        self.text_processor = TextPDFProcessor()
+        self.output_directory = os.path.join(root_directory, OUTPUT_DIRNAME)
+        # Un proceso de extracción aislada como mucho por hilo de extracción
+        self.text_processor = TextPDFProcessor(TextExtractionChain(workers=max_workers))
         self.image_processor = ImagePDFProcessor()
+        self.docx_extractor = DocxTextExtractor()
+        self.page_classifier = page_classifier or get_page_classifier()
         self.max_workers = max_workers
+        if cache is None and CACHE_ENABLED:
+            ocr_engine = self.image_processor.ocr_engine
+            text_backends = '+'.join(self.text_processor.extraction_chain.names)
+            cache = ExtractionCache(
+                extractor_version=f"{EXTRACTOR_VERSION}-{text_backends}-{ocr_engine.signature}"
+            )
+        self.cache = cache
         self.setup_logging()
         self.ensure_output_directory()
+        # PDFs buscables con la capa de texto del OCR en output_directory (ver SearchablePDFStore)
+        self.searchable_store = (
+            SearchablePDFStore(root_directory, self.output_directory) if searchable_pdfs else None
+        )
+
+    def close(self):
+        """Detiene los procesos de extracción de texto de este gestor."""
+        self.text_processor.extraction_chain.close()
 
     def setup_logging(self):
         logging.basicConfig(
@@ -33,7 +68,9 @@ class PDFManager:
 
     def get_pdf_files(self) -> List[str]:
         pdf_files = []
-        for root, _, files in os.walk(self.root_directory):
+        for root, dirs, files in os.walk(self.root_directory):
+            if root == self.root_directory and OUTPUT_DIRNAME in dirs:
+                dirs.remove(OUTPUT_DIRNAME)
             for file in files:
                 if file.lower().endswith('.pdf'):
                     pdf_files.append(os.path.join(root, file))
@@ -55,6 +92,7 @@ class PDFManager:
     def process_pdf(self, pdf_path: str) -> Dict:
         """
         Procesa un PDF, determinando si es texto o imagen y usando el procesador apropiado.
+        Los documentos .docx se extraen directamente del XML, sin pasar por PDF.
         
         Args:
             pdf_path (str): Ruta al archivo PDF
@@ -63,13 +101,33 @@ class PDFManager:
             Dict: Diccionario con toda la información extraída
         """
         try:
-            # Intentar primero con el procesador de texto
-            info = self.text_processor.extract_text_from_pdf(pdf_path)
-            
-            # Si no se encontró texto en ninguna página, usar el procesador de imágenes
-            if all(not page_info['texto'].strip() for page_info in info['pages'].values()):
-                info = self.image_processor.extract_text_from_image_pdf(pdf_path)
+            started = time.perf_counter()
+            content_hash = hash_file(pdf_path)
+            hash_seconds = time.perf_counter() - started
+            if self.cache:
+                cached = self.cache.get(content_hash)
+                if cached is not None:
+                    cached['ruta_archivo'] = os.path.abspath(pdf_path)
+                    cached['from_cache'] = True
+                    cached['timings'] = {'hash': hash_seconds}
+                    logging.info(f"Extracción recuperada de caché: {pdf_path}")
+                    return cached
 
+            if pdf_path.lower().endswith('.docx'):
+                extract_started = time.perf_counter()
+                info = self.docx_extractor.extract_text_from_docx(pdf_path)
+                info['timings'] = {'docx_extraction': time.perf_counter() - extract_started}
+            else:
+                info = self._process_hybrid(pdf_path, content_hash)
+
+            # Los tiempos describen esta ejecución y no se guardan en la caché
+            timings = info.pop('timings', {})
+            timings['hash'] = hash_seconds
+            info['content_hash'] = content_hash
+            if self.cache:
+                self.cache.put(content_hash, info)
+
+            info['timings'] = timings
             return info
 
         except Exception as e:
@@ -77,6 +135,133 @@ class PDFManager:
             logging.error(error_msg)
             return {'error': error_msg}
 
+    def _run_ocr(self, pdf_path: str, content_hash: str, page_numbers: Optional[List[int]] = None) -> Dict:
+        """
+        Aplica OCR a las páginas indicadas y, si los PDFs buscables están activos, guarda
+        el documento con la capa de texto en output_directory. Un fallo al escribirlo no
+        afecta al resultado del OCR.
+        """
+        if self.searchable_store is None:
+            return self.image_processor.extract_text_from_image_pdf(pdf_path, page_numbers)
+
+        with tempfile.TemporaryDirectory(prefix='text_layer_') as text_layer_dir:
+            ocr_info = self.image_processor.extract_text_from_image_pdf(pdf_path, page_numbers, text_layer_dir)
+            if 'error' in ocr_info or not os.listdir(text_layer_dir):
+                return ocr_info
+
+            started = time.perf_counter()
+            try:
+                ocr_info['document_info']['pdf_buscable'] = self.searchable_store.save(
+                    pdf_path, content_hash, text_layer_dir, ocr_info['pages'],
+                    self._generate_output_filename(pdf_path)
+                )
+            except Exception as e:
+                logging.error(f"No se pudo generar el PDF buscable de {pdf_path}: {str(e)}")
+            ocr_info['timings']['searchable_pdf'] = time.perf_counter() - started
+        return ocr_info
+
+    def _process_searchable(self, pdf_path: str, entry: Dict) -> Optional[Dict]:
+        """
+        Extrae el texto del PDF buscable generado en una ejecución anterior en lugar de
+        repetir el OCR. Las páginas que tuvieron OCR conservan su confianza y su perfil.
+        """
+        started = time.perf_counter()
+        info = self.text_processor.extract_text_from_pdf(entry['output'])
+        if 'error' in info or not info['pages']:
+            return None
+
+        for page_num, page_info in info['pages'].items():
+            ocr_page = entry['pages'].get(page_num)
+            page_info['is_image'] = ocr_page is not None
+            page_info['confidence'] = ocr_page['confidence'] if ocr_page else 1.0
+            if ocr_page and ocr_page.get('ocr_profile'):
+                page_info['ocr_profile'] = ocr_page['ocr_profile']
+
+        info['ruta_archivo'] = os.path.abspath(pdf_path)
+        info['document_info']['tamano_archivo'] = os.path.getsize(pdf_path)
+        info['document_info']['paginas_ocr'] = len(entry['pages'])
+        info['document_info']['pdf_buscable'] = os.path.relpath(entry['output'], self.root_directory)
+        info['timings'] = {'searchable_pdf_text': time.perf_counter() - started}
+        logging.info(f"Texto recuperado del PDF buscable {entry['output']}: {pdf_path}")
+        return info
+
+    def _process_hybrid(self, pdf_path: str, content_hash: str) -> Dict:
+        """
+        Enruta cada página por separado. El clasificador decide desde la estructura del PDF
+        qué páginas son escaneadas; si lo son todas, se pasa directamente a OCR sin extraer
+        texto. En otro caso se extrae el texto y se rasterizan solo las páginas escaneadas
+        o las que quedaron sin texto. Si ya existe un PDF buscable del mismo contenido, se
+        lee su capa de texto y no se repite el OCR.
+        """
+        if self.searchable_store is not None:
+            entry = self.searchable_store.lookup(pdf_path, content_hash)
+            if entry is not None:
+                info = self._process_searchable(pdf_path, entry)
+                if info is not None:
+                    return info
+
+        started = time.perf_counter()
+        try:
+            needs_ocr = self.page_classifier.classify(pdf_path)
+        except Exception as e:
+            # Sin clasificación se decide solo por el texto extraído, como antes
+            logging.warning(f"No se pudo clasificar {pdf_path}: {str(e)}")
+            needs_ocr = {}
+        classify_seconds = time.perf_counter() - started
+        scanned_pages = [page_num for page_num, scanned in needs_ocr.items() if scanned]
+
+        if scanned_pages and len(scanned_pages) == len(needs_ocr):
+            ocr_info = self._run_ocr(pdf_path, content_hash, scanned_pages)
+            ocr_info.setdefault('timings', {})['classify'] = classify_seconds
+            if 'error' not in ocr_info:
+                ocr_info['metadata'] = self.text_processor.extract_metadata(pdf_path)
+                ocr_info['document_info']['paginas_ocr'] = len(scanned_pages)
+            return ocr_info
+
+        # Intentar primero con el procesador de texto
+        started = time.perf_counter()
+        info = self.text_processor.extract_text_from_pdf(pdf_path)
+        text_seconds = time.perf_counter() - started
+
+        # Si el PDF no se pudo leer como texto, aplicar OCR a todo el documento
+        if 'error' in info or not info['pages']:
+            ocr_info = self._run_ocr(pdf_path, content_hash)
+            ocr_info.setdefault('timings', {}).update(classify=classify_seconds, text_extraction=text_seconds)
+            return ocr_info
+
+        info['timings'] = {'classify': classify_seconds, 'text_extraction': text_seconds}
+
+        image_pages = []
+        for page_num, page_info in info['pages'].items():
+            if page_info['texto'].strip() and not needs_ocr.get(page_num):
+                page_info['is_image'] = False
+                page_info['confidence'] = 1.0
+            else:
+                image_pages.append(page_num)
+
+        if image_pages:
+            ocr_info = self._run_ocr(pdf_path, content_hash, image_pages)
+            if 'error' in ocr_info:
+                if len(image_pages) == len(info['pages']):
+                    return ocr_info
+                # Documento mixto: se conservan las páginas con texto
+                logging.warning(f"OCR fallido en {len(image_pages)} páginas de {pdf_path}: {ocr_info['error']}")
+                for page_num in image_pages:
+                    page_info = info['pages'][page_num]
+                    page_info['is_image'] = False
+                    page_info['confidence'] = 1.0 if page_info['texto'].strip() else None
+            else:
+                info['timings'].update(ocr_info.get('timings', {}))
+                info['pages'].update(ocr_info['pages'])
+                if 'pdf_buscable' in ocr_info['document_info']:
+                    info['document_info']['pdf_buscable'] = ocr_info['document_info']['pdf_buscable']
+                info['texto_completo'] = '\n\n'.join(
+                    info['pages'][page_num]['texto'] for page_num in sorted(info['pages'])
+                )
+
+        info['document_info']['paginas_ocr'] = len(image_pages)
+        return info
+
     def process_single_pdf(self, pdf_path: str) -> Tuple[str, Dict]:
         """
         Procesa un único PDF y retorna el resultado.
@@ -0,0 +1,225 @@
+import os
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from PyPDF2 import PdfReader, PdfWriter
+
+try:
+    import fcntl
+except ImportError:  # Sin flock (Windows) el manifiesto no se compacta
+    fcntl = None
+
+SEARCHABLE_PDF_ENABLED = os.getenv('SEARCHABLE_PDF_ENABLED', 'false').lower() == 'true'
+# Subdirectorio de la raíz donde se escriben los PDFs buscables; no se indexa ni se vigila
+OUTPUT_DIRNAME = 'corregidos'
+MANIFEST_NAME = 'manifest.jsonl'
+
+
+def in_output_directory(path, root_directory) -> bool:
+    """
+    Indica si `path` está dentro del directorio de salida de `root_directory`.
+    """
+    try:
+        parts = Path(path).resolve().relative_to(Path(root_directory).resolve()).parts
+    except ValueError:
+        return False
+    return bool(parts) and parts[0] == OUTPUT_DIRNAME
+
+
+def text_layer_path(text_layer_dir: str, page_number: int) -> str:
+    """Ruta del PDF de una página con capa de texto que escribe el motor de OCR."""
+    return os.path.join(text_layer_dir, f"{page_number}.pdf")
+
+
+class SearchablePDFStore:
+    """
+    Guarda versiones buscables de los PDFs escaneados: cada página con OCR se sustituye
+    por la que genera Tesseract (la imagen con una capa de texto invisible) y el resto se
+    copian del original.
+
+    La imagen de cada página es el rasterizado del perfil de OCR que dio el texto, no el
+    escaneo original: con el perfil por defecto ('fast', 150 DPI en grises) la copia se ve
+    peor que el original. Si la copia se va a usar como archivo, conviene
+    OCR_PROFILE=accurate (300 DPI en color) a costa de un OCR más lento.
+
+    La correspondencia con el original se registra en `corregidos/manifest.jsonl`, una
+    línea JSON por PDF generado con la ruta relativa del original, su hash y la confianza
+    de cada página. Cada línea se añade con una sola escritura O_APPEND, así que varios
+    procesos pueden compartirlo, y al leerlo gana la última línea de cada original.
+    Cuando las líneas obsoletas superan a las vigentes, la lectura reescribe el manifiesto
+    solo con las vigentes; un flock sobre `manifest.jsonl.lock` evita que se pierdan las
+    líneas que otros procesos añadan mientras tanto.
+    """
+    def __init__(self, root_directory: str, output_directory: str):
+        self.root_directory = root_directory
+        self.output_directory = output_directory
+        self.manifest_path = os.path.join(output_directory, MANIFEST_NAME)
+        self.lock_path = f"{self.manifest_path}.lock"
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+        self._manifest_signature: Optional[Tuple[int, int]] = None
+
+    def _relative(self, path: str) -> str:
+        return os.path.relpath(os.path.abspath(path), os.path.abspath(self.root_directory))
+
+    @contextmanager
+    def _manifest_lock(self, operation: int):
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, operation)
+            yield
+        finally:
+            # Cerrar el descriptor libera el flock
+            os.close(fd)
+
+    def _read_manifest(self) -> Tuple[Dict[str, Dict], int]:
+        """Entradas vigentes del manifiesto y número de líneas leídas."""
+        entries = {}
+        lines = 0
+        with open(self.manifest_path, 'r', encoding='utf-8') as file:
+            for line in file:
+                lines += 1
+                try:
+                    entry = json.loads(line)
+                    entries[entry['source']] = entry
+                except (ValueError, KeyError):
+                    logging.warning(f"Línea inválida en {self.manifest_path}")
+        return entries, lines
+
+    def _compact(self) -> Dict[str, Dict]:
+        """Reescribe el manifiesto con una línea por original, sin bloquear al resto de lectores."""
+        with self._manifest_lock(fcntl.LOCK_EX):
+            # Relee bajo el lock: otro proceso pudo añadir líneas o compactarlo ya
+            entries, lines = self._read_manifest()
+            if lines > len(entries):
+                temp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+                with open(temp_path, 'w', encoding='utf-8') as file:
+                    for entry in entries.values():
+                        file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                os.replace(temp_path, self.manifest_path)
+                logging.info(f"Manifiesto {self.manifest_path} compactado: {lines} -> {len(entries)} líneas")
+        return entries
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            stat = os.stat(self.manifest_path)
+        except FileNotFoundError:
+            return {}
+        signature = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            if signature == self._manifest_signature:
+                return self._entries
+
+            entries, lines = self._read_manifest()
+            if fcntl is not None and lines - len(entries) > len(entries):
+                entries = self._compact()
+                stat = os.stat(self.manifest_path)
+                signature = (stat.st_size, stat.st_mtime_ns)
+            self._entries = entries
+            self._manifest_signature = signature
+            return entries
+
+    def _append(self, entry: Dict):
+        """Añade una línea al manifiesto con una única escritura O_APPEND."""
+        data = (json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8')
+        if fcntl is None:
+            self._write_line(data)
+            return
+        # Compartido entre escritores; solo excluye a una compactación en curso, y el
+        # manifiesto se abre dentro del lock para no escribir en uno ya sustituido
+        with self._manifest_lock(fcntl.LOCK_SH):
+            self._write_line(data)
+
+    def _write_line(self, data: bytes):
+        fd = os.open(self.manifest_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+
+    def lookup(self, pdf_path: str, content_hash: str) -> Optional[Dict]:
+        """
+        Devuelve la entrada del manifiesto si existe un PDF buscable del contenido actual.
+
+        Returns:
+            Optional[Dict]: Entrada con 'output' (ruta absoluta) y 'pages' (número de página
+                -> confianza y perfil de OCR), o None
+        """
+        entry = self._load().get(self._relative(pdf_path))
+        if entry is None or entry.get('content_hash') != content_hash:
+            return None
+        output_path = os.path.join(self.root_directory, entry['output'])
+        if not os.path.exists(output_path):
+            return None
+        return {
+            **entry,
+            'output': output_path,
+            'pages': {int(page_num): page for page_num, page in entry.get('pages', {}).items()}
+        }
+
+    def save(
+        self,
+        pdf_path: str,
+        content_hash: str,
+        text_layer_dir: str,
+        pages: Dict[int, Dict],
+        output_path: str
+    ) -> str:
+        """
+        Compone el PDF buscable a partir del original y las páginas de `text_layer_dir`,
+        y lo registra en el manifiesto. Sustituye el PDF generado anteriormente para el
+        mismo original.
+
+        Args:
+            pdf_path (str): PDF original
+            content_hash (str): Hash del contenido del original
+            text_layer_dir (str): Directorio con un PDF por página con OCR
+            pages (Dict[int, Dict]): Información de las páginas con OCR (confianza y perfil)
+            output_path (str): Ruta del PDF buscable a escribir
+
+        Returns:
+            str: Ruta del PDF buscable relativa a la raíz
+        """
+        reader = PdfReader(pdf_path)
+        writer = PdfWriter()
+        layered = {}
+        for page_num, page in enumerate(reader.pages, 1):
+            layer_path = text_layer_path(text_layer_dir, page_num)
+            if os.path.exists(layer_path):
+                writer.add_page(PdfReader(layer_path).pages[0])
+                layered[str(page_num)] = {
+                    'confidence': pages.get(page_num, {}).get('confidence'),
+                    'ocr_profile': pages.get(page_num, {}).get('ocr_profile')
+                }
+            else:
+                writer.add_page(page)
+        if reader.metadata:
+            writer.add_metadata(reader.metadata)
+
+        temp_path = f"{output_path}.tmp"
+        with open(temp_path, 'wb') as file:
+            writer.write(file)
+        os.replace(temp_path, output_path)
+
+        source = self._relative(pdf_path)
+        previous = self._load().get(source)
+        entry = {
+            'source': source,
+            'output': self._relative(output_path),
+            'content_hash': content_hash,
+            'pages': layered,
+            'created': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+        self._append(entry)
+
+        if previous and previous['output'] != entry['output']:
+            previous_path = os.path.join(self.root_directory, previous['output'])
+            if in_output_directory(previous_path, self.root_directory):
+                Path(previous_path).unlink(missing_ok=True)
+
+        logging.info(f"PDF buscable generado: {output_path} ({len(layered)} páginas con OCR)")
+        return entry['output']
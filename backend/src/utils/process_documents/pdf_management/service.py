@@ -1,27 +1,79 @@
 from elasticsearch import AsyncElasticsearch  # Cambiamos la importación
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import asyncio
 import logging
 from datetime import datetime
 import os
 from pathlib import Path
 from .pdf_manager import PDFManager
-from concurrent.futures import ThreadPoolExecutor
+from .bulk_indexer import BulkIndexer
+from .extraction_cache import CACHE_ENABLED
+from .searchable_pdf import OUTPUT_DIRNAME, in_output_directory
+from .index_layout import (
+    DEFAULT_INDEX_LAYOUT, PAGES_LAYOUT, index_body, merge_pages, split_document, validate_layout
+)
+from ...es_client import create_es_client, get_es_client
+from ...metrics import (
+    CACHE_REQUESTS, ES_REQUEST_SECONDS, INGEST_FILES, INGEST_IN_FLIGHT, INGEST_QUEUE_DEPTH,
+    INGEST_STAGE_SECONDS, observe, record_es_error, record_extraction
+)
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+DEFAULT_INGEST_EXECUTOR = os.getenv('INGEST_EXECUTOR', 'thread')
+DEFAULT_INGEST_MAX_IN_FLIGHT = int(os.getenv('INGEST_MAX_IN_FLIGHT', 0))
+
+# PDFManager por proceso cuando la extracción corre en un ProcessPoolExecutor
+_worker_managers: Dict[str, PDFManager] = {}
+
+
+def _extract_pdf_in_worker(root_directory: str, pdf_path: str) -> Dict:
+    """
+    Extrae un PDF dentro de un proceso del pool, reutilizando un PDFManager por raíz.
+    """
+    manager = _worker_managers.get(root_directory)
+    if manager is None:
+        manager = PDFManager(root_directory)
+        _worker_managers[root_directory] = manager
+    return manager.process_pdf(pdf_path)
+
 
 class PDFElasticsearchService:
     def __init__(
         self, 
-        es_host: str = 'localhost',
-        es_port: int = 9200,
+        es_host: Optional[str] = None,
+        es_port: Optional[int] = None,
         index_name: str = 'pdfs',
         root_directory: str = None,
-        max_workers: int = 4
+        max_workers: int = 4,
+        executor_type: str = DEFAULT_INGEST_EXECUTOR,
+        max_in_flight: int = DEFAULT_INGEST_MAX_IN_FLIGHT,
+        include_docx: bool = False,
+        es_client: Optional[AsyncElasticsearch] = None,
+        index_layout: str = DEFAULT_INDEX_LAYOUT
     ):
-        # Usamos AsyncElasticsearch en lugar de Elasticsearch
-        self.es = AsyncElasticsearch([{'host': es_host, 'port': es_port, 'scheme': 'http'}])
+        # Por defecto se usa el cliente compartido de la aplicación; solo un host o puerto
+        # explícito crea un cliente propio, que el servicio cierra en close()
+        self._owns_client = es_client is None and (es_host is not None or es_port is not None)
+        if self._owns_client:
+            self.es = create_es_client(host=es_host or 'localhost', port=es_port or 9200)
+        else:
+            self.es = es_client or get_es_client()
         self.index_name = index_name
+        # Un documento por PDF ('nested') o uno por página ('pages'), ver index_layout
+        self.index_layout = validate_layout(index_layout)
         self.root_directory = root_directory
         self.pdf_manager = PDFManager(root_directory, max_workers) if root_directory else None
         self.max_workers = max_workers
+        if executor_type not in ('thread', 'process'):
+            raise ValueError(f"Tipo de executor no soportado: {executor_type}")
+        self.executor_type = executor_type
+        # Archivos en vuelo a la vez durante la ingesta; por defecto uno por worker
+        self.max_in_flight = max_in_flight or max_workers
+        self._executor: Optional[Executor] = None
+        # Con include_docx los .docx se indexan directamente junto a los PDFs
+        self.supported_suffixes = ('.pdf', '.docx') if include_docx else ('.pdf',)
+        # Callbacks que se invocan cuando la ingesta modifica el índice (p. ej. invalidar cachés)
+        self._index_listeners: List[Callable[[], None]] = []
         self.setup_logging()
 
     async def __aenter__(self):
@@ -31,7 +83,35 @@ class PDFElasticsearchService:
         await self.close()
 
     async def close(self):
-        await self.es.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self.pdf_manager is not None:
+            self.pdf_manager.close()
+        if self._owns_client:
+            await self.es.close()
+
+    def add_index_listener(self, listener: Callable[[], None]):
+        """Registra un callback que se invoca cada vez que este servicio modifica el índice."""
+        self._index_listeners.append(listener)
+
+    def notify_index_changed(self):
+        for listener in self._index_listeners:
+            try:
+                listener()
+            except Exception as e:
+                logging.error(f"Error notificando cambios del índice: {str(e)}")
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == 'process':
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='pdf_extract'
+                )
+        return self._executor
 
     def setup_logging(self):
         logging.basicConfig(
@@ -44,78 +124,58 @@ class PDFElasticsearchService:
         try:
             exists = await self.es.indices.exists(index=self.index_name)
             if not exists:
-                mapping = {
-                    "settings": {
-                        "number_of_shards": 1,
-                        "number_of_replicas": 1,
-                        "analysis": {
-                            "analyzer": {
-                                "pdf_analyzer": {
-                                    "type": "custom",
-                                    "tokenizer": "standard",
-                                    "filter": ["lowercase", "asciifolding"]
-                                }
-                            }
-                        }
-                    },
-                    "mappings": {
-                        "properties": {
-                            "filename": {"type": "keyword"},
-                            "file_path": {"type": "keyword"},
-                            "relative_path": {"type": "keyword"},
-                            "pages": {
-                                "type": "nested",  # Aseguramos que sea de tipo nested
-                                "properties": {
-                                    "number": {"type": "integer"},
-                                    "content": {
-                                        "type": "text",
-                                        "analyzer": "pdf_analyzer"
-                                    },
-                                    "is_image": {"type": "boolean"},
-                                    "confidence": {"type": "float"}
-                                }
-                            },
-                            "total_pages": {"type": "integer"},
-                            "metadata": {
-                                "properties": {
-                                    "autor": {"type": "text"},
-                                    "titulo": {"type": "text"},
-                                    "fecha_creacion": {
-                                        "type": "date",
-                                        "format": "yyyy-MM-dd HH:mm:ss||yyyy-MM-dd||epoch_millis"
-                                    }
-                                }
-                            },
-                            "document_info": {
-                                "properties": {
-                                    "tamano_archivo": {"type": "long"},
-                                    "fecha_procesamiento": {
-                                        "type": "date",
-                                        "format": "yyyy-MM-dd HH:mm:ss"
-                                    },
-                                    "tipo_procesamiento": {"type": "keyword"}
-                                }
-                            },
-                            "indexed_date": {
-                                "type": "date",
-                                "format": "yyyy-MM-dd HH:mm:ss"
-                            }
-                        }
-                    }
-                }
+                mapping = index_body(self.index_layout)
                 await self.es.indices.create(index=self.index_name, body=mapping)
-                logging.info(f"Índice '{self.index_name}' creado con éxito")
+                logging.info(f"Índice '{self.index_name}' creado con éxito (layout {self.index_layout})")
         except Exception as e:
             logging.error(f"Error al crear el índice: {str(e)}")
             raise
 
+    def with_index(self, index_name: str) -> "PDFElasticsearchService":
+        """
+        Servicio con la misma configuración (cliente, raíz, workers y layout) que escribe
+        en otro índice. No hereda los listeners: escribir en un índice que aún no se
+        consulta no debe invalidar las cachés de búsqueda.
+        """
+        return PDFElasticsearchService(
+            index_name=index_name,
+            root_directory=self.root_directory,
+            max_workers=self.max_workers,
+            executor_type=self.executor_type,
+            max_in_flight=self.max_in_flight,
+            include_docx='.docx' in self.supported_suffixes,
+            es_client=self.es,
+            index_layout=self.index_layout
+        )
+
+    def is_output_path(self, path) -> bool:
+        """Indica si la ruta está en el directorio de PDFs buscables, que no se indexa."""
+        return self.root_directory is not None and in_output_directory(path, self.root_directory)
+
+    def iter_pdf_files(self, root_dir: str) -> Iterator[Path]:
+        """
+        Recorre el directorio de forma perezosa, sin materializar la lista completa.
+        Incluye los .docx cuando el servicio se creó con include_docx y omite el
+        directorio de PDFs buscables generados.
+        """
+        try:
+            for dirpath, dirnames, filenames in os.walk(root_dir):
+                if dirpath == root_dir and OUTPUT_DIRNAME in dirnames:
+                    dirnames.remove(OUTPUT_DIRNAME)
+                for filename in filenames:
+                    path = Path(dirpath) / filename
+                    if path.suffix.lower() in self.supported_suffixes and path.is_file():
+                        yield path
+        except Exception as e:
+            logging.error(f"Error buscando PDFs en {root_dir}: {str(e)}")
+
     def find_pdf_files(self, root_dir: str) -> List[Path]:
         pdf_files = []
         root_path = Path(root_dir)
         
         try:
             for path in root_path.rglob('*.pdf'):
-                if path.is_file():
+                if path.is_file() and not in_output_directory(path, root_path):
                     pdf_files.append(path)
             
             logging.info(f"Encontrados {len(pdf_files)} archivos PDF en {root_dir}")
@@ -130,115 +190,450 @@ class PDFElasticsearchService:
         except ValueError:
             return str(file_path)
 
+    async def extract_pdf(self, pdf_path: str, root_dir: Optional[str] = None) -> Dict:
+        """
+        Ejecuta la extracción (CPU) en el executor configurado para no bloquear el event loop.
+        """
+        root_directory = root_dir or self.root_directory or os.path.dirname(pdf_path)
+        loop = asyncio.get_running_loop()
+
+        with observe(INGEST_STAGE_SECONDS, stage='extraction_total'):
+            if self.executor_type == 'process':
+                info = await loop.run_in_executor(
+                    self._get_executor(), _extract_pdf_in_worker, root_directory, pdf_path
+                )
+            else:
+                if self.pdf_manager is None:
+                    self.pdf_manager = PDFManager(root_directory)
+                info = await loop.run_in_executor(
+                    self._get_executor(), self.pdf_manager.process_pdf, pdf_path
+                )
+
+        # Los tiempos por etapa vienen del worker, que puede ser otro proceso
+        record_extraction(info)
+        if CACHE_ENABLED and 'error' not in info:
+            CACHE_REQUESTS.labels(cache='extraction', result='hit' if info.get('from_cache') else 'miss').inc()
+        return info
+
+    def _processing_type(self, pages: List[Dict]) -> str:
+        image_pages = sum(1 for page in pages if page.get('is_image', False))
+        if image_pages == 0:
+            return "texto"
+        return "OCR" if image_pages == len(pages) else "mixto"
+
+    def build_document(self, pdf_path: str, root_dir: Optional[str], pdf_info: Dict) -> Tuple[str, Dict]:
+        """
+        Construye el documento de Elasticsearch a partir de la información extraída.
+
+        Returns:
+            Tuple[str, Dict]: ID del documento (ruta relativa) y documento
+        """
+        path_obj = Path(pdf_path)
+        root_path = Path(root_dir) if root_dir else path_obj.parent
+        relative_path = str(path_obj.relative_to(root_path))
+        directory_structure = str(path_obj.parent)
+        file_stat = path_obj.stat()
+
+        # Crear estructura de páginas
+        pages = []
+        for page_num, page_data in pdf_info['pages'].items():
+            page_info = {
+                "number": page_num,
+                "content": page_data['texto'],
+                "is_image": page_data.get('is_image', False),
+                "confidence": page_data.get('confidence', 1.0)
+            }
+            if page_data.get('ocr_profile'):
+                page_info["ocr_profile"] = page_data['ocr_profile']
+            pages.append(page_info)
+
+        # Crear documento para Elasticsearch
+        document = {
+            "filename": path_obj.name,
+            "file_path": str(path_obj.absolute()),
+            "relative_path": relative_path,
+            "directory_structure": directory_structure,
+            # Firma del archivo usada por la sincronización incremental
+            "file_size": file_stat.st_size,
+            "file_mtime": file_stat.st_mtime,
+            "content_hash": pdf_info.get('content_hash'),
+            "pages": pages,
+            "total_pages": pdf_info['document_info']['numero_paginas'],
+            "metadata": pdf_info['metadata'],
+            "document_info": {
+                **pdf_info['document_info'],
+                "tipo_procesamiento": self._processing_type(pages)
+            },
+            "indexed_date": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+        # Usar la ruta relativa como ID único del documento
+        return relative_path, document
+
+    def _index_summary(self, document: Dict) -> Dict:
+        pages = document["pages"]
+        return {
+            "success": True,
+            "message": f"PDF indexado exitosamente con {len(pages)} páginas",
+            "indexed_pages": len(pages),
+            "processing_type": document["document_info"]["tipo_procesamiento"]
+        }
+
+    def document_actions(self, doc_id: str, document: Dict) -> List[Tuple[str, Dict]]:
+        """Documentos de Elasticsearch que representan un PDF según el layout del índice."""
+        if self.index_layout == PAGES_LAYOUT:
+            return split_document(doc_id, document)
+        return [(doc_id, document)]
+
+    def _document_query(self, doc_ids: List[str], extra_filters: Optional[List[Dict]] = None) -> Dict:
+        return {"query": {"bool": {"filter": [{"terms": {"relative_path": doc_ids}}] + (extra_filters or [])}}}
+
+    async def delete_stale_pages(self, doc_id: str, last_page: int):
+        """Con el layout por páginas, elimina las páginas que sobran tras reindexar un PDF más corto."""
+        if self.index_layout != PAGES_LAYOUT:
+            return
+        try:
+            with observe(ES_REQUEST_SECONDS, operation='delete_by_query'):
+                await self.es.delete_by_query(
+                    index=self.index_name,
+                    body=self._document_query([doc_id], [{"range": {"page_number": {"gt": last_page}}}]),
+                    conflicts='proceed'
+                )
+        except Exception as e:
+            record_es_error('delete_by_query', e)
+            raise
+
+    async def delete_documents(self, doc_ids: List[str]) -> int:
+        """
+        Elimina los PDFs indicados, con todas sus páginas si el layout es por páginas.
+
+        Returns:
+            int: Documentos de Elasticsearch eliminados
+        """
+        if not doc_ids:
+            return 0
+        try:
+            if self.index_layout == PAGES_LAYOUT:
+                with observe(ES_REQUEST_SECONDS, operation='delete_by_query'):
+                    response = await self.es.delete_by_query(
+                        index=self.index_name, body=self._document_query(doc_ids), conflicts='proceed'
+                    )
+                deleted = response.get("deleted", 0)
+            else:
+                deleted = 0
+                for doc_id in doc_ids:
+                    with observe(ES_REQUEST_SECONDS, operation='delete'):
+                        response = await self.es.delete(index=self.index_name, id=doc_id, ignore=[404])
+                    deleted += response.get("result") == "deleted"
+        except Exception as e:
+            record_es_error('delete', e)
+            raise
+        self.notify_index_changed()
+        return deleted
+
+    async def delete_directory(self, directory: str) -> int:
+        """
+        Elimina los PDFs indexados que estaban bajo `directory` a cualquier profundidad, p. ej.
+        cuando se borra o se mueve una carpeta entera. Filtra por prefijo de `file_path`, que
+        está en ambos layouts.
+
+        Returns:
+            int: Documentos de Elasticsearch eliminados
+        """
+        prefix = os.path.join(str(Path(directory).absolute()), '')
+        try:
+            with observe(ES_REQUEST_SECONDS, operation='delete_by_query'):
+                response = await self.es.delete_by_query(
+                    index=self.index_name,
+                    body={"query": {"bool": {"filter": [{"prefix": {"file_path": prefix}}]}}},
+                    conflicts='proceed'
+                )
+        except Exception as e:
+            record_es_error('delete_by_query', e)
+            raise
+        self.notify_index_changed()
+        return response.get("deleted", 0)
+
+    async def update_signatures(self, files: List[Dict]) -> int:
+        """
+        Con el layout por páginas, actualiza tamaño y mtime en todas las páginas de cada
+        archivo con un único update_by_query.
+
+        Args:
+            files (List[Dict]): Archivos con 'relative_path', 'file_size' y 'file_mtime'
+
+        Returns:
+            int: Documentos de página actualizados
+        """
+        if not files:
+            return 0
+        signatures = {
+            file["relative_path"]: {"file_size": file["file_size"], "file_mtime": file["file_mtime"]}
+            for file in files
+        }
+        body = self._document_query(list(signatures))
+        body["script"] = {
+            "lang": "painless",
+            "source": (
+                "def signature = params.files[ctx._source.relative_path];"
+                "ctx._source.file_size = signature.file_size;"
+                "ctx._source.file_mtime = signature.file_mtime;"
+            ),
+            "params": {"files": signatures}
+        }
+        try:
+            with observe(ES_REQUEST_SECONDS, operation='update_by_query'):
+                response = await self.es.update_by_query(index=self.index_name, body=body, conflicts='proceed')
+        except Exception as e:
+            record_es_error('update_by_query', e)
+            raise
+        self.notify_index_changed()
+        return response.get("updated", 0)
+
+    async def get_document(self, doc_id: str, index_name: Optional[str] = None) -> Dict:
+        """
+        Devuelve el documento de un PDF con sus páginas nested. Con el layout por páginas
+        se reconstruye a partir de los documentos de página (hasta 10 000 páginas).
+
+        Raises:
+            ValueError: Si el documento no existe
+        """
+        index_name = index_name or self.index_name
+        if self.index_layout != PAGES_LAYOUT:
+            response = await self.es.get(index=index_name, id=doc_id)
+            return response["_source"]
+
+        response = await self.es.search(index=index_name, body={
+            "query": {"term": {"relative_path": doc_id}},
+            "sort": [{"page_number": "asc"}],
+            "size": 10000
+        })
+        hits = response["hits"]["hits"]
+        if not hits:
+            raise ValueError(f"Documento no encontrado: {doc_id}")
+        return merge_pages(hit["_source"] for hit in hits)
+
+    @staticmethod
+    async def _gather_items(futures: List[asyncio.Future]) -> Dict:
+        """Une los resultados de bulk de las páginas de un PDF: falla si falla alguna."""
+        items = await asyncio.gather(*futures)
+        failed = [item for item in items if not item["success"]]
+        return failed[0] if failed else items[0]
+
+    def new_bulk_indexer(self, **kwargs) -> BulkIndexer:
+        """Crea un BulkIndexer sobre el cliente y el índice del servicio."""
+        kwargs.setdefault("on_flush", self.notify_index_changed)
+        return BulkIndexer(self.es, self.index_name, **kwargs)
+
     async def index_pdf(self, pdf_path: str, root_dir: Optional[str] = None) -> Dict:
+        INGEST_IN_FLIGHT.inc()
         try:
-            # Usar PDFManager para procesar el PDF
-            if self.pdf_manager is None:
-                self.pdf_manager = PDFManager(root_dir or os.path.dirname(pdf_path))
-            
-            pdf_info = self.pdf_manager.process_pdf(pdf_path)
+            # Extraer fuera del event loop
+            pdf_info = await self.extract_pdf(pdf_path, root_dir)
             
             if 'error' in pdf_info:
                 logging.error(f"Error procesando PDF {pdf_path}: {pdf_info['error']}")
+                INGEST_FILES.labels(result='failed').inc()
                 return {"success": False, "error": pdf_info['error']}
 
-            path_obj = Path(pdf_path)
-            root_path = Path(root_dir) if root_dir else path_obj.parent
-            relative_path = str(path_obj.relative_to(root_path))
-            directory_structure = str(path_obj.parent)
-
-            # Crear estructura de páginas
-            pages = []
-            for page_num, page_data in pdf_info['pages'].items():
-                page_info = {
-                    "number": page_num,
-                    "content": page_data['texto'],
-                    "is_image": page_data.get('is_image', False),
-                    "confidence": page_data.get('confidence', 1.0)
-                }
-                pages.append(page_info)
-
-            # Crear documento para Elasticsearch
-            document = {
-                "filename": path_obj.name,
-                "file_path": str(path_obj.absolute()),
-                "relative_path": relative_path,
-                "directory_structure": directory_structure,
-                "pages": pages,
-                "total_pages": pdf_info['document_info']['numero_paginas'],
-                "metadata": pdf_info['metadata'],
-                "document_info": {
-                    **pdf_info['document_info'],
-                    "tipo_procesamiento": "OCR" if any(p.get('is_image', False) for p in pages) else "texto"
-                },
-                "indexed_date": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
-            
-            # Usar la ruta relativa como ID único del documento
-            doc_id = relative_path
+            doc_id, document = self.build_document(pdf_path, root_dir, pdf_info)
             
-            await self.es.index(
-                index=self.index_name,
-                id=doc_id,
-                document=document
-            )
+            # También con un solo documento se pasa por el BulkIndexer, que limita la
+            # concurrencia y reintenta los rechazos por saturación
+            actions = self.document_actions(doc_id, document)
+            async with self.new_bulk_indexer(on_flush=None) as indexer:
+                futures = [await indexer.add(action_id, action) for action_id, action in actions]
+            item = await self._gather_items(futures)
+            if not item["success"]:
+                raise Exception(item.get("error"))
+            if self.index_layout == PAGES_LAYOUT:
+                await self.delete_stale_pages(doc_id, max(page["page_number"] for _, page in actions))
+            self.notify_index_changed()
             
             logging.info(f"PDF indexado exitosamente: {pdf_path}")
-            return {
-                "success": True,
-                "message": f"PDF indexado exitosamente con {len(pages)} páginas",
-                "indexed_pages": len(pages),
-                "processing_type": document["document_info"]["tipo_procesamiento"]
-            }
+            INGEST_FILES.labels(result='success').inc()
+            return self._index_summary(document)
 
         except Exception as e:
             error_msg = f"Error indexando PDF {pdf_path}: {str(e)}"
             logging.error(error_msg)
+            INGEST_FILES.labels(result='failed').inc()
             return {"success": False, "error": error_msg}
-        
-    async def process_directory(self, directory_path: str, parallel: bool = True) -> Dict:
+        finally:
+            INGEST_IN_FLIGHT.dec()
+
+    async def queue_pdf(self, pdf_path: str, root_dir: Optional[str], bulk_indexer: BulkIndexer) -> asyncio.Future:
+        """
+        Extrae un PDF y lo encola en el BulkIndexer en lugar de indexarlo con una petición propia.
+
+        Returns:
+            asyncio.Future: Se resuelve con un resultado con la misma forma que el de index_pdf
+                cuando el lote que contiene el documento ha sido enviado
+        """
+        result_future = asyncio.get_running_loop().create_future()
         try:
-            pdf_files = self.find_pdf_files(directory_path)
-            total_files = len(pdf_files)
-            
-            if total_files == 0:
-                return {"message": "No se encontraron archivos PDF", "processed": 0}
+            pdf_info = await self.extract_pdf(pdf_path, root_dir)
+            if 'error' in pdf_info:
+                logging.error(f"Error procesando PDF {pdf_path}: {pdf_info['error']}")
+                result_future.set_result({"success": False, "error": pdf_info['error']})
+                return result_future
 
-            results = {
-                "total_files": total_files,
-                "successful": 0,
-                "failed": 0,
-                "errors": []
-            }
+            doc_id, document = self.build_document(pdf_path, root_dir, pdf_info)
+            summary = self._index_summary(document)
+            futures = [
+                await bulk_indexer.add(action_id, action)
+                for action_id, action in self.document_actions(doc_id, document)
+            ]
+            bulk_future = futures[0] if len(futures) == 1 else asyncio.ensure_future(self._gather_items(futures))
+        except Exception as e:
+            error_msg = f"Error indexando PDF {pdf_path}: {str(e)}"
+            logging.error(error_msg)
+            result_future.set_result({"success": False, "error": error_msg})
+            return result_future
+
+        def on_indexed(future: asyncio.Future):
+            item = future.result()
+            if item["success"]:
+                result_future.set_result(summary)
+            else:
+                result_future.set_result({
+                    "success": False,
+                    "error": f"Error indexando PDF {pdf_path}: {item.get('error')}"
+                })
+
+        bulk_future.add_done_callback(on_indexed)
+        return result_future
+        
+    async def process_files(
+        self,
+        pdf_paths: Iterable,
+        root_dir: str,
+        parallel: bool = True,
+        on_start: Optional[Callable[[str], None]] = None,
+        on_result: Optional[Callable[[str, Dict], None]] = None,
+        max_errors: int = 100
+    ) -> Dict:
+        """
+        Extrae e indexa los PDFs indicados con un número acotado de archivos en vuelo.
+
+        Args:
+            pdf_paths (Iterable): Rutas a procesar; puede ser un generador perezoso
+            root_dir (str): Directorio raíz para calcular las rutas relativas
+            parallel (bool): Si es False se procesa un archivo a la vez
+            on_start (Optional[Callable]): Se invoca con la ruta cuando empieza su extracción
+            on_result (Optional[Callable]): Se invoca con (ruta, resultado) al terminar cada archivo
+            max_errors (int): Máximo de mensajes de error que se conservan en el resumen
 
-            logging.info(f"Iniciando procesamiento de {total_files} archivos PDF")
-
-            if parallel and total_files > 1:
-                tasks = []
-                for pdf_path in pdf_files:
-                    tasks.append(self.index_pdf(str(pdf_path), directory_path))
-                
-                # Procesar archivos en paralelo con asyncio.gather
-                import asyncio
-                completed = await asyncio.gather(*tasks, return_exceptions=True)
-                
-                for result in completed:
-                    if isinstance(result, Exception):
-                        results["failed"] += 1
-                        results["errors"].append(str(result))
-                    elif result.get("success", False):
-                        results["successful"] += 1
-                    else:
-                        results["failed"] += 1
-                        results["errors"].append(result.get("error"))
+        Returns:
+            Dict: Resumen con contadores y los primeros errores
+        """
+        results = {
+            "total_files": 0,
+            "successful": 0,
+            "failed": 0,
+            "errors": []
+        }
+        concurrency = max(1, self.max_in_flight) if parallel else 1
+        queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+        queue_depth = INGEST_QUEUE_DEPTH.labels(queue='ingest')
+
+        def record(pdf_path: str, result: Dict):
+            if result.get("success", False):
+                results["successful"] += 1
+                INGEST_FILES.labels(result='success').inc()
             else:
-                for pdf_path in pdf_files:
-                    result = await self.index_pdf(str(pdf_path), directory_path)
-                    if result.get("success", False):
-                        results["successful"] += 1
-                    else:
-                        results["failed"] += 1
-                        results["errors"].append(result.get("error"))
+                results["failed"] += 1
+                INGEST_FILES.labels(result='failed').inc()
+                if len(results["errors"]) < max_errors:
+                    results["errors"].append(result.get("error"))
+
+            processed = results["successful"] + results["failed"]
+            if processed % 100 == 0:
+                logging.info(
+                    f"Progreso de indexación: {processed} archivos "
+                    f"({results['successful']} correctos, {results['failed']} fallidos)"
+                )
+            if on_result is not None:
+                on_result(pdf_path, result)
+
+        # Resultados pendientes de que su lote bulk sea confirmado
+        outstanding = set()
+
+        def track(pdf_path: str, future: asyncio.Future):
+            outstanding.add(future)
+
+            def done(f: asyncio.Future):
+                outstanding.discard(f)
+                record(pdf_path, f.result())
+
+            future.add_done_callback(done)
+
+        async def worker():
+            while True:
+                pdf_path = await queue.get()
+                queue_depth.set(queue.qsize())
+                if pdf_path is None:
+                    return
+                # Cuenta el archivo mientras se extrae y se encola, también si el worker se cancela
+                INGEST_IN_FLIGHT.inc()
+                try:
+                    if on_start is not None:
+                        on_start(pdf_path)
+                    future = await self.queue_pdf(pdf_path, root_dir, indexer)
+                except Exception as e:
+                    record(pdf_path, {"success": False, "error": str(e)})
+                    continue
+                finally:
+                    INGEST_IN_FLIGHT.dec()
+                track(pdf_path, future)
+
+        logging.info(f"Iniciando procesamiento de PDFs en {root_dir} con {concurrency} archivos en vuelo")
+        indexer = self.new_bulk_indexer()
+        indexer.start()
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+
+        try:
+            for pdf_path in pdf_paths:
+                results["total_files"] += 1
+                await queue.put(str(pdf_path))
+                queue_depth.set(queue.qsize())
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+            await indexer.close()
+
+        if outstanding:
+            await asyncio.gather(*list(outstanding))
+
+        results["errors_truncated"] = max(0, results["failed"] - len(results["errors"]))
+        return results
+
+    async def process_directory(
+        self,
+        directory_path: str,
+        parallel: bool = True,
+        on_start: Optional[Callable[[str], None]] = None,
+        on_result: Optional[Callable[[str, Dict], None]] = None,
+        max_errors: int = 100
+    ) -> Dict:
+        """
+        Indexa todos los PDFs del directorio. Ver process_files para los parámetros.
+        """
+        try:
+            results = await self.process_files(
+                self.iter_pdf_files(directory_path),
+                directory_path,
+                parallel=parallel,
+                on_start=on_start,
+                on_result=on_result,
+                max_errors=max_errors
+            )
+
+            if results["total_files"] == 0:
+                return {"message": "No se encontraron archivos PDF", "processed": 0}
 
             return results
 
@@ -246,4 +641,3 @@ class PDFElasticsearchService:
             error_msg = f"Error procesando directorio {directory_path}: {str(e)}"
             logging.error(error_msg)
             return {"error": error_msg}
-            
\ No newline at end of file
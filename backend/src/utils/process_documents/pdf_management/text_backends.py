@@ -0,0 +1,387 @@
+import os
+import time
+import logging
+import threading
+import weakref
+import multiprocessing
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+from PyPDF2 import PdfReader
+
+try:
+    import pypdfium2
+except ImportError:  # pypdfium2 es opcional; sin él se usa el siguiente backend de la cadena
+    pypdfium2 = None
+
+try:
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LTTextContainer
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfparser import PDFParser
+    from pdfminer.utils import decode_text
+except ImportError:  # pdfminer.six es opcional
+    extract_pages = None
+
+DEFAULT_TEXT_BACKENDS = os.getenv('TEXT_BACKENDS', 'pypdfium2,pypdf2')
+DEFAULT_TEXT_BACKEND_TIMEOUT = float(os.getenv('TEXT_BACKEND_TIMEOUT', 120))
+# 'process': cada backend corre en un proceso aparte que se mata al superar el tiempo;
+# 'none': en el propio hilo, con el límite solo comprobado entre páginas
+DEFAULT_TEXT_BACKEND_ISOLATION = os.getenv('TEXT_BACKEND_ISOLATION', 'process')
+
+# Claves de metadatos que usa TextPDFProcessor, sin la barra de PyPDF2
+METADATA_KEYS = ('Author', 'Title', 'CreationDate')
+
+
+class ExtractionTimeout(Exception):
+    pass
+
+
+class ExtractionDeadline:
+    """
+    Límite de tiempo cooperativo: los backends lo comprueban entre páginas, así que no
+    acota una sola página patológica. Ese caso lo cubre el aislamiento en proceso de
+    TextExtractionChain, que mata al worker desde fuera.
+    """
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds if seconds > 0 else None
+
+    def check(self, page_num: int):
+        if self.expires_at is not None and time.monotonic() > self.expires_at:
+            raise ExtractionTimeout(f"tiempo de extracción agotado ({self.seconds}s) en la página {page_num}")
+
+
+class TextBackend(ABC):
+    """
+    Backend de extracción de texto. `extract` devuelve el texto de cada página (una
+    entrada por página, aunque esté vacía, para que el enrutado a OCR funcione) y los
+    metadatos crudos con las claves de METADATA_KEYS.
+    """
+    name = ''
+
+    @classmethod
+    def available(cls) -> bool:
+        return True
+
+    @abstractmethod
+    def extract(self, pdf_path: str, deadline: ExtractionDeadline) -> Tuple[List[str], Dict[str, Optional[str]]]:
+        pass
+
+
+class PyPDF2Backend(TextBackend):
+    name = 'pypdf2'
+
+    def extract(self, pdf_path: str, deadline: ExtractionDeadline) -> Tuple[List[str], Dict[str, Optional[str]]]:
+        with open(pdf_path, 'rb') as file:
+            reader = PdfReader(file)
+            metadata = {}
+            if reader.metadata:
+                metadata = {key: reader.metadata.get(f'/{key}') for key in METADATA_KEYS}
+
+            pages = []
+            for page_num, page in enumerate(reader.pages, 1):
+                deadline.check(page_num)
+                pages.append(page.extract_text())
+            return pages, metadata
+
+
+class PdfiumBackend(TextBackend):
+    """
+    Backend sobre PDFium (C++), el más rápido. PDFium no admite llamadas concurrentes
+    desde varios hilos del mismo proceso, así que se serializa con un lock; para
+    extraer en paralelo conviene INGEST_EXECUTOR=process.
+    """
+    name = 'pypdfium2'
+    _lock = threading.Lock()
+
+    @classmethod
+    def available(cls) -> bool:
+        return pypdfium2 is not None
+
+    def extract(self, pdf_path: str, deadline: ExtractionDeadline) -> Tuple[List[str], Dict[str, Optional[str]]]:
+        with self._lock:
+            pdf = pypdfium2.PdfDocument(pdf_path)
+            try:
+                raw_metadata = pdf.get_metadata_dict()
+                metadata = {key: raw_metadata.get(key) or None for key in METADATA_KEYS}
+
+                pages = []
+                for index in range(len(pdf)):
+                    deadline.check(index + 1)
+                    page = pdf[index]
+                    text_page = page.get_textpage()
+                    try:
+                        pages.append(text_page.get_text_range().replace('\r\n', '\n'))
+                    finally:
+                        text_page.close()
+                        page.close()
+                return pages, metadata
+            finally:
+                pdf.close()
+
+
+class PdfMinerBackend(TextBackend):
+    """Backend sobre pdfminer.six: más lento, pero conserva mejor el orden de lectura."""
+    name = 'pdfminer'
+
+    @classmethod
+    def available(cls) -> bool:
+        return extract_pages is not None
+
+    def extract(self, pdf_path: str, deadline: ExtractionDeadline) -> Tuple[List[str], Dict[str, Optional[str]]]:
+        metadata = {}
+        with open(pdf_path, 'rb') as file:
+            info = PDFDocument(PDFParser(file)).info
+            if info:
+                for key in METADATA_KEYS:
+                    value = info[0].get(key)
+                    metadata[key] = decode_text(value) if isinstance(value, bytes) else value
+
+        pages = []
+        for page_num, layout in enumerate(extract_pages(pdf_path), 1):
+            deadline.check(page_num)
+            pages.append(''.join(
+                element.get_text() for element in layout if isinstance(element, LTTextContainer)
+            ))
+        return pages, metadata
+
+
+BACKENDS = {backend.name: backend for backend in (PdfiumBackend, PdfMinerBackend, PyPDF2Backend)}
+
+
+
+def _text_worker_loop(conn):
+    """Bucle del proceso de extracción aislada: un documento por mensaje hasta recibir None."""
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        backend_name, pdf_path, timeout = task
+        try:
+            result = (True, BACKENDS[backend_name]().extract(pdf_path, ExtractionDeadline(timeout)))
+        except Exception as e:
+            result = (False, e)
+        try:
+            conn.send(result)
+        except Exception as e:
+            # La excepción del backend no siempre se puede serializar
+            conn.send((False, RuntimeError(f"{type(result[1]).__name__}: {result[1]} ({str(e)})")))
+
+
+class _TextWorker:
+    """Proceso de extracción con su pipe; se puede matar sin afectar a los demás."""
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        # daemon: si la aplicación termina sin cerrar la cadena, el proceso no la retiene
+        self.process = context.Process(target=_text_worker_loop, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        # Hay una petición enviada cuya respuesta no se ha leído
+        self.pending = False
+
+    def run(self, backend_name: str, pdf_path: str, timeout: float) -> Tuple[List[str], Dict[str, Optional[str]]]:
+        """
+        Raises:
+            ExtractionTimeout: Si no responde en `timeout` segundos
+            EOFError: Si el proceso murió durante la extracción
+        """
+        self.pending = True
+        self.conn.send((backend_name, pdf_path, timeout))
+        if timeout > 0 and not self.conn.poll(timeout):
+            raise ExtractionTimeout(f"tiempo de extracción agotado ({timeout}s); proceso detenido")
+        ok, payload = self.conn.recv()
+        self.pending = False
+        if not ok:
+            raise payload
+        return payload
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(1)
+        self.conn.close()
+
+    def stop(self, timeout: float = 1):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(1)
+        self.conn.close()
+
+
+class _TextWorkerPool:
+    """
+    Procesos de extracción de una cadena, como mucho `size` a la vez. Se crean bajo
+    demanda con spawn (el proceso que extrae tiene hilos y fork podría heredar locks
+    tomados) y se reutilizan entre documentos hasta que la cadena se cierra.
+    """
+    def __init__(self, size: int):
+        self.size = max(1, size)
+        self._context = multiprocessing.get_context('spawn')
+        self._idle: List[_TextWorker] = []
+        self._count = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def acquire(self) -> _TextWorker:
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("La cadena de extracción de texto está cerrada")
+                if self._idle:
+                    return self._idle.pop()
+                if self._count < self.size:
+                    self._count += 1
+                    break
+                self._condition.wait()
+        try:
+            return _TextWorker(self._context)
+        except BaseException:
+            self._forget()
+            raise
+
+    def release(self, worker: _TextWorker):
+        with self._condition:
+            if not self._closed:
+                self._idle.append(worker)
+                self._condition.notify()
+                return
+        self._forget()
+        worker.stop()
+
+    def discard(self, worker: _TextWorker):
+        """Mata un proceso atascado o muerto; el siguiente documento arranca otro."""
+        self._forget()
+        worker.kill()
+
+    def _forget(self):
+        with self._condition:
+            self._count -= 1
+            self._condition.notify()
+
+    def close(self):
+        """Detiene los procesos libres; los que están extrayendo se detienen al terminar."""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._count -= len(idle)
+            self._condition.notify_all()
+        for worker in idle:
+            worker.stop()
+
+
+# Pools de las cadenas vivas, para cerrar al apagar los de servicios que no se cerraron
+_worker_pools: "weakref.WeakSet[_TextWorkerPool]" = weakref.WeakSet()
+
+
+def shutdown_text_workers():
+    """Cierra los procesos de extracción aislada que queden; se llama al apagar la aplicación."""
+    for pool in list(_worker_pools):
+        pool.close()
+
+
+class TextExtractionChain:
+    """
+    Cadena de backends configurada con TEXT_BACKENDS (por ejemplo "pypdfium2,pdfminer,pypdf2").
+    Se prueban en orden y se pasa al siguiente si uno no está instalado, falla o supera
+    `timeout` segundos en el documento.
+
+    Con `isolation='process'` el backend corre en uno de los `workers` procesos de la
+    cadena y el tiempo se controla desde fuera: si vence, el proceso se mata (aunque esté
+    atascado en una sola página) y el siguiente documento arranca uno nuevo. Los procesos
+    viven hasta `close()`, que llama el PDFManager dueño de la cadena. Con 'none' solo se
+    aplica el límite cooperativo entre páginas.
+    """
+    def __init__(
+        self,
+        backends: Optional[str] = None,
+        timeout: float = DEFAULT_TEXT_BACKEND_TIMEOUT,
+        isolation: str = DEFAULT_TEXT_BACKEND_ISOLATION,
+        workers: int = 4
+    ):
+        if isolation not in ('process', 'none'):
+            raise ValueError(f"Aislamiento de extracción no soportado: {isolation}")
+        self.timeout = timeout
+        self.isolation = isolation
+        self.workers = workers
+        self._pool: Optional[_TextWorkerPool] = None
+        self._pool_lock = threading.Lock()
+        self.backends: List[TextBackend] = []
+        for name in (backends or DEFAULT_TEXT_BACKENDS).split(','):
+            name = name.strip().lower()
+            if not name:
+                continue
+            backend_class = BACKENDS.get(name)
+            if backend_class is None:
+                raise ValueError(f"Backend de extracción de texto desconocido: {name}")
+            if backend_class.available():
+                self.backends.append(backend_class())
+            else:
+                logging.warning(f"Backend de extracción '{name}' no instalado; se omite")
+
+        if not self.backends:
+            self.backends.append(PyPDF2Backend())
+
+    @property
+    def names(self) -> List[str]:
+        return [backend.name for backend in self.backends]
+
+    def _get_pool(self) -> _TextWorkerPool:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = _TextWorkerPool(self.workers)
+                _worker_pools.add(self._pool)
+            return self._pool
+
+    def close(self):
+        """Detiene los procesos de extracción aislada de la cadena."""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.close()
+
+    def extract(self, pdf_path: str) -> Tuple[str, List[str], Dict[str, Optional[str]]]:
+        """
+        Returns:
+            Tuple[str, List[str], Dict]: Backend usado, texto por página y metadatos crudos
+
+        Raises:
+            Exception: El error del último backend si todos fallan
+        """
+        last_error: Optional[Exception] = None
+        for backend in self.backends:
+            try:
+                if self.isolation == 'process':
+                    pages, metadata = self._extract_isolated(backend, pdf_path)
+                else:
+                    pages, metadata = backend.extract(pdf_path, ExtractionDeadline(self.timeout))
+                return backend.name, pages, metadata
+            except Exception as e:
+                last_error = e
+                logging.warning(f"Backend '{backend.name}' falló en {pdf_path}: {str(e)}")
+        raise last_error
+
+    def _extract_isolated(self, backend: TextBackend, pdf_path: str) -> Tuple[List[str], Dict[str, Optional[str]]]:
+        pool = self._get_pool()
+        worker = pool.acquire()
+        try:
+            result = worker.run(backend.name, pdf_path, self.timeout)
+        except BaseException as e:
+            if not worker.pending:
+                # Respuesta leída: el error es del backend y el proceso sigue sano
+                pool.release(worker)
+                raise
+            # Tiempo agotado, interrupción o proceso muerto (p. ej. un fallo nativo del
+            # backend): no se puede reutilizar y el siguiente documento arranca otro
+            pool.discard(worker)
+            if isinstance(e, (EOFError, OSError)):
+                raise RuntimeError(f"el proceso de extracción terminó inesperadamente con '{backend.name}'") from e
+            raise
+        pool.release(worker)
+        return result
@@ -1,16 +1,19 @@
 import os
-from PyPDF2 import PdfReader
 import logging
 from pathlib import Path
 from typing import Dict, Optional, List
 from datetime import datetime
+from PyPDF2 import PdfReader
+from .text_backends import METADATA_KEYS, TextExtractionChain
 
 class TextPDFProcessor:
     """
     Clase responsable de procesar PDFs que contienen texto directamente extraíble.
+    El texto lo obtiene la cadena de backends configurada (ver text_backends).
     """
-    def __init__(self):
+    def __init__(self, extraction_chain: Optional[TextExtractionChain] = None):
         self._processed_files: List[str] = []
+        self.extraction_chain = extraction_chain or TextExtractionChain()
         self.setup_logging()
 
     def setup_logging(self):
@@ -39,9 +42,11 @@ class TextPDFProcessor:
                 logging.error(f"El archivo no es un PDF: {pdf_path}")
                 return False
             
-            # Intenta abrir el PDF para verificar que no está corrupto
+            # Solo se comprueba la cabecera; el documento lo analiza después el backend
             with open(pdf_path, 'rb') as file:
-                PdfReader(file)
+                if b'%PDF-' not in file.read(1024):
+                    logging.error(f"El archivo no tiene cabecera PDF: {pdf_path}")
+                    return False
             return True
         except Exception as e:
             logging.error(f"Error validando PDF {pdf_path}: {str(e)}")
@@ -75,6 +80,36 @@ class TextPDFProcessor:
         
         return value
     
+    def format_metadata(self, metadata: Dict[str, Optional[str]]) -> Dict[str, str]:
+        """Convierte los metadatos crudos de un backend al formato del índice."""
+        if not any(metadata.values()):
+            return {}
+        return {
+            'autor': self.clean_metadata_value(metadata.get('Author')),
+            'fecha_creacion': self.clean_metadata_value(metadata.get('CreationDate')),
+            'titulo': self.clean_metadata_value(metadata.get('Title')),
+        }
+
+    def extract_metadata(self, pdf_path: str) -> Dict[str, str]:
+        """
+        Lee solo el diccionario /Info del PDF, sin extraer texto. Lo usan los documentos
+        escaneados, que pasan directamente a OCR.
+
+        Args:
+            pdf_path (str): Ruta al archivo PDF
+
+        Returns:
+            Dict[str, str]: Metadatos limpios, o vacío si no hay o no se pueden leer
+        """
+        try:
+            reader = PdfReader(pdf_path)
+            if not reader.metadata:
+                return {}
+            return self.format_metadata({key: reader.metadata.get(f'/{key}') for key in METADATA_KEYS})
+        except Exception as e:
+            logging.warning(f"No se pudieron leer los metadatos de {pdf_path}: {str(e)}")
+            return {}
+
     def extract_text_from_pdf(self, pdf_path: str) -> Dict:
         """
         Extrae texto e información detallada de un PDF.
@@ -98,46 +133,40 @@ class TextPDFProcessor:
             return info
 
         try:
-            with open(pdf_path, 'rb') as file:
-                reader = PdfReader(file)
-                texto_completo = []
-                total_palabras = 0
-                total_caracteres = 0
-
-                # Extraer metadatos con limpieza
-                if reader.metadata:
-                    info['metadata'] = {
-                        'autor': self.clean_metadata_value(reader.metadata.get('/Author')),
-                        'fecha_creacion': self.clean_metadata_value(reader.metadata.get('/CreationDate')),
-                        'titulo': self.clean_metadata_value(reader.metadata.get('/Title')),
-                    }
-
-                # Procesar páginas
-                for page_num, page in enumerate(reader.pages, 1):
-                    text = page.extract_text()
-                    palabras = text.split()
-                    texto_completo.append(text)
-                    
-                    total_palabras += len(palabras)
-                    total_caracteres += len(text)
-
-                    info['pages'][page_num] = {
-                        'texto': text,
-                    }
-
-                # Información del documento
-                texto_completo_str = '\n\n'.join(texto_completo)
-                info['document_info'] = {
-                    'numero_paginas': len(reader.pages),
-                    'tamano_archivo': os.path.getsize(pdf_path),
-                    'fecha_procesamiento': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            backend, pages, metadata = self.extraction_chain.extract(pdf_path)
+            texto_completo = []
+            total_palabras = 0
+            total_caracteres = 0
+
+            # Extraer metadatos con limpieza
+            info['metadata'] = self.format_metadata(metadata)
+
+            # Procesar páginas
+            for page_num, text in enumerate(pages, 1):
+                palabras = text.split()
+                texto_completo.append(text)
+
+                total_palabras += len(palabras)
+                total_caracteres += len(text)
+
+                info['pages'][page_num] = {
+                    'texto': text,
                 }
 
-                info['texto_completo'] = texto_completo_str
-                self._processed_files.append(pdf_path)
-                
-                logging.info(f"PDF procesado exitosamente: {pdf_path}")
-                
+            # Información del documento
+            texto_completo_str = '\n\n'.join(texto_completo)
+            info['document_info'] = {
+                'numero_paginas': len(pages),
+                'tamano_archivo': os.path.getsize(pdf_path),
+                'fecha_procesamiento': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'backend_texto': backend
+            }
+
+            info['texto_completo'] = texto_completo_str
+            self._processed_files.append(pdf_path)
+
+            logging.info(f"PDF procesado exitosamente con {backend}: {pdf_path}")
+
         except Exception as e:
             error_msg = f"Error procesando PDF: {str(e)}"
             logging.error(error_msg)
@@ -0,0 +1,160 @@
+import os
+import zipfile
+import logging
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List
+from xml.etree import ElementTree
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+W = f'{{{W_NS}}}'
+CORE_NS = {
+    'dc': 'http://purl.org/dc/elements/1.1/',
+    'dcterms': 'http://purl.org/dc/terms/',
+}
+
+
+class DocxTextExtractor:
+    """
+    Extrae el texto de un .docx directamente del XML, sin renderizarlo a PDF.
+
+    Word no guarda la paginación, así que las páginas se aproximan con las marcas
+    `w:lastRenderedPageBreak` que deja la última maquetación; si el documento no las
+    tiene se usan los saltos de página explícitos. El resultado tiene la misma forma que
+    el de TextPDFProcessor para que index_pdf lo consuma sin cambios.
+    """
+    def __init__(self):
+        self._processed_files: List[str] = []
+
+    def validate_docx(self, docx_path: str) -> bool:
+        try:
+            if not os.path.exists(docx_path):
+                logging.error(f"El archivo no existe: {docx_path}")
+                return False
+
+            if not docx_path.lower().endswith('.docx'):
+                logging.error(f"El archivo no es un documento Word: {docx_path}")
+                return False
+
+            with zipfile.ZipFile(docx_path) as archive:
+                archive.getinfo('word/document.xml')
+            return True
+        except Exception as e:
+            logging.error(f"Error validando documento Word {docx_path}: {str(e)}")
+            return False
+
+    def _read_metadata(self, archive: zipfile.ZipFile) -> Dict:
+        try:
+            core = ElementTree.fromstring(archive.read('docProps/core.xml'))
+        except KeyError:
+            return {}
+
+        def value(tag: str) -> str:
+            element = core.find(tag, CORE_NS)
+            text = element.text.strip() if element is not None and element.text else ''
+            return text or "No disponible"
+
+        metadata = {
+            'autor': value('dc:creator'),
+            'titulo': value('dc:title'),
+        }
+
+        # Solo se incluye la fecha si cumple el formato del mapping del índice
+        try:
+            created = datetime.strptime(value('dcterms:created')[:19], '%Y-%m-%dT%H:%M:%S')
+            metadata['fecha_creacion'] = created.strftime('%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            pass
+
+        return metadata
+
+    def _split_pages(self, body: ElementTree.Element, use_rendered_breaks: bool) -> List[str]:
+        pages: List[List[str]] = [[]]
+        paragraph: List[str] = []
+
+        def new_page():
+            if paragraph:
+                pages[-1].append(''.join(paragraph))
+                paragraph.clear()
+            pages.append([])
+
+        for element in body.iter():
+            tag = element.tag
+            if tag == f'{W}p':
+                if paragraph:
+                    pages[-1].append(''.join(paragraph))
+                    paragraph.clear()
+                if not use_rendered_breaks and element.find(f'{W}pPr/{W}pageBreakBefore') is not None:
+                    if any(pages[-1]):
+                        pages.append([])
+            elif tag == f'{W}t':
+                paragraph.append(element.text or '')
+            elif tag == f'{W}tab':
+                paragraph.append('\t')
+            elif tag == f'{W}br':
+                if element.get(f'{W}type') == 'page':
+                    if not use_rendered_breaks:
+                        new_page()
+                else:
+                    paragraph.append('\n')
+            elif tag == f'{W}lastRenderedPageBreak' and use_rendered_breaks:
+                new_page()
+
+        if paragraph:
+            pages[-1].append(''.join(paragraph))
+
+        return ['\n'.join(page_paragraphs) for page_paragraphs in pages]
+
+    def extract_text_from_docx(self, docx_path: str) -> Dict:
+        """
+        Extrae texto y metadatos de un documento Word.
+
+        Args:
+            docx_path (str): Ruta al archivo .docx
+
+        Returns:
+            Dict: Diccionario con toda la información extraída
+        """
+        info = {
+            'metadata': {},
+            'pages': {},
+            'document_info': {},
+            'texto_completo': '',
+            'ruta_archivo': str(Path(docx_path).absolute())
+        }
+
+        if not self.validate_docx(docx_path):
+            info['error'] = "Documento Word inválido o corrupto"
+            return info
+
+        try:
+            with zipfile.ZipFile(docx_path) as archive:
+                document_xml = archive.read('word/document.xml')
+                info['metadata'] = self._read_metadata(archive)
+
+            root = ElementTree.fromstring(document_xml)
+            body = root.find(f'{W}body')
+            use_rendered_breaks = b'lastRenderedPageBreak' in document_xml
+            pages = self._split_pages(body, use_rendered_breaks) if body is not None else ['']
+
+            for page_num, text in enumerate(pages, 1):
+                info['pages'][page_num] = {
+                    'texto': text,
+                }
+
+            info['texto_completo'] = '\n\n'.join(pages)
+            info['document_info'] = {
+                'numero_paginas': len(pages),
+                'tamano_archivo': os.path.getsize(docx_path),
+                'fecha_procesamiento': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            }
+
+            self._processed_files.append(docx_path)
+            logging.info(f"Documento Word procesado exitosamente: {docx_path}")
+
+        except Exception as e:
+            error_msg = f"Error procesando documento Word: {str(e)}"
+            logging.error(error_msg)
+            info['error'] = error_msg
+
+        return info
@@ -1,34 +1,74 @@
 from spire.doc import *
 from pathlib import Path
 from spire.doc.common import *
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+
+def convertir_en_proceso(archivo_word: str, ruta_pdf: str):
+    """
+    Convierte un documento dentro de un proceso del pool. Recibe rutas en texto porque
+    los objetos de Spire no se pueden serializar entre procesos.
+    """
+    try:
+        Path(ruta_pdf).parent.mkdir(parents=True, exist_ok=True)
+
+        # Crear documento y cargar el archivo Word
+        document = Document()
+        document.LoadFromFile(archivo_word)
+
+        # Guardar el archivo PDF
+        document.SaveToFile(ruta_pdf, FileFormat.PDF)
+        document.Close()
+
+        return True, f"Convertido: {ruta_pdf}"
+
+    except Exception as e:
+        return False, f"Error en '{archivo_word}': {str(e)}"
 
 
 class ConvertidorWordPDF:
-    def __init__(self, ruta_base, ruta_salida):
+    def __init__(self, ruta_base, ruta_salida, max_workers=None):
         self.ruta_base = Path(ruta_base)
         self.ruta_salida = Path(ruta_salida)
         self.ruta_salida.mkdir(parents=True, exist_ok=True)
+        self.max_workers = max_workers or int(os.getenv('WORD_WORKERS', os.cpu_count() or 1))
 
-    def convertir_archivo(self, archivo_word):
+    def ruta_pdf(self, archivo_word):
+        """
+        Ruta de salida que replica la estructura de carpetas de origen. Se conserva la
+        extensión original (informe.docx.pdf) para no chocar con un informe.pdf existente.
+        """
         try:
-            # Definir el nombre del archivo de salida
-            ruta_pdf = self.ruta_salida / archivo_word.with_suffix('.pdf').name
-            
-            # Crear documento y cargar el archivo Word
-            document = Document()
-            document.LoadFromFile(str(archivo_word))
-
-            # Guardar el archivo PDF
-            document.SaveToFile(str(ruta_pdf), FileFormat.PDF)
-            document.Close()
+            relativa = archivo_word.relative_to(self.ruta_base)
+        except ValueError:
+            relativa = Path(archivo_word.name)
+        return self.ruta_salida / relativa.parent / f"{relativa.name}.pdf"
 
-            return True, f"Convertido: {ruta_pdf}"
+    def esta_actualizado(self, archivo_word):
+        ruta_pdf = self.ruta_pdf(archivo_word)
+        return ruta_pdf.exists() and ruta_pdf.stat().st_mtime >= archivo_word.stat().st_mtime
 
-        except Exception as e:
-            return False, f"Error en '{archivo_word}': {str(e)}"
+    def convertir_archivo(self, archivo_word):
+        return convertir_en_proceso(str(archivo_word), str(self.ruta_pdf(archivo_word)))
 
     def convertir_todos(self):
         archivos = list(self.ruta_base.rglob("*.docx"))
-        resultados = [self.convertir_archivo(archivo) for archivo in archivos]
-        return resultados
+        pendientes = []
+        resultados = []
+        for archivo in archivos:
+            if self.esta_actualizado(archivo):
+                resultados.append((True, f"Actualizado: {self.ruta_pdf(archivo)}"))
+            else:
+                pendientes.append(archivo)
+
+        if not pendientes:
+            return resultados
 
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(pendientes))) as executor:
+            resultados += list(executor.map(
+                convertir_en_proceso,
+                [str(archivo) for archivo in pendientes],
+                [str(self.ruta_pdf(archivo)) for archivo in pendientes]
+            ))
+        return resultados
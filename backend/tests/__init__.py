@@ -0,0 +1,5 @@
+"""
+Pruebas unitarias del backend. Se ejecutan desde backend/ con:
+
+    python -m unittest discover -s tests -t .
+"""
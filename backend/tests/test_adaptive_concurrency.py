@@ -0,0 +1,114 @@
+import time
+import asyncio
+import itertools
+import unittest
+from src.utils.process_documents.pdf_management.adaptive_concurrency import AIMDLimiter
+
+_names = itertools.count()
+
+
+def make_limiter(**kwargs) -> AIMDLimiter:
+    # Un nombre por limitador para que las métricas de cada prueba no se mezclen
+    return AIMDLimiter(f"test_{next(_names)}", **kwargs)
+
+
+async def settle():
+    """Deja correr las tareas pendientes del event loop."""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class AIMDLimiterTest(unittest.IsolatedAsyncioTestCase):
+    async def test_waiters_get_slots_in_arrival_order(self):
+        limiter = make_limiter(initial_limit=1, max_limit=1)
+        started = await limiter.acquire()
+        order = []
+
+        async def waiter(name):
+            await limiter.acquire()
+            order.append(name)
+
+        tasks = [asyncio.create_task(waiter(name)) for name in ("a", "b")]
+        await settle()
+        self.assertEqual(order, [])
+
+        limiter.release(started)
+        await settle()
+        self.assertEqual(order, ["a"])
+        self.assertEqual(limiter.in_flight, 1)
+
+        limiter.release(time.monotonic())
+        await asyncio.gather(*tasks)
+        self.assertEqual(order, ["a", "b"])
+
+    async def test_cancelled_waiter_leaves_the_queue(self):
+        limiter = make_limiter(initial_limit=1, max_limit=1)
+        started = await limiter.acquire()
+        cancelled = asyncio.create_task(limiter.acquire())
+        waiting = asyncio.create_task(limiter.acquire())
+        await settle()
+
+        cancelled.cancel()
+        await settle()
+        self.assertEqual(len(limiter._waiters), 1)
+
+        limiter.release(started)
+        await asyncio.wait_for(waiting, 1)
+        self.assertEqual(limiter.in_flight, 1)
+
+    async def test_slot_handed_to_cancelled_waiter_passes_to_the_next(self):
+        limiter = make_limiter(initial_limit=1, max_limit=1)
+        started = await limiter.acquire()
+        cancelled = asyncio.create_task(limiter.acquire())
+        waiting = asyncio.create_task(limiter.acquire())
+        await settle()
+
+        # El hueco se cede al primero, que se cancela antes de llegar a ejecutarse
+        limiter.release(started)
+        cancelled.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await cancelled
+
+        await asyncio.wait_for(waiting, 1)
+        self.assertEqual(limiter.in_flight, 1)
+        self.assertFalse(limiter._waiters)
+
+    async def test_decreases_once_per_round(self):
+        limiter = make_limiter(initial_limit=4, max_limit=8, decrease_ratio=0.5)
+        round_started = [await limiter.acquire() for _ in range(4)]
+
+        for started in round_started:
+            limiter.release(started, overloaded=True)
+        # Las cuatro peticiones empezaron antes de la reducción: solo cuenta la primera
+        self.assertEqual(limiter.limit, 2)
+
+        started = await limiter.acquire()
+        limiter.release(started, overloaded=True)
+        self.assertEqual(limiter.limit, 1)
+        self.assertEqual(limiter.in_flight, 0)
+
+    async def test_slow_request_counts_as_overload(self):
+        limiter = make_limiter(initial_limit=4, latency_target=1.0, decrease_ratio=0.5)
+        await limiter.acquire()
+        limiter.release(time.monotonic() - 5)
+        self.assertEqual(limiter.limit, 2)
+
+    async def test_additive_increase_up_to_max(self):
+        limiter = make_limiter(initial_limit=2, max_limit=3)
+        for _ in range(2):
+            limiter.release(await limiter.acquire())
+        self.assertAlmostEqual(limiter.limit, 2 + 1 / 2 + 1 / 2.5)
+
+        for _ in range(20):
+            limiter.release(await limiter.acquire())
+        self.assertEqual(limiter.limit, 3)
+
+    async def test_never_below_min_limit(self):
+        limiter = make_limiter(initial_limit=2, min_limit=1, decrease_ratio=0.1)
+        for _ in range(3):
+            limiter.release(await limiter.acquire(), overloaded=True)
+        self.assertEqual(limiter.limit, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
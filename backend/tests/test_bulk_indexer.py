@@ -0,0 +1,151 @@
+import asyncio
+import itertools
+import unittest
+from typing import Dict, List, Tuple
+from unittest import mock
+from elasticsearch import ConnectionTimeout
+from src.utils.process_documents.pdf_management import bulk_indexer
+from src.utils.process_documents.pdf_management.adaptive_concurrency import AIMDLimiter
+from src.utils.process_documents.pdf_management.bulk_indexer import BulkIndexer
+
+_names = itertools.count()
+
+OK = (True, {"status": 201})
+TOO_MANY_REQUESTS = (False, {"status": 429, "error": "es_rejected_execution_exception"})
+
+
+class ScriptedBulkIndexer(BulkIndexer):
+    """
+    BulkIndexer sin Elasticsearch: cada petición devuelve la siguiente respuesta del guion,
+    que es una lista de resultados por acción, una excepción o un asyncio.Event que se
+    espera antes de responder OK a todo.
+    """
+    def __init__(self, responses: List, **kwargs):
+        kwargs.setdefault("limiter", AIMDLimiter(f"test_bulk_{next(_names)}", initial_limit=2))
+        kwargs.setdefault("flush_interval", 0)
+        kwargs.setdefault("initial_backoff", 0.001)
+        kwargs.setdefault("max_backoff", 0.001)
+        super().__init__(es=None, index_name="pdfs", **kwargs)
+        self.responses = list(responses)
+        self.requests: List[List[str]] = []
+        self.request_started = asyncio.Event()
+
+    async def _bulk_request(self, actions: List[Dict]) -> List[Tuple[bool, Dict]]:
+        self.requests.append([action["_id"] for action in actions])
+        self.request_started.set()
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        if isinstance(response, asyncio.Event):
+            await response.wait()
+            return [OK] * len(actions)
+        return response
+
+
+class BulkIndexerRetryTest(unittest.IsolatedAsyncioTestCase):
+    async def test_rejected_documents_are_retried(self):
+        indexer = ScriptedBulkIndexer([[OK, TOO_MANY_REQUESTS], [OK]])
+        first = await indexer.add("a", {"x": 1})
+        second = await indexer.add("b", {"x": 2})
+        await indexer.flush()
+
+        self.assertEqual(indexer.requests, [["a", "b"], ["b"]])
+        self.assertTrue((await first)["success"])
+        self.assertTrue((await second)["success"])
+        self.assertEqual(indexer.stats["retried"], 1)
+        self.assertEqual(indexer.limiter.in_flight, 0)
+
+    async def test_retries_exhausted_fail_with_last_status(self):
+        indexer = ScriptedBulkIndexer([[TOO_MANY_REQUESTS]] * 3, max_retries=2)
+        future = await indexer.add("a", {"x": 1})
+        await indexer.flush()
+
+        result = await future
+        self.assertFalse(result["success"])
+        self.assertEqual(result["status"], 429)
+        self.assertEqual(len(indexer.requests), 3)
+
+    async def test_transport_timeout_is_retried(self):
+        indexer = ScriptedBulkIndexer([ConnectionTimeout("TIMEOUT", "timed out", None), [OK]])
+        future = await indexer.add("a", {"x": 1})
+        await indexer.flush()
+
+        self.assertTrue((await future)["success"])
+        self.assertEqual(len(indexer.requests), 2)
+
+    async def test_transport_timeout_reduces_the_limit(self):
+        indexer = ScriptedBulkIndexer([ConnectionTimeout("TIMEOUT", "timed out", None)], max_retries=0)
+        future = await indexer.add("a", {"x": 1})
+        await indexer.flush()
+
+        self.assertEqual((await future)["status"], "TIMEOUT")
+        self.assertEqual(indexer.limiter.limit, 1)
+
+    async def test_cancel_during_backoff_fails_pending_futures(self):
+        indexer = ScriptedBulkIndexer([[OK, TOO_MANY_REQUESTS, TOO_MANY_REQUESTS]])
+        futures = [await indexer.add(doc_id, {"x": 1}) for doc_id in ("a", "b", "c")]
+
+        with mock.patch.object(bulk_indexer, "jittered_backoff", return_value=60):
+            flush = asyncio.create_task(indexer.flush())
+            await indexer.request_started.wait()
+            await asyncio.sleep(0)
+            flush.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await flush
+
+        results = [future.result() for future in futures]
+        self.assertTrue(results[0]["success"])
+        for result in results[1:]:
+            self.assertFalse(result["success"])
+            self.assertIn("cancelado", result["error"])
+        self.assertEqual(indexer.limiter.in_flight, 0)
+
+    async def test_cancel_during_request_releases_the_limiter(self):
+        indexer = ScriptedBulkIndexer([asyncio.Event()])
+        future = await indexer.add("a", {"x": 1})
+
+        flush = asyncio.create_task(indexer.flush())
+        await indexer.request_started.wait()
+        flush.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await flush
+
+        self.assertFalse(future.result()["success"])
+        self.assertEqual(indexer.limiter.in_flight, 0)
+
+
+class BulkIndexerCloseTest(unittest.IsolatedAsyncioTestCase):
+    async def test_close_waits_for_the_periodic_flush_in_flight(self):
+        release = asyncio.Event()
+        indexer = ScriptedBulkIndexer([release], flush_interval=0.02)
+        indexer.start()
+        future = await indexer.add("a", {"x": 1})
+        await asyncio.wait_for(indexer.request_started.wait(), 1)
+
+        close = asyncio.create_task(indexer.close())
+        await asyncio.sleep(0.05)
+        self.assertFalse(close.done())
+
+        release.set()
+        await asyncio.wait_for(close, 1)
+        self.assertTrue(future.result()["success"])
+        self.assertIsNone(indexer._timer)
+
+    async def test_close_sends_the_remaining_buffer(self):
+        indexer = ScriptedBulkIndexer([[OK, OK]], flush_interval=60)
+        indexer.start()
+        futures = [await indexer.add(doc_id, {"x": 1}) for doc_id in ("a", "b")]
+
+        await asyncio.wait_for(indexer.close(), 1)
+        self.assertEqual(indexer.requests, [["a", "b"]])
+        self.assertTrue(all(future.result()["success"] for future in futures))
+
+    async def test_close_without_documents_returns_immediately(self):
+        indexer = ScriptedBulkIndexer([], flush_interval=60)
+        indexer.start()
+        await asyncio.wait_for(indexer.close(), 1)
+        self.assertEqual(indexer.requests, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+from src.utils.process_documents.pdf_management.page_classifier import ScannedPageClassifier
+
+TEXT = b"BT /F1 12 Tf 72 600 Td (Hola) Tj (mundo) Tj (texto) Tj ET"
+IMAGE = b"q 612 0 0 792 0 0 cm /Im1 Do Q"
+
+
+def write_pdf(path: str, page_stream: bytes, form_stream: bytes = None):
+    """
+    PDF de una página con una fuente y una imagen. Con `form_stream` ambas están en los
+    recursos de un Form XObject que la página dibuja, como tras estampar o fusionar PDFs.
+    """
+    font = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    image = (
+        b"<< /Type /XObject /Subtype /Image /Width 1 /Height 1 /ColorSpace /DeviceGray"
+        b" /BitsPerComponent 8 /Length 1 >>\nstream\n\x80\nendstream"
+    )
+    inner_resources = b"<< /Font << /F1 6 0 R >> /XObject << /Im1 7 0 R >> >>"
+    if form_stream is None:
+        page_resources = inner_resources
+        form = b"<< >>"
+    else:
+        page_resources = b"<< /XObject << /Fm1 4 0 R >> >>"
+        form = (
+            b"<< /Type /XObject /Subtype /Form /BBox [0 0 612 792] /Resources "
+            + inner_resources + b" /Length %d >>\nstream\n" % len(form_stream)
+            + form_stream + b"\nendstream"
+        )
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources "
+        + page_resources + b" /Contents 5 0 R >>",
+        form,
+        b"<< /Length %d >>\nstream\n" % len(page_stream) + page_stream + b"\nendstream",
+        font,
+        image,
+    ]
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    data += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, 'wb') as file:
+        file.write(data)
+
+
+class ScannedPageClassifierTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.classifier = ScannedPageClassifier(min_text_operators=3)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def classify(self, page_stream: bytes, form_stream: bytes = None) -> bool:
+        path = os.path.join(self.directory.name, 'page.pdf')
+        write_pdf(path, page_stream, form_stream)
+        return self.classifier.classify(path)[1]
+
+    def test_page_with_text_over_an_image_is_text(self):
+        self.assertFalse(self.classify(IMAGE + b" " + TEXT))
+
+    def test_full_page_image_without_text_needs_ocr(self):
+        self.assertTrue(self.classify(IMAGE))
+
+    def test_text_inside_a_form_xobject_is_text(self):
+        self.assertFalse(self.classify(b"q /Fm1 Do Q", IMAGE + b" " + TEXT))
+
+    def test_image_inside_a_form_xobject_without_text_needs_ocr(self):
+        self.assertTrue(self.classify(b"q /Fm1 Do Q", IMAGE))
+
+
+if __name__ == '__main__':
+    unittest.main()
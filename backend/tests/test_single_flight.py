@@ -0,0 +1,114 @@
+import asyncio
+import unittest
+from src.service.single_flight import SingleFlight
+
+
+class Backend:
+    """Función de búsqueda falsa que cuenta las llamadas y espera a que se la libere."""
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        call = self.calls
+        await self.release.wait()
+        return f"resultado {call}"
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class SingleFlightTest(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_calls_share_one_execution(self):
+        flights = SingleFlight(max_waiters=10, timeout=1)
+        backend = Backend()
+        tasks = [asyncio.create_task(flights.do("q", backend)) for _ in range(3)]
+        await settle()
+
+        backend.release.set()
+        self.assertEqual(await asyncio.gather(*tasks), ["resultado 1"] * 3)
+        self.assertEqual(backend.calls, 1)
+        self.assertEqual(flights.stats()["shared"], 2)
+        self.assertEqual(flights.stats()["in_flight"], 0)
+
+    async def test_different_keys_do_not_share(self):
+        flights = SingleFlight(max_waiters=10, timeout=1)
+        backend = Backend()
+        backend.release.set()
+        await asyncio.gather(flights.do("a", backend), flights.do("b", backend))
+        self.assertEqual(backend.calls, 2)
+
+    async def test_exception_reaches_every_waiter(self):
+        flights = SingleFlight(max_waiters=10, timeout=1)
+        release = asyncio.Event()
+
+        async def failing():
+            await release.wait()
+            raise ValueError("índice no disponible")
+
+        tasks = [asyncio.create_task(flights.do("q", failing)) for _ in range(3)]
+        await settle()
+        release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+
+    async def test_cancelled_caller_does_not_cancel_the_others(self):
+        flights = SingleFlight(max_waiters=10, timeout=1)
+        backend = Backend()
+        first = asyncio.create_task(flights.do("q", backend))
+        second = asyncio.create_task(flights.do("q", backend))
+        await settle()
+
+        first.cancel()
+        await settle()
+        backend.release.set()
+        self.assertEqual(await second, "resultado 1")
+        self.assertTrue(first.cancelled())
+
+    async def test_overflow_opens_a_new_flight_that_replaces_the_full_one(self):
+        flights = SingleFlight(max_waiters=2, timeout=1)
+        first_backend = Backend()
+        second_backend = Backend()
+        full = [asyncio.create_task(flights.do("q", first_backend)) for _ in range(2)]
+        await settle()
+        overflow = asyncio.create_task(flights.do("q", second_backend))
+        await settle()
+        self.assertEqual((first_backend.calls, second_backend.calls), (1, 1))
+        self.assertEqual(flights.stats()["overflows"], 1)
+
+        # Al terminar la llamada llena no debe olvidarse la que la sustituyó
+        first_backend.release.set()
+        await asyncio.gather(*full)
+        late = asyncio.create_task(flights.do("q", second_backend))
+        await settle()
+        self.assertEqual(second_backend.calls, 1)
+
+        second_backend.release.set()
+        self.assertEqual(await asyncio.gather(overflow, late), ["resultado 1"] * 2)
+        self.assertEqual(flights.stats()["in_flight"], 0)
+
+    async def test_timeout_reaches_every_waiter(self):
+        flights = SingleFlight(max_waiters=10, timeout=0.05)
+        backend = Backend()
+        tasks = [asyncio.create_task(flights.do("q", backend)) for _ in range(3)]
+
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        self.assertTrue(all(isinstance(result, asyncio.TimeoutError) for result in results))
+        self.assertEqual(backend.calls, 1)
+        self.assertEqual(flights.stats()["timeouts"], 1)
+        self.assertEqual(flights.stats()["in_flight"], 0)
+
+    async def test_new_call_after_completion_runs_again(self):
+        flights = SingleFlight(max_waiters=10, timeout=1)
+        backend = Backend()
+        backend.release.set()
+        await flights.do("q", backend)
+        await flights.do("q", backend)
+        self.assertEqual(backend.calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
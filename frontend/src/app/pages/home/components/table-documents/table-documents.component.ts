@@ -184,7 +184,8 @@ export class DocumentSearchComponent implements OnInit, AfterViewInit, OnDestroy
             _id: result.filename, // Utilizar el nombre del archivo como ID
             _source: {
               name_document: result.filename,
-              content: Array.isArray(page.content) ? page.content.join(' ') : page.content, // Verificar si highlights es un array
+              // La búsqueda solo devuelve el texto completo con include_content; por defecto se usan los fragmentos resaltados
+              content: page.content ?? (page.highlights || []).join(' ... ').replace(/<\/?(mark|em)>/g, ''),
               page_number: page.page_number, // Número de página
               total_pages: result.total_pages,
               relative_path: result.relative_path // Path relativo